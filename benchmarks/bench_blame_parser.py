@@ -0,0 +1,110 @@
+"""
+Microbenchmark for the blame parsers on a synthetic file (100k lines by default).
+
+Compares the line-level path, decoding `git blame --line-porcelain` output and building a
+BlameLine per line with `_parse_porcelain_blame`, against the streaming
+`_summarize_porcelain_blame`, which folds `git blame --porcelain` bytes into per-author counts.
+
+    pip install -e . && python benchmarks/bench_blame_parser.py [--lines 100000] [--repeat 5]
+"""
+
+import argparse
+import functools
+import io
+import random
+import time
+from typing import Callable, List, Tuple
+
+from gitwit.utils.git_helpers import _parse_porcelain_blame, _summarize_porcelain_blame
+
+CHUNK_SIZE = 64 * 1024
+
+
+def build_outputs(num_lines: int, seed: int = 0) -> Tuple[bytes, bytes]:
+    """Return matching (--line-porcelain, --porcelain) outputs for a synthetic file."""
+    rng = random.Random(seed)
+    commits = [
+        (f"{rng.getrandbits(160):040x}", f"Author {i % 40}", 1600000000 + i * 3600)
+        for i in range(500)
+    ]
+
+    line_porcelain: List[str] = []
+    porcelain: List[str] = []
+    seen = set()
+    lineno = 1
+
+    while lineno <= num_lines:
+        sha, author, author_time = rng.choice(commits)
+        hunk_size = min(rng.randint(1, 30), num_lines - lineno + 1)
+        metadata = [
+            f"author {author}",
+            f"author-mail <{author.replace(' ', '.')}@example.com>",
+            f"author-time {author_time}",
+            "author-tz +0000",
+            f"committer {author}",
+            f"committer-mail <{author.replace(' ', '.')}@example.com>",
+            f"committer-time {author_time}",
+            "committer-tz +0000",
+            f"summary change {sha[:8]}",
+            "filename src/big_module.py",
+        ]
+
+        for offset in range(hunk_size):
+            content = f"\t    value_{lineno} = compute(value_{lineno - 1}, {offset})  # filler"
+            line_porcelain += [f"{sha} {lineno} {lineno} {hunk_size}", *metadata, content]
+
+            if offset == 0:
+                porcelain.append(f"{sha} {lineno} {lineno} {hunk_size}")
+                if sha not in seen:
+                    porcelain += metadata
+                    seen.add(sha)
+            else:
+                porcelain.append(f"{sha} {lineno} {lineno}")
+            porcelain.append(content)
+            lineno += 1
+
+    def encode(lines: List[str]) -> bytes:
+        return "".join(f"{line}\n" for line in lines).encode("utf-8")
+
+    return encode(line_porcelain), encode(porcelain)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    line_porcelain, porcelain = build_outputs(args.lines)
+    # read in pipe-sized chunks, as from git's stdout
+    chunks = list(iter(functools.partial(io.BytesIO(porcelain).read, CHUNK_SIZE), b""))
+
+    # what fetch_file_gitblame does with GitPython's decoded output
+    def line_level():
+        return _parse_porcelain_blame(line_porcelain.decode("utf-8").splitlines())
+
+    def streaming():
+        return _summarize_porcelain_blame(chunks)
+
+    line_level_s = best_of(args.repeat, line_level)
+    streaming_s = best_of(args.repeat, streaming)
+
+    print(f"{args.lines} blamed lines, best of {args.repeat}")
+    print(
+        f"  _parse_porcelain_blame     {line_level_s * 1000:9.1f} ms  ({len(line_porcelain):,} B)"
+    )
+    print(f"  _summarize_porcelain_blame {streaming_s * 1000:9.1f} ms  ({len(porcelain):,} B)")
+    print(f"  speedup                    {line_level_s / streaming_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+End-to-end benchmark of every gitwit command on a synthetic repository.
+
+Generates (or reuses) a deterministic repository with `synthetic_repo.py`, then runs each
+command in a fresh `python -m gitwit` process: once "cold", with gitwit's indexes and caches
+under .git/gitwit deleted first so the run builds them, then `--repeat` times "warm". Every
+run is profiled with `--profile-output`, so alongside its wall and CPU time it records the
+time of each phase inside the command and the git processes it started. Results are written
+as JSON, and `--compare` prints them against an earlier run, e.g. of another revision.
+
+    pip install -e . && python benchmarks/bench_commands.py --preset 1k --output main.json
+    python benchmarks/bench_commands.py --preset 1k --compare main.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from synthetic_repo import PRESETS, RepoLayout, RepoSpec, generate_repo, load_layout
+
+COMMANDS = ("ta", "sa", "wte", "rc", "leo", "hz", "report")
+SOURCE_DIR = Path(__file__).resolve().parent.parent
+
+
+def command_args(command: str, layout: RepoLayout, window_days: int) -> List[str]:
+    """Return the arguments to benchmark `command` with on a repository with `layout`."""
+    until = datetime.fromtimestamp(layout.last_timestamp, tz=timezone.utc) + timedelta(days=1)
+    since = until - timedelta(days=window_days)
+    dates = ["--since", since.strftime("%Y-%m-%d"), "--until", until.strftime("%Y-%m-%d")]
+
+    return {
+        "ta": ["ta", *dates],
+        "sa": ["sa", *dates],
+        "wte": ["wte", "--path", layout.hottest_file],
+        "rc": ["rc", *dates],
+        "leo": ["leo", ".py"],
+        "hz": ["hz", *dates],
+        "report": ["report", *dates],
+    }[command]
+
+
+def run_command(repo: Path, argv: List[str]) -> Dict:
+    """
+    Run `gitwit <argv>` in `repo`, returning its wall time and CPU time, git's included, and
+    the profile gitwit recorded of its phases and git processes.
+    """
+    env = {**os.environ, "GITWIT_NO_SERVER": "1", "COLUMNS": "200"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_path = Path(tmp) / "profile.json"
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+
+        result = subprocess.run(
+            [sys.executable, "-m", "gitwit", "--profile-output", str(profile_path), *argv],
+            cwd=repo,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+        wall = time.perf_counter() - start
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"gitwit {' '.join(argv)} failed ({result.returncode}): {message}")
+
+        profile = json.loads(profile_path.read_text())
+
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        # the same run as measured inside gitwit, i.e. without interpreter startup
+        "profile": {key: profile[key] for key in ("wall_s", "cpu_s", "git_cpu_s", "phases", "git")},
+    }
+
+
+def benchmark_command(repo: Path, argv: List[str], repeat: int) -> Dict:
+    # cold: every index and cache has to be built from scratch
+    shutil.rmtree(repo / ".git" / "gitwit", ignore_errors=True)
+    cold = run_command(repo, argv)
+    warm = [run_command(repo, argv) for _ in range(repeat)]
+
+    return {
+        "argv": argv,
+        "cold": cold,
+        "warm": warm,
+        "warm_best_s": min(run["wall_s"] for run in warm) if warm else None,
+    }
+
+
+def prepare_repo(
+    spec: RepoSpec, workdir: Path, regenerate: bool
+) -> Tuple[Path, RepoLayout, Optional[float]]:
+    """
+    Return the repository for `spec`, its layout, and how long generating it took (None when
+    an earlier run's repository is reused).
+    """
+    repo = workdir / spec.name
+    if regenerate:
+        shutil.rmtree(repo, ignore_errors=True)
+
+    if repo.exists():
+        return repo, load_layout(repo, spec), None
+
+    print(f"Generating {spec.name} in {repo} ...", flush=True)
+    start = time.perf_counter()
+    layout = generate_repo(repo, spec)
+    return repo, layout, time.perf_counter() - start
+
+
+def environment() -> Dict[str, str]:
+    def output(*args: str) -> str:
+        result = subprocess.run(args, cwd=SOURCE_DIR, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    return {
+        "gitwit_revision": output("git", "rev-parse", "HEAD"),
+        "gitwit_dirty": bool(output("git", "status", "--porcelain", "--untracked-files=no")),
+        "git": output("git", "--version"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def print_results(results: Dict, baseline: Optional[Dict]) -> None:
+    print(f"\n{'command':<8} {'cold s':>9} {'warm s':>9}", end="")
+    print(f" {'base warm s':>12} {'ratio':>7}" if baseline else "")
+
+    for command, result in results["commands"].items():
+        warm = result["warm_best_s"]
+        print(f"{command:<8} {result['cold']['wall_s']:9.3f} {_format(warm):>9}", end="")
+
+        base = (baseline or {}).get("commands", {}).get(command)
+        if base is None:
+            print(f" {'-':>12} {'-':>7}" if baseline else "")
+        else:
+            base_warm = base["warm_best_s"]
+            ratio = warm / base_warm if warm and base_warm else None
+            print(f" {_format(base_warm):>12} {_format(ratio, '.2f'):>7}")
+
+
+def print_phases(results: Dict) -> None:
+    """Print where the cold run and the best warm run of each command spent their time."""
+    for command, result in results["commands"].items():
+        runs = [("cold", result["cold"])]
+        if result["warm"]:
+            runs.append(("warm", min(result["warm"], key=lambda run: run["wall_s"])))
+
+        print(f"\n{command}")
+        for label, run in runs:
+            profile = run["profile"]
+            git = profile["git"]
+            print(
+                f"  {label}: {profile['wall_s']:.3f}s in gitwit, {git['processes']} git processes,"
+                f" {git['bytes_read']:,} bytes read"
+            )
+            for phase in profile["phases"]:
+                print(f"    {phase['name']:<40} {phase['calls']:>7} {phase['wall_s']:9.3f}s")
+
+
+def _format(value: Optional[float], spec: str = ".3f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--preset", choices=PRESETS, default="1k")
+    parser.add_argument("--commits", type=int, help="Override the preset's commit count")
+    parser.add_argument("--authors", type=int, help="Override the preset's author count")
+    parser.add_argument("--files", type=int, help="Override the preset's file count")
+    parser.add_argument("--depth", type=int, help="Override the preset's directory depth")
+    parser.add_argument("--file-size", type=int, help="Override the preset's file size (bytes)")
+    parser.add_argument("--seed", type=int, help="Override the preset's random seed")
+    parser.add_argument("--commands", default=",".join(COMMANDS), help="Comma separated")
+    parser.add_argument("--repeat", type=int, default=3, help="Warm runs per command")
+    parser.add_argument("--window-days", type=int, default=180, help="Date range queried")
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "gitwit-bench",
+        help="Where generated repositories are kept and reused",
+    )
+    parser.add_argument("--regenerate", action="store_true", help="Generate the repo again")
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run")
+    parser.add_argument(
+        "--phases", action="store_true", help="Also print each command's time per phase"
+    )
+    args = parser.parse_args()
+
+    overrides = {
+        field: getattr(args, field)
+        for field in ("commits", "authors", "files", "depth", "file_size", "seed")
+        if getattr(args, field) is not None
+    }
+    spec = RepoSpec(**{**asdict(PRESETS[args.preset]), **overrides})
+    commands = [c for c in args.commands.split(",") if c]
+    unknown = set(commands) - set(COMMANDS)
+    if unknown:
+        parser.error(f"unknown commands: {', '.join(sorted(unknown))}")
+
+    repo, layout, generation_s = prepare_repo(spec, args.workdir, args.regenerate)
+    results = {
+        "environment": environment(),
+        "repo": {**asdict(spec), "generation_s": generation_s and round(generation_s, 2)},
+        "commands": {},
+    }
+
+    for command in commands:
+        print(f"Running {command} ...", flush=True)
+        argv = command_args(command, layout, args.window_days)
+        results["commands"][command] = benchmark_command(repo, argv, args.repeat)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    baseline_spec = {k: v for k, v in (baseline or {}).get("repo", {}).items() if k in asdict(spec)}
+    if baseline and baseline_spec != asdict(spec):
+        print(f"Warning: {args.compare} was measured on a different repository", file=sys.stderr)
+    print_results(results, baseline)
+    if args.phases:
+        print_phases(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
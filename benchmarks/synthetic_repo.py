@@ -0,0 +1,228 @@
+"""
+Deterministic synthetic git repositories for benchmarking, written with `git fast-import`.
+
+The same spec and seed always produce the same history, down to the commit SHAs, so timings
+taken on different revisions of gitwit (or different machines) are of the same repository.
+
+    python benchmarks/synthetic_repo.py /tmp/repo-1k --preset 1k
+"""
+
+import argparse
+import json
+import math
+import random
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List
+
+BASE_TIMESTAMP = 1577836800  # 2020-01-01T00:00:00Z
+# every history spans about two years, however many commits it has
+HISTORY_SPAN_SECONDS = 2 * 365 * 24 * 3600
+EXTENSIONS = (".py", ".py", ".js", ".md", ".txt")
+SPEC_FILE_NAME = "gitwit-bench-spec.json"
+
+MESSAGES = (
+    "Update {name}",
+    "Fix edge case in {dir}",
+    "Refactor {dir}",
+    "Tidy up {name}",
+    "Add tests for {dir}",
+    "Hotfix crash in {name}",
+    "Rotate api key used by {dir}",
+)
+
+
+@dataclass(frozen=True)
+class RepoSpec:
+    commits: int
+    authors: int
+    files: int
+    depth: int
+    file_size: int
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return (
+            f"c{self.commits}-a{self.authors}-f{self.files}-d{self.depth}"
+            f"-s{self.file_size}-r{self.seed}"
+        )
+
+
+PRESETS: Dict[str, RepoSpec] = {
+    "1k": RepoSpec(commits=1_000, authors=20, files=500, depth=3, file_size=1024),
+    "100k": RepoSpec(commits=100_000, authors=200, files=20_000, depth=5, file_size=512),
+    "1m": RepoSpec(commits=1_000_000, authors=2_000, files=100_000, depth=6, file_size=256),
+}
+
+
+@dataclass
+class RepoLayout:
+    """What a benchmark needs to know about a generated repository to query it."""
+
+    first_timestamp: int
+    last_timestamp: int
+    top_directory: str
+    hottest_file: str
+
+
+def generate_repo(path: Path, spec: RepoSpec) -> RepoLayout:
+    """Create a repository at `path` (which must not exist yet) with the history `spec` asks for."""
+    path.mkdir(parents=True)
+    _git(path, "init", "-q", "-b", "main")
+
+    proc = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--done"], cwd=path, stdin=subprocess.PIPE
+    )
+    try:
+        layout = _write_history(proc.stdin, spec)
+        proc.stdin.write(b"done\n")
+    finally:
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"git fast-import failed with {proc.returncode}")
+
+    # commands such as wte look at the working tree too
+    _git(path, "checkout", "-q", "-f", "main")
+
+    (path / ".git" / SPEC_FILE_NAME).write_text(
+        json.dumps({"spec": asdict(spec), "layout": asdict(layout)}, indent=2)
+    )
+    return layout
+
+
+def load_layout(path: Path, spec: RepoSpec) -> RepoLayout:
+    """Return the layout of a repository generated earlier from `spec`, or raise ValueError."""
+    try:
+        stamp = json.loads((path / ".git" / SPEC_FILE_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path} is not a generated benchmark repository: {e}") from e
+
+    if stamp["spec"] != asdict(spec):
+        raise ValueError(f"{path} was generated from a different spec: {stamp['spec']}")
+
+    return RepoLayout(**stamp["layout"])
+
+
+def file_paths(spec: RepoSpec) -> List[str]:
+    """Spread `spec.files` files over a directory tree `spec.depth` levels deep."""
+    fanout = max(2, math.ceil(spec.files ** (1 / (spec.depth + 1))))
+    paths = []
+
+    for i in range(spec.files):
+        directories = []
+        n = i // fanout
+        for level in range(spec.depth):
+            directories.append(f"dir{level}_{n % fanout}")
+            n //= fanout
+        paths.append("/".join([*directories, f"module_{i}{EXTENSIONS[i % len(EXTENSIONS)]}"]))
+
+    return paths
+
+
+def _write_history(stream: BinaryIO, spec: RepoSpec) -> RepoLayout:
+    rng = random.Random(spec.seed)
+    paths = file_paths(spec)
+    lines_per_file = max(1, spec.file_size // 40)
+    contents: List[List[str]] = []
+    touches = [0] * spec.files
+
+    # a few authors make most of the commits, as in most real teams
+    authors = [(f"Author {i}", f"author{i}@example.com") for i in range(spec.authors)]
+    weights = [1 / (i + 1) for i in range(spec.authors)]
+    interval = max(1, HISTORY_SPAN_SECONDS // spec.commits)
+    timestamp = BASE_TIMESTAMP
+
+    for n in range(spec.commits):
+        timestamp += rng.randint(1, 2 * interval)
+        name, email = rng.choices(authors, weights)[0]
+
+        # files are added steadily, so the last commit has added all of them
+        changed = list(range(len(contents), spec.files * (n + 1) // spec.commits))
+        for index in changed:
+            contents.append([f"# {paths[index]} line {i}" for i in range(lines_per_file)])
+
+        if contents:
+            # now and then a sweeping change across many files
+            edits = 15 if rng.random() < 0.01 else rng.randint(1, 3)
+            for _ in range(edits):
+                index = rng.randrange(len(contents))
+                line = rng.randrange(lines_per_file)
+                contents[index][line] = f"value_{line} = {n}  # changed by {name}"
+                changed.append(index)
+
+        changed = sorted(set(changed))
+        example = paths[changed[0]] if changed else "README"
+        message = rng.choice(MESSAGES).format(
+            name=example.rsplit("/", 1)[-1], dir=example.rsplit("/", 1)[0]
+        )
+
+        _write_commit(stream, name, email, timestamp, message, paths, contents, changed)
+        for index in changed:
+            touches[index] += 1
+
+    hottest = max(range(spec.files), key=lambda i: touches[i]) if spec.files else 0
+    return RepoLayout(
+        first_timestamp=BASE_TIMESTAMP,
+        last_timestamp=timestamp,
+        top_directory=paths[0].split("/", 1)[0] if spec.depth else ".",
+        hottest_file=paths[hottest] if spec.files else "",
+    )
+
+
+def _write_commit(
+    stream: BinaryIO,
+    name: str,
+    email: str,
+    timestamp: int,
+    message: str,
+    paths: List[str],
+    contents: List[List[str]],
+    changed: List[int],
+) -> None:
+    identity = f"{name} <{email}> {timestamp} +0000".encode("utf-8")
+    message_bytes = message.encode("utf-8") + b"\n"
+    parts = [
+        b"commit refs/heads/main\n",
+        b"author " + identity + b"\n",
+        b"committer " + identity + b"\n",
+        b"data %d\n" % len(message_bytes),
+        message_bytes,
+    ]
+
+    for index in changed:
+        content = "".join(f"{line}\n" for line in contents[index]).encode("utf-8")
+        parts += [
+            b"M 100644 inline " + paths[index].encode("utf-8") + b"\n",
+            b"data %d\n" % len(content),
+            content,
+        ]
+
+    parts.append(b"\n")
+    stream.write(b"".join(parts))
+
+
+def _git(path: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=path, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--preset", choices=PRESETS, default="1k")
+    args = parser.parse_args()
+
+    spec = PRESETS[args.preset]
+    start = time.perf_counter()
+    layout = generate_repo(args.path, spec)
+
+    print(f"Generated {spec.name} in {time.perf_counter() - start:.1f}s at {args.path}")
+    print(json.dumps(asdict(layout), indent=2))
+
+
+if __name__ == "__main__":
+    main()
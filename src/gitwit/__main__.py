@@ -1,4 +1,22 @@
-from .cli.cli import app
+import sys
+
+from gitwit.server.client import forward_to_server
+
+
+def main():
+    # a running `gitwit serve` answers without us importing typer or any command
+    try:
+        exit_code = forward_to_server(sys.argv[1:])
+    except ConnectionError as e:
+        sys.stderr.write(f"gitwit: lost the connection to gitwit serve: {e}\n")
+        sys.exit(1)
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from gitwit.cli.cli import app
 
-if __name__ == "__main__":
     app()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,91 @@
+import sys
+from pathlib import Path
+from typing import Optional
+
 import typer
 
-from gitwit.commands import (
-    repo_hot_zones,
-    show_activity,
-    who_is_the_expert,
-    risky_commits,
-    team_activity,
-    latest_examples_of,
-)
-
-app = typer.Typer()
-
-app.command(name="ta")(team_activity.command)
-app.command(name="sa")(show_activity.command)
-app.command(name="wte")(who_is_the_expert.command)
-app.command(name="rc")(risky_commits.command)
-app.command(name="leo")(latest_examples_of.command)
-app.command(name="hz")(repo_hot_zones.command)
+from gitwit.cli.lazy_group import LazyCommandSpec, LazyGroup
+from gitwit.utils.profiler import PROFILE_ENV
+
+
+class GitwitGroup(LazyGroup):
+    # short help is each command's docstring summary; tests/test_cli.py keeps them in sync
+    lazy_commands = {
+        "ta": LazyCommandSpec(
+            "gitwit.commands.team_activity",
+            "Show developer activity summary between two dates.",
+        ),
+        "sa": LazyCommandSpec(
+            "gitwit.commands.show_activity",
+            "Show commit activity statistics between two dates.",
+        ),
+        "wte": LazyCommandSpec(
+            "gitwit.commands.who_is_the_expert",
+            "Determine who the expert is for a given file or directory based on blame"
+            " ownership and recency.",
+        ),
+        "rc": LazyCommandSpec(
+            "gitwit.commands.risky_commits",
+            "Identify risky commits in the repository in a given date range.",
+        ),
+        "leo": LazyCommandSpec(
+            "gitwit.commands.latest_examples_of",
+            "Find the latest examples of files matching a search term in the git history.",
+        ),
+        "hz": LazyCommandSpec(
+            "gitwit.commands.repo_hot_zones",
+            "Show the most active directories in the repository between two dates.",
+        ),
+        "report": LazyCommandSpec(
+            "gitwit.commands.report",
+            "Run several analyses between two dates, reading the history only once.",
+        ),
+        "serve": LazyCommandSpec(
+            "gitwit.commands.serve",
+            "Keep gitwit running for this worktree, answering other gitwit commands over a"
+            " local socket.",
+        ),
+    }
+
+
+app = typer.Typer(cls=GitwitGroup)
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        envvar=PROFILE_ENV,
+        help="Print where the command's time went, per phase and per git process, to stderr",
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, "--profile-output", dir_okay=False, help="Write the profile as JSON to this file"
+    ),
+    cprofile_output: Optional[Path] = typer.Option(
+        None,
+        "--cprofile-output",
+        dir_okay=False,
+        help="Run the command under cProfile and dump its stats to this file",
+    ),
+):
+    """
+    Extract and summarise information from the git repository you're in.
+    """
+    if profile or profile_output or cprofile_output:
+        from gitwit.utils.profiler import start_profiling
+
+        finish = start_profiling(
+            ctx.invoked_subcommand,
+            sys.argv[1:],
+            show_summary=profile,
+            output=profile_output,
+            cprofile_output=cprofile_output,
+        )
+        # closed once the command has finished, however it finished
+        ctx.call_on_close(finish)
+
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,59 @@
+import importlib
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import typer
+from typer.core import TyperCommand, TyperGroup
+from typer.models import CommandInfo
+
+from gitwit.utils.profiler import phase
+
+
+class LazyCommandSpec(NamedTuple):
+    # module defining a typer `command` function, imported only when the command runs
+    module: str
+    # shown by `gitwit --help`, so listing commands doesn't import them either
+    short_help: str
+
+
+class LazyGroup(TyperGroup):
+    """
+    Typer group whose subcommands are only imported when one of them actually runs.
+
+    Each command module pulls in GitPython, rich tables and progress bars, thread and process
+    pools and so on, none of which `gitwit --help` or shell completion of a command name
+    needs. Subclasses list their commands in `lazy_commands`.
+    """
+
+    lazy_commands: Dict[str, LazyCommandSpec] = {}
+
+    def list_commands(self, ctx) -> List[str]:
+        return [*super().list_commands(ctx), *self.lazy_commands]
+
+    def get_command(self, ctx, cmd_name: str) -> Optional[Any]:
+        spec = self.lazy_commands.get(cmd_name)
+        if spec is None:
+            return super().get_command(ctx, cmd_name)
+        return _LazyCommand(cmd_name, spec, self.rich_markup_mode)
+
+
+class _LazyCommand(TyperCommand):
+    """Stands in for a command in help listings, and loads it once it is given arguments."""
+
+    def __init__(self, name: str, spec: LazyCommandSpec, rich_markup_mode):
+        super().__init__(name=name, short_help=spec.short_help, help=spec.short_help)
+        self.spec = spec
+        self._rich_markup_mode = rich_markup_mode
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # the real command parses the arguments, so the context (and everything that's
+        # then invoked or completed through it) is the real command's
+        return self.load().make_context(info_name, args, parent=parent, **extra)
+
+    def load(self):
+        with phase("command import"):
+            module = importlib.import_module(self.spec.module)
+        return typer.main.get_command_from_info(
+            CommandInfo(name=self.name, callback=module.command),
+            pretty_exceptions_short=True,
+            rich_markup_mode=self._rich_markup_mode,
+        )
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from contextlib import closing
+from typing import Iterable, Iterator, List, Optional
 from datetime import datetime
 from dataclasses import dataclass
 import typer
@@ -6,11 +7,11 @@ from rich.table import Table
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 
 from gitwit.utils.console_singleton import ConsoleSingleton
-from gitwit.utils.date_utils import convert_to_datetime
-from gitwit.utils.fetch_git_log_entries import fetch_git_log_entries_of_added_files
+from gitwit.utils.fetch_git_log_entries import iter_git_log_entries_of_added_files
+from gitwit.utils.file_creation_index import FileCreationIndex, FileCreationIndexError
 from gitwit.utils.git_helpers import fetch_file_paths_tracked_by_git
-
-console = ConsoleSingleton.get_console()
+from gitwit.utils.output import OutputFormat, format_option, write_records
+from gitwit.utils.profiler import phase
 
 
 @dataclass
@@ -31,16 +32,24 @@ def command(
         None, "--author", "-a", help="Filter examples to commits by these authors"
     ),
     limit: int = typer.Option(10, "--limit", "-n", help="Maximum number of examples to show"),
+    output_format: OutputFormat = format_option(),
 ):
     """
     Find the latest examples of files matching a search term in the git history.
     """
 
-    examples = _find_latest_examples(search_term, directories, authors, limit)
+    console = ConsoleSingleton.get_console()
+    # NDJSON is streamed as the history is walked, so it isn't sorted by creation date
+    examples = _find_latest_examples(
+        search_term, directories, authors, limit, by_date=output_format is not OutputFormat.ndjson
+    )
 
-    if examples:
+    if output_format is not OutputFormat.table:
+        write_records(examples, output_format)
+    elif examples:
         table = _generate_table(search_term, examples)
-        console.print(table)
+        with phase("table rendering"):
+            console.print(table)
     else:
         console.print(f"[yellow]No examples found for prefix '{search_term}'.[/yellow]")
 
@@ -50,72 +59,108 @@ def _find_latest_examples(
     directories: Optional[List[str]],
     authors: Optional[List[str]],
     limit: int,
-) -> List[LatestFileExample]:
+    by_date: bool = True,
+) -> Iterable[LatestFileExample]:
+    """
+    Return the latest `limit` examples newest first. Without `by_date`, those found by walking
+    the history are yielded as they're found instead, in history order.
+    """
     # 1) Generate a list of all filees that match filters and exist in git
     matched_files = fetch_file_paths_tracked_by_git(search_term, directories)
 
     # 2) If no files match, fast return empty list
-    if not matched_files:
+    if not matched_files or limit <= 0:
         return []
 
-    # 3) Populate data for respective files based on git data, and filter by author
-    examples = _hydrate_examples_and_filter_based_on_git_data(matched_files, authors)
+    # 3) Populate data for respective files from the file creation index, and filter by
+    #    author. Without a usable index, walk the history of added files instead
+    try:
+        examples = _lookup_examples_in_index(matched_files, authors)
+    except FileCreationIndexError:
+        if not by_date:
+            return _iter_examples_in_history(matched_files, authors, limit)
+        examples = _hydrate_examples_and_filter_based_on_git_data(matched_files, authors, limit)
 
     # 4) sort & limit
     examples.sort(key=lambda x: x.created_at, reverse=True)
     return examples[:limit]
 
 
-def _hydrate_examples_and_filter_based_on_git_data(
+def _lookup_examples_in_index(
     target_files: List[str], authors: Optional[List[str]]
 ) -> List[LatestFileExample]:
-    # Fetch all git commits that have added files and parse into blocks
-    git_log_blocks = fetch_git_log_entries_of_added_files()
+    index = FileCreationIndex.for_repo()
+    index.refresh()
+
+    return [
+        LatestFileExample(path=c.path, created_at=c.created_datetime, author=c.author)
+        for c in index.lookup(target_files)
+        if not authors or any(a.lower() in c.author.lower() for a in authors)
+    ]
+
+
+def _hydrate_examples_and_filter_based_on_git_data(
+    target_files: List[str], authors: Optional[List[str]], limit: Optional[int] = None
+) -> List[LatestFileExample]:
+    return list(_iter_examples_in_history(target_files, authors, limit))
 
-    latest_examples_of: List[LatestFileExample] = []
+
+def _iter_examples_in_history(
+    target_files: List[str], authors: Optional[List[str]], limit: Optional[int] = None
+) -> Iterator[LatestFileExample]:
+    """
+    Walk the commits that added files, newest first, yielding each example as it's found
+    until `limit` examples (or every target file) have been; git is stopped as soon as that
+    happens.
+    """
+    console = ConsoleSingleton.get_console()
+    target_set = set(target_files)
+    found = 0
     seen_files: set[str] = set()
 
     # Loop over blocks, extract commit information, and filter by author if provided
-    with Progress(
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("{task.completed}/{task.total} commits"),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Scanning git history", total=len(git_log_blocks))
+    with (
+        Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.completed} commits"),
+            TimeElapsedColumn(),
+            console=console,
+            disable=not console.is_terminal,
+        ) as progress,
+        closing(iter_git_log_entries_of_added_files()) as git_log_blocks,
+    ):
+        # the history is streamed, so its length isn't known up front
+        task = progress.add_task("Scanning git history", total=None)
 
         for block in git_log_blocks:
             author = block.author
-            created_at_iso = block.created_at_iso
 
             if authors and not any(a.lower() in author.lower() for a in authors):
                 progress.advance(task)
                 continue
 
             for path in block.files:
-                path = path.strip()
-
-                if not path or path not in target_files or path in seen_files:
+                if path not in target_set or path in seen_files:
                     continue
 
-                latest_examples_of.append(
-                    LatestFileExample(
-                        path=path,
-                        created_at=convert_to_datetime(created_at_iso),
-                        author=author,
-                    )
+                yield LatestFileExample(
+                    path=path,
+                    created_at=block.authored_datetime,
+                    author=author,
                 )
                 seen_files.add(path)
+                found += 1
+
+                # If we've found enough examples, stop reading history
+                if limit is not None and found >= limit:
+                    return
 
             progress.advance(task)
 
-            # If we've seen as many files as we need, break early
-            if len(seen_files) >= len(target_files):
+            if len(seen_files) >= len(target_set):
                 break
 
-    return latest_examples_of
-
 
 def _generate_table(search_term: str, examples: List[LatestFileExample]) -> Table:
     table = Table(title=f"Latest examples for '{search_term}'")
@@ -1,17 +1,21 @@
+import heapq
 import typer
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 from dataclasses import dataclass
+from rich.console import RenderableType
 from rich.table import Table
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 
+from gitwit.models.commit_record import CommitRecord
 from gitwit.utils.console_singleton import ConsoleSingleton
 from gitwit.utils.human_readable_helpers import humanise_timedelta
 from gitwit.utils.git_helpers import get_filtered_commits
+from gitwit.utils.id_bitmap import IdBitmap, Interner
+from gitwit.utils.output import OutputFormat, format_option, write_records
+from gitwit.utils.profiler import phase
 from gitwit.utils.typer_helpers import handle_since_until_arguments
 
-console = ConsoleSingleton.get_console()
-
 
 @dataclass
 class HotZone:
@@ -30,7 +34,9 @@ class FileCommitEntry:
 
 
 class Node:
-    # Slots assigned to the Node class to optimize memory usage
+    # Slots assigned to the Node class to optimize memory usage. Commits and authors are
+    # interned to integer IDs and stored as bitmaps, rather than every ancestor of a path
+    # holding its own hash set of SHAs and names.
     __slots__ = (
         "name",
         "children",
@@ -43,9 +49,9 @@ class Node:
     def __init__(self, name: str):
         self.name = name
         self.children: dict[str, Node] = {}
-        self.commits: set[str] = set()
-        self.direct_commits: set[str] = set()
-        self.authors: set[str] = set()
+        self.commits = IdBitmap()
+        self.direct_commits = IdBitmap()
+        self.authors = IdBitmap()
         self.last_date: datetime = datetime.min.replace(tzinfo=timezone.utc)
 
 
@@ -61,104 +67,167 @@ def command(
         None, "--author", "-a", help="Filter commits to these authors"
     ),
     limit: int = typer.Option(10, "--limit", "-n", help="Maximum number of hot zones to show"),
+    depth: Optional[int] = typer.Option(
+        None,
+        "--depth",
+        min=1,
+        help="Roll directories deeper than this many levels up into their ancestor",
+    ),
+    output_format: OutputFormat = format_option(),
 ):
     """
     Show the most active directories in the repository between two dates.
     """
 
+    console = ConsoleSingleton.get_console()
     since_datetime, until_datetime = handle_since_until_arguments(since, until)
-    entries = _collect_file_commit_entries(since_datetime, until_datetime, directories, authors)
+    aggregator = HotZoneAggregator(since_datetime, until_datetime, limit, depth)
+    num_commits = _aggregate_commits(
+        aggregator, since_datetime, until_datetime, directories, authors
+    )
 
-    if not entries:
+    if not num_commits:
+        if output_format is not OutputFormat.table:
+            write_records([], output_format)
         return []
 
-    file_tree_root_node = _generate_file_tree(entries)
-    compressed_tree = _compress_node_tree(file_tree_root_node)
-    hot_zones = _calculate_hot_zones(compressed_tree)
+    hot_zones = aggregator.hot_zones()
 
-    if hot_zones:
-        hot_zones.sort(key=lambda z: z.commits, reverse=True)
-        hot_zones = hot_zones[:limit]
+    if output_format is not OutputFormat.table:
+        write_records(hot_zones, output_format)
+    elif hot_zones:
         table = _generate_table(hot_zones, since_datetime, until_datetime)
-        console.print(table)
+        with phase("table rendering"):
+            console.print(table)
     else:
         console.print(f"[yellow]No activity between {since} and {until}.[/yellow]")
 
 
-def _collect_file_commit_entries(
+def _aggregate_commits(
+    aggregator: "HotZoneAggregator",
     since: datetime,
     until: datetime,
     directories: Optional[List[str]],
     authors: Optional[List[str]],
-) -> List[FileCommitEntry]:
-    filtered = list(
-        get_filtered_commits(
+) -> int:
+    """
+    Feed each commit to `aggregator` as it is streamed from git, so the tree is built
+    without ever holding the history, and return how many there were.
+    """
+    console = ConsoleSingleton.get_console()
+    num_commits = 0
+
+    with (
+        phase("aggregation"),
+        Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.completed} commits"),
+            TimeElapsedColumn(),
+            console=console,
+            disable=not console.is_terminal,
+        ) as progress,
+    ):
+        # the history is streamed, so its length isn't known up front
+        task = progress.add_task("Collecting commits", total=None)
+
+        for commit in get_filtered_commits(
             since=since,
             until=until,
             directories=directories,
             authors=authors,
-        )
-    )
-
-    entries: List[FileCommitEntry] = []
-
-    # TODO: consider improving efficiency here avoiding iterating again
-    with Progress(
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("{task.completed}/{task.total} commits"),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Collecting commits", total=len(filtered))
-
-        for commit in filtered:
-            for path in commit.stats.files:
-                entries.append(
-                    FileCommitEntry(
-                        commit.hexsha,
-                        path,
-                        commit.author.name,
-                        commit.committed_datetime.astimezone(timezone.utc),
-                    )
-                )
+        ):
+            aggregator.add(commit)
+            num_commits += 1
             progress.advance(task)
 
-    return entries
+    return num_commits
 
 
-def _generate_file_tree(entries: List[FileCommitEntry]) -> Node:
-    root = Node("")
+def _generate_file_tree(entries: List[FileCommitEntry], depth: Optional[int] = None) -> Node:
+    """
+    Build the directory tree of `entries`. With a `depth`, changes below that many levels
+    are attributed to their ancestor at that depth, so deeper nodes are never created.
+    """
+    tree = FileTreeBuilder(depth)
 
-    def add_entry(sha: str, path: str, author: str, date: datetime):
-        parts = path.split("/")[:-1]
-        node = root
+    for e in entries:
+        tree.add(e.commit_hash, e.path, e.author, e.date)
 
-        # aggregate at root
-        node.commits.add(sha)
-        node.authors.add(author)
-        if date > node.last_date:
-            node.last_date = date
+    return tree.build()
+
+
+class FileTreeBuilder:
+    """Builds the tree of _generate_file_tree one file change at a time."""
+
+    def __init__(self, depth: Optional[int] = None):
+        self.depth = depth
+        self.root = Node("")
+        self.commit_ids = Interner()
+        self.author_ids = Interner()
+
+    def add(self, sha: str, path: str, author: str, date: datetime) -> None:
+        parts = path.split("/")[:-1][: self.depth]
+        node = self.root
 
         # traverse into subdirs
         for part in parts:
             if part not in node.children:
                 node.children[part] = Node(part)
-
             node = node.children[part]
-            node.commits.add(sha)
-            node.authors.add(author)
-            if date > node.last_date:
-                node.last_date = date
-
-        # record a direct commit on this directory
-        node.direct_commits.add(sha)
 
-    # 4. Iterate LogEntry instead of tuple
-    for e in entries:
-        add_entry(e.commit_hash, e.path, e.author, e.date)
+        # record the commit on its own directory only; _roll_up() unions it into ancestors
+        commit_id = self.commit_ids.intern(sha)
+        node.commits.add(commit_id)
+        node.direct_commits.add(commit_id)
+        node.authors.add(self.author_ids.intern(author))
+        if date > node.last_date:
+            node.last_date = date
 
-    return root
+    def build(self) -> Node:
+        _roll_up(self.root)
+        return self.root
+
+
+class HotZoneAggregator:
+    """Computes `hz`'s hot zones from commits fed to it one at a time, e.g. by `report`."""
+
+    def __init__(
+        self,
+        since: datetime,
+        until: datetime,
+        limit: Optional[int] = 10,
+        depth: Optional[int] = None,
+    ):
+        self.since = since
+        self.until = until
+        self.limit = limit
+        self.tree = FileTreeBuilder(depth)
+
+    def add(self, commit: CommitRecord) -> None:
+        for change in commit.files:
+            self.tree.add(commit.hexsha, change.path, commit.author, commit.committed_datetime)
+
+    @phase("tree building")
+    def hot_zones(self) -> List[HotZone]:
+        return _calculate_hot_zones(_compress_node_tree(self.tree.build()), self.limit)
+
+    def render(self) -> List[RenderableType]:
+        hot_zones = self.hot_zones()
+        if not hot_zones:
+            return [f"[yellow]No activity between {self.since} and {self.until}.[/yellow]"]
+        return [_generate_table(hot_zones, self.since, self.until)]
+
+
+def _roll_up(node: Node) -> None:
+    """Fold every directory's commits, authors and last change into its ancestors'."""
+    for child in node.children.values():
+        _roll_up(child)
+
+        node.commits |= child.commits
+        node.authors |= child.authors
+        if child.last_date > node.last_date:
+            node.last_date = child.last_date
 
 
 def _compress_node_tree(root: Node) -> Node:
@@ -183,26 +252,32 @@ def _compress_node_tree(root: Node) -> Node:
     return root
 
 
-def _calculate_hot_zones(root: Node) -> List[HotZone]:
-    zones: List[HotZone] = []
+def _calculate_hot_zones(root: Node, limit: Optional[int] = None) -> List[HotZone]:
+    """
+    Return a HotZone for every directory under `root`, or with a `limit`, only the `limit`
+    with the most commits, busiest first. Those are picked with a heap, so HotZones are
+    only built for the directories returned.
+    """
 
-    def gather(node: Node, prefix: str):
+    def gather(node: Node, prefix: str) -> Iterator[Tuple[str, Node]]:
         for child in node.children.values():
             p = f"{prefix}/{child.name}" if prefix else f"/{child.name}"
-
-            zones.append(
-                HotZone(
-                    path=p,
-                    commits=len(child.commits),
-                    contributors=len(child.authors),
-                    last_change=child.last_date,
-                )
-            )
-
-            gather(child, p)
-
-    gather(root, "")
-    return zones
+            yield p, child
+            yield from gather(child, p)
+
+    zones = gather(root, "")
+    if limit is not None:
+        zones = heapq.nlargest(limit, zones, key=lambda zone: len(zone[1].commits))
+
+    return [
+        HotZone(
+            path=p,
+            commits=len(node.commits),
+            contributors=len(node.authors),
+            last_change=node.last_date,
+        )
+        for p, node in zones
+    ]
 
 
 def _generate_table(zones: List[HotZone], since: datetime, until: datetime) -> Table:
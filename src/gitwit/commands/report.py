@@ -0,0 +1,75 @@
+"""Run several analyses over a single scan of the git history."""
+
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional
+import typer
+
+from gitwit.commands.repo_hot_zones import HotZoneAggregator
+from gitwit.commands.risky_commits import RiskConfigError, RiskyCommitAggregator, load_rules
+from gitwit.commands.show_activity import ActivityAggregator
+from gitwit.commands.team_activity import TeamActivityAggregator
+from gitwit.utils.commit_observer import CommitObserver, observe_commits
+from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.git_helpers import get_filtered_commits
+from gitwit.utils.profiler import phase
+from gitwit.utils.typer_helpers import handle_since_until_arguments
+
+
+class Analysis(str, Enum):
+    ta = "ta"
+    sa = "sa"
+    hz = "hz"
+    rc = "rc"
+
+
+def command(
+    analyses: Optional[List[Analysis]] = typer.Argument(
+        None, help="Analyses to run, in order  [default: all of them]"
+    ),
+    since: str = typer.Option(..., help="Start date in YYYY-MM-DD format"),
+    until: str = typer.Option(..., help="End date in YYYY-MM-DD format"),
+    rules: Optional[Path] = typer.Option(None, "--rules", help="JSON file of risk rules for rc"),
+):
+    """
+    Run several analyses between two dates, reading the history only once.
+    """
+
+    console = ConsoleSingleton.get_console()
+    since_date, until_date = handle_since_until_arguments(since, until)
+
+    try:
+        observers = _create_observers(analyses or list(Analysis), since_date, until_date, rules)
+    except RiskConfigError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+
+    commits = get_filtered_commits(since=since_date, until=until_date)
+    if not observe_commits(commits, observers):
+        console.print("[yellow]No commits found in this date range.[/yellow]")
+        raise typer.Exit()
+
+    with phase("table rendering"):
+        for observer in observers:
+            for renderable in observer.render():
+                console.print(renderable)
+
+
+def _create_observers(
+    analyses: List[Analysis], since: datetime, until: datetime, rules: Optional[Path] = None
+) -> List[CommitObserver]:
+    """Create one observer per analysis, each analysis once, in the order they were asked for."""
+    observers: List[CommitObserver] = []
+
+    for analysis in dict.fromkeys(analyses):
+        if analysis is Analysis.ta:
+            observers.append(TeamActivityAggregator())
+        elif analysis is Analysis.sa:
+            observers.append(ActivityAggregator(since, until))
+        elif analysis is Analysis.hz:
+            observers.append(HotZoneAggregator(since, until))
+        elif analysis is Analysis.rc:
+            observers.append(RiskyCommitAggregator(load_rules(rules)))
+
+    return observers
@@ -1,12 +1,28 @@
-from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import List, Tuple
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import typer
-from git import Commit
+from rich.console import RenderableType
 from rich.table import Table
+from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 
+from gitwit.models.commit_record import CommitRecord
+from gitwit.models.secret_match import SecretMatch
 from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.fetch_git_log_entries import iter_git_log_entries
+from gitwit.utils.first_touch_index import FirstTouchIndex, FirstTouchIndexError, file_areas
 from gitwit.utils.git_helpers import get_filtered_commits
+from gitwit.utils.git_process import GitProcessError
+from gitwit.utils.keyword_matcher import KeywordMatcher
+from gitwit.utils.output import OutputFormat, format_option, write_records
+from gitwit.utils.profiler import phase, profiled
+from gitwit.utils.repo_singleton import RepoSingleton
+from gitwit.utils.secret_scanner import SECRET_RULES, scan_commits_for_secrets
+from gitwit.utils.storage import batched
 from gitwit.utils.typer_helpers import handle_since_until_arguments
 
 
@@ -18,7 +34,7 @@ class RiskFactor:
 
 @dataclass
 class RiskyCommit:
-    commit: Commit
+    commit: CommitRecord
     risk_score: int
     risk_factors: List[RiskFactor] = field(default_factory=list)
 
@@ -37,64 +53,239 @@ class RiskConfig:
     )
     LINES_CHANGED_THRESHOLD: int = 500
     FILES_CHANGED_THRESHOLD: int = 10
+    KEYWORD_SCORE: int = 3
+    # scored once per commit that is its author's first change to a directory (0 disables)
+    FIRST_TIME_AREA_SCORE: int = 2
+    # scored once per commit whose added lines look like they hold a secret (--scan-diffs)
+    SECRET_SCORE: int = 5
+    # only match keywords that aren't part of a longer word, e.g. "key" but not "keyboard"
+    WHOLE_WORDS: bool = False
+
+
+class RiskConfigError(Exception):
+    """Raised when a risk rules file can't be read or doesn't describe a RiskConfig."""
 
 
 RISK_CONFIG = RiskConfig()
-console = ConsoleSingleton.get_console()
+KEYWORD_MATCHER = KeywordMatcher(RISK_CONFIG.KEYWORDS)
+# looked up in the root of the repository being scanned when --rules isn't given
+DEFAULT_RULES_PATH = Path(".gitwit") / "risk_rules.json"
+# each worker is handed a few ranges, so one busy range doesn't leave the others idle
+RANGES_PER_JOB = 4
+# fewer commits than this have their diffs scanned on threads rather than processes
+PROCESS_POOL_MIN_COMMITS = 200
+# commits are assessed in batches of this many as they're streamed from git
+ASSESS_BATCH_SIZE = 1000
 
 
 def command(
     since: str = typer.Option(..., help="Start date in YYYY-MM-DD format"),
     until: str = typer.Option(None, help="End date in YYYY-MM-DD format"),
+    rules: Optional[Path] = typer.Option(
+        None,
+        "--rules",
+        help=f"JSON file of risk rules  [default: {DEFAULT_RULES_PATH} in the repository, if any]",
+    ),
+    scan_diffs: bool = typer.Option(
+        False,
+        "--scan-diffs",
+        help="Also scan the lines each commit added for secrets and credentials",
+    ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of workers scanning diffs in parallel  [default: number of CPUs]",
+    ),
+    output_format: OutputFormat = format_option(),
 ):
     """
     Identify risky commits in the repository in a given date range.
     """
 
+    console = ConsoleSingleton.get_console()
     since_date, until_date = handle_since_until_arguments(since, until)
-    risky_commits = _identify_risky_commits(since_date, until_date)
+
+    try:
+        config = load_rules(rules)
+    except RiskConfigError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+
+    # NDJSON is streamed as commits are assessed, so it isn't sorted by risk
+    risky_commits = _identify_risky_commits(
+        since_date,
+        until_date,
+        config,
+        scan_diffs=scan_diffs,
+        jobs=jobs or os.cpu_count() or 1,
+        by_risk=output_format is not OutputFormat.ndjson,
+    )
+
+    if output_format is not OutputFormat.table:
+        write_records(risky_commits, output_format)
+        return
 
     if not risky_commits:
         console.print("[green]No risky commits found for this period.[/green]")
         return
 
     table = _generate_risky_commits_table(risky_commits)
-    console.print(table)
+    with phase("table rendering"):
+        console.print(table)
+
+
+def load_rules(rules: Optional[Path]) -> RiskConfig:
+    """Load `rules`, or without it the repository's default rules file or built-in rules."""
+    if rules is None:
+        default = Path(RepoSingleton.get_repo().working_tree_dir) / DEFAULT_RULES_PATH
+        if not default.is_file():
+            return RISK_CONFIG
+        rules = default
 
+    return load_risk_config(rules)
 
-def _identify_risky_commits(since: datetime, until: datetime) -> List[RiskyCommit]:
-    all_commits = get_filtered_commits(
+
+def load_risk_config(path: Path) -> RiskConfig:
+    """
+    Read a RiskConfig from a JSON file of lowercased field names, e.g.
+
+        {"keywords": ["password", "api key"], "whole_words": true, "keyword_score": 5}
+
+    Fields left out keep their defaults, and `keywords` replaces the default keywords.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            rules = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RiskConfigError(f"failed to read risk rules from {path}: {e}") from e
+
+    if not isinstance(rules, dict):
+        raise RiskConfigError(f"risk rules in {path} must be a JSON object")
+
+    defaults = {f.name.lower(): f for f in fields(RiskConfig)}
+    values = {}
+    for key, value in rules.items():
+        if key not in defaults:
+            raise RiskConfigError(f"unknown risk rule '{key}' in {path}")
+
+        default = getattr(RISK_CONFIG, defaults[key].name)
+        if isinstance(default, tuple):
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                raise RiskConfigError(f"risk rule '{key}' in {path} must be a list of strings")
+            value = tuple(value)
+        elif type(value) is not type(default):
+            raise RiskConfigError(f"risk rule '{key}' in {path} must be a {type(default).__name__}")
+
+        values[defaults[key].name] = value
+
+    return RiskConfig(**values)
+
+
+def _identify_risky_commits(
+    since: datetime,
+    until: datetime,
+    config: RiskConfig = RISK_CONFIG,
+    scan_diffs: bool = False,
+    jobs: int = 1,
+    by_risk: bool = True,
+) -> Iterable[RiskyCommit]:
+    """
+    Return the risky commits riskiest first, or without `by_risk` yield them as they're
+    assessed, in history order (newest first), so the first is ready long before the last.
+    """
+    commits = get_filtered_commits(
         since=since,
         until=until,
     )
+    risky_commits = _assess_commits(commits, config, scan_diffs, jobs)
+    return _by_risk(risky_commits) if by_risk else risky_commits
 
-    risky_commits = []
 
-    for commit in all_commits:
-        risk_score = 0
-        risk_factors = []
+class RiskyCommitAggregator:
+    """
+    Collects commits fed to it one at a time, e.g. by `report`, and assesses them once
+    they're all in, so its table can list them riskiest first.
+    """
+
+    def __init__(self, config: RiskConfig = RISK_CONFIG, scan_diffs: bool = False, jobs: int = 1):
+        self.config = config
+        self.scan_diffs = scan_diffs
+        self.jobs = jobs
+        self.commits: List[CommitRecord] = []
+
+    def add(self, commit: CommitRecord) -> None:
+        self.commits.append(commit)
+
+    def risky_commits(self) -> List[RiskyCommit]:
+        return _by_risk(_assess_commits(self.commits, self.config, self.scan_diffs, self.jobs))
+
+    def render(self) -> List[RenderableType]:
+        risky_commits = self.risky_commits()
+        if not risky_commits:
+            return ["[green]No risky commits found for this period.[/green]"]
+        return [_generate_risky_commits_table(risky_commits)]
+
+
+def _assess_commits(
+    commits: Iterable[CommitRecord],
+    config: RiskConfig = RISK_CONFIG,
+    scan_diffs: bool = False,
+    jobs: int = 1,
+) -> Iterator[RiskyCommit]:
+    """
+    Score each of `commits` against every rule as they're streamed in, yielding the risky
+    ones in the order given. They're taken in batches of ASSESS_BATCH_SIZE, for the first
+    time and diff checks to each look a whole batch up at once.
+    """
+    return profiled("risk assessment", _assess_commit_batches(commits, config, scan_diffs, jobs))
+
+
+def _assess_commit_batches(
+    commits: Iterable[CommitRecord], config: RiskConfig, scan_diffs: bool, jobs: int
+) -> Iterator[RiskyCommit]:
+    find_first_areas = _first_areas_finder() if config.FIRST_TIME_AREA_SCORE else None
+
+    # compiled once, then each message is scanned for every keyword in a single pass
+    matcher = (
+        KEYWORD_MATCHER
+        if config is RISK_CONFIG
+        else KeywordMatcher(config.KEYWORDS, whole_words=config.WHOLE_WORDS)
+    )
 
-        stats = commit.stats
-        total_lines_changed = stats.total["insertions"] + stats.total["deletions"]
-        files_changed = len(stats.files)
+    for batch in batched(commits, ASSESS_BATCH_SIZE):
+        first_areas = find_first_areas([c.hexsha for c in batch]) if find_first_areas else {}
+        secrets = _scan_diffs_for_secrets(batch, jobs) if scan_diffs else {}
 
-        risk_score += _assess_lines_changed(total_lines_changed, risk_factors)
-        risk_score += _assess_files_changed(files_changed, risk_factors)
-        risk_score += _assess_keywords(str(commit.message), risk_factors)
+        for commit in batch:
+            risk_score = 0
+            risk_factors = []
 
-        # TODO: implement in the future
-        # risk_score += _assess_first_time_files()
+            total_lines_changed = commit.lines
+            files_changed = len(commit.files)
 
-        if risk_score > 0:
-            risky_commits.append(
-                RiskyCommit(commit=commit, risk_score=risk_score, risk_factors=risk_factors)
+            risk_score += _assess_lines_changed(total_lines_changed, risk_factors, config)
+            risk_score += _assess_files_changed(files_changed, risk_factors, config)
+            risk_score += _assess_keywords(commit.message, risk_factors, matcher, config)
+            risk_score += _assess_first_time_files(
+                first_areas.get(commit.hexsha, []), risk_factors, config
             )
+            risk_score += _assess_secrets(secrets.get(commit.hexsha, []), risk_factors, config)
 
+            if risk_score > 0:
+                yield RiskyCommit(commit=commit, risk_score=risk_score, risk_factors=risk_factors)
+
+
+def _by_risk(risky_commits: Iterable[RiskyCommit]) -> List[RiskyCommit]:
+    """Return `risky_commits` riskiest first, and otherwise in the order given."""
     return sorted(risky_commits, key=lambda c: c.risk_score, reverse=True)
 
 
-def _assess_lines_changed(total_lines_changed: int, risk_factors: List[RiskFactor]) -> int:
-    if total_lines_changed >= RISK_CONFIG.LINES_CHANGED_THRESHOLD:
+def _assess_lines_changed(
+    total_lines_changed: int, risk_factors: List[RiskFactor], config: RiskConfig = RISK_CONFIG
+) -> int:
+    if total_lines_changed >= config.LINES_CHANGED_THRESHOLD:
         risk_factors.append(
             RiskFactor(
                 description="Large number of lines changed",
@@ -105,8 +296,10 @@ def _assess_lines_changed(total_lines_changed: int, risk_factors: List[RiskFacto
     return 0
 
 
-def _assess_files_changed(files_changed: int, risk_factors: List[RiskFactor]) -> int:
-    if files_changed >= RISK_CONFIG.FILES_CHANGED_THRESHOLD:
+def _assess_files_changed(
+    files_changed: int, risk_factors: List[RiskFactor], config: RiskConfig = RISK_CONFIG
+) -> int:
+    if files_changed >= config.FILES_CHANGED_THRESHOLD:
         risk_factors.append(
             RiskFactor(
                 description="Many files modified",
@@ -117,21 +310,149 @@ def _assess_files_changed(files_changed: int, risk_factors: List[RiskFactor]) ->
     return 0
 
 
-def _assess_keywords(message: str, risk_factors: List[RiskFactor]) -> int:
-    lower_msg = message.lower()
+def _assess_keywords(
+    message: str,
+    risk_factors: List[RiskFactor],
+    matcher: KeywordMatcher = KEYWORD_MATCHER,
+    config: RiskConfig = RISK_CONFIG,
+) -> int:
     score = 0
-    for keyword in RISK_CONFIG.KEYWORDS:
-        if keyword in lower_msg:
-            risk_factors.append(
-                RiskFactor(
-                    description="Sensitive keyword in commit message",
-                    details=f"Keyword '{keyword}' found in commit message",
-                )
+    for keyword in matcher.find(message):
+        risk_factors.append(
+            RiskFactor(
+                description="Sensitive keyword in commit message",
+                details=f"Keyword '{keyword}' found in commit message",
             )
-            score += 3
+        )
+        score += config.KEYWORD_SCORE
     return score
 
 
+def _assess_first_time_files(
+    first_areas: List[str], risk_factors: List[RiskFactor], config: RiskConfig = RISK_CONFIG
+) -> int:
+    if not first_areas:
+        return 0
+
+    shown = ", ".join(area or "." for area in first_areas[:3])
+    if len(first_areas) > 3:
+        shown += f" and {len(first_areas) - 3} more"
+
+    risk_factors.append(
+        RiskFactor(
+            description="Author's first change in this area",
+            details=f"First change to {shown}",
+        )
+    )
+    return config.FIRST_TIME_AREA_SCORE
+
+
+def _assess_secrets(
+    secrets: List[SecretMatch], risk_factors: List[RiskFactor], config: RiskConfig = RISK_CONFIG
+) -> int:
+    if not secrets:
+        return 0
+
+    shown = ", ".join(f"{SECRET_RULES[s.rule]} in {s.path}" for s in secrets[:3])
+    if len(secrets) > 3:
+        shown += f" and {len(secrets) - 3} more"
+
+    risk_factors.append(
+        RiskFactor(
+            description="Possible secret in added lines",
+            details=shown,
+        )
+    )
+    return config.SECRET_SCORE
+
+
+def _scan_diffs_for_secrets(
+    commits: Sequence[CommitRecord], jobs: int
+) -> Dict[str, List[SecretMatch]]:
+    """
+    Scan the lines `commits` added for secrets, mapping each commit hash to its matches.
+
+    The commits are split into consecutive ranges, each streamed through its own
+    `git log --patch` in a worker, so parsing a month of diffs isn't bound to one core. The
+    workers are processes from PROCESS_POOL_MIN_COMMITS commits on, and threads below that,
+    where starting processes would cost more than the parsing they share out.
+    """
+    console = ConsoleSingleton.get_console()
+    shas = [c.hexsha for c in commits]
+    if not shas:
+        return {}
+
+    range_size = -(-len(shas) // (jobs * RANGES_PER_JOB))
+    ranges = list(batched(shas, range_size))
+    secrets: Dict[str, List[SecretMatch]] = {}
+
+    with Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}/{task.total} commits"),
+        TimeElapsedColumn(),
+        console=console,
+        disable=not console.is_terminal,
+    ) as progress:
+        task = progress.add_task("Scanning diffs", total=len(shas))
+
+        use_processes = jobs > 1 and len(shas) >= PROCESS_POOL_MIN_COMMITS
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor(max_workers=min(jobs, len(ranges))) as pool:
+            futures = {pool.submit(scan_commits_for_secrets, r): r for r in ranges}
+
+            for future in as_completed(futures):
+                commit_range = futures[future]
+
+                try:
+                    for match in future.result():
+                        secrets.setdefault(match.commit_hash, []).append(match)
+                except GitProcessError as e:
+                    console.log(
+                        f"Diff scan failed for {len(commit_range)} commits: {e}", style="yellow"
+                    )
+                finally:
+                    progress.advance(task, len(commit_range))
+
+    return secrets
+
+
+def _first_areas_finder() -> Callable[[Sequence[str]], Dict[str, List[str]]]:
+    """
+    Return a function mapping each of a batch of commit hashes that was its author's first
+    change to a directory to those directories.
+    """
+    try:
+        index = FirstTouchIndex.for_repo()
+        index.refresh()
+        return index.first_areas
+    except FirstTouchIndexError:
+        # e.g. a read-only repository: work them all out from one pass over history instead
+        areas = _scan_first_areas()
+        return lambda shas: {sha: areas[sha] for sha in shas if sha in areas}
+
+
+def _scan_first_areas() -> Dict[str, List[str]]:
+    console = ConsoleSingleton.get_console()
+    touched = set()
+    areas: Dict[str, List[str]] = {}
+
+    try:
+        # a rename changes both directories, as it does in the first touch index
+        for entry in iter_git_log_entries("--reverse", "--no-renames"):
+            for area in file_areas(entry.files):
+                if (entry.author, area) in touched:
+                    continue
+
+                touched.add((entry.author, area))
+                areas.setdefault(entry.commit_hash, []).append(area)
+    except GitProcessError as e:
+        console.log(f"Could not read history for first time changes: {e}", style="yellow")
+        return {}
+
+    return {sha: sorted(dirs) for sha, dirs in areas.items()}
+
+
 def _generate_risky_commits_table(commits: List[RiskyCommit]) -> Table:
     table = Table(title="High Risk Commits")
     table.add_column("Commit", style="magenta")
@@ -149,7 +470,7 @@ def _generate_risky_commits_table(commits: List[RiskyCommit]) -> Table:
 
         table.add_row(
             commit.hexsha[:7] + f" ({commit_summary})",
-            commit.author.name,
+            commit.author,
             datetime.fromtimestamp(commit.committed_date).strftime("%Y-%m-%d %H:%M"),
             str(risky_commit.risk_score),
             factors_desc,
@@ -0,0 +1,63 @@
+import signal
+import sys
+from pathlib import Path
+
+import typer
+from git import InvalidGitRepositoryError, NoSuchPathError
+
+from gitwit.cli.cli import app
+from gitwit.server.command_server import (
+    DEFAULT_REFRESH_INTERVAL,
+    CommandServer,
+    CommandServerError,
+)
+from gitwit.server.protocol import SERVED_COMMANDS, socket_path
+from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.repo_singleton import RepoSingleton
+
+
+def command(
+    refresh_interval: float = typer.Option(
+        DEFAULT_REFRESH_INTERVAL,
+        "--refresh-interval",
+        min=0.1,
+        help="Seconds between checks of whether HEAD moved",
+    ),
+):
+    """
+    Keep gitwit running for this worktree, answering other gitwit commands over a local socket.
+    """
+
+    console = ConsoleSingleton.get_console()
+    try:
+        git_dir = Path(RepoSingleton.get_repo().git_dir)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        console.print("[red]Error:[/red] not inside a git repository.")
+        raise typer.Exit(code=1)
+
+    path = socket_path(git_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        server = CommandServer(
+            path, lambda argv: app(argv, prog_name="gitwit"), refresh_interval=refresh_interval
+        )
+    except CommandServerError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+
+    # shut down through `with server`, so the socket is removed, when asked to stop
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    with server:
+        with console.status("Loading commands and indexes..."):
+            server.preload()
+
+        commands = ", ".join(sorted(SERVED_COMMANDS))
+        console.print(f"Serving [bold]{commands}[/bold] for {server.worktree} on {path}")
+        console.print("Press Ctrl+C to stop.")
+
+        try:
+            server.serve_forever(poll_interval=min(refresh_interval, 0.5))
+        except KeyboardInterrupt:
+            console.print("Stopped.")
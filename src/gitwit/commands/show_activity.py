@@ -1,26 +1,22 @@
 """Enhanced Git activity report between two dates."""
 
 from dataclasses import dataclass, field
-from typing import List, Sequence, Dict
-from git import Commit
+import heapq
+from typing import Dict, Iterable, List, Optional
+from rich.console import RenderableType
 from rich.table import Table
 from collections import Counter
 import typer
-from datetime import datetime, timedelta, timezone
-from rich.progress import (
-    Progress,
-    TextColumn,
-    BarColumn,
-    TimeElapsedColumn,
-    TimeRemainingColumn,
-)
+from datetime import datetime, timedelta
 
+from gitwit.models.commit_record import CommitRecord
+from gitwit.utils.commit_observer import observe_commits
 from gitwit.utils.console_singleton import ConsoleSingleton
 from gitwit.utils.git_helpers import get_filtered_commits
+from gitwit.utils.output import OutputFormat, format_option, write_records
+from gitwit.utils.profiler import phase
 from gitwit.utils.typer_helpers import handle_since_until_arguments
 
-console = ConsoleSingleton.get_console()
-
 
 @dataclass
 class FileStats:
@@ -49,38 +45,44 @@ def command(
         datetime.now().strftime("%Y-%m-%d"),  # Default to today
         help="End date in YYYY-MM-DD",
     ),
+    directories: Optional[List[str]] = typer.Option(
+        None, "--dir", "-d", help="Filter commits to these directory paths"
+    ),
+    output_format: OutputFormat = format_option(),
 ):
     """
     Show commit activity statistics between two dates.
+
+    With --format json|ndjson|csv, only the file statistics are written, without the
+    activity summary.
     """
 
+    console = ConsoleSingleton.get_console()
     since_date, until_date = handle_since_until_arguments(since, until)
 
-    commits = list(
-        get_filtered_commits(
-            since=since_date,
-            until=until_date,
-        )
+    commits = get_filtered_commits(
+        since=since_date,
+        until=until_date,
+        directories=directories,
     )
+    activity = _aggregate_activity(commits, since_date, until_date)
 
-    if not commits:
+    if output_format is not OutputFormat.table:
+        # only the file statistics: the activity summary is a row of another shape, so it is
+        # left to the table (as the README's Output Formats section says)
+        write_records(activity.file_statistics(), output_format)
+        return
+
+    if not activity.total_commits:
         console.print("[yellow]No commits found in this date range.[/yellow]")
         raise typer.Exit()
 
-    commits_in_time_range = [
-        commit
-        for commit in commits
-        if since_date <= commit.committed_datetime.astimezone(timezone.utc) <= until_date
-    ]
-
-    file_stats = _compute_file_statistics(commits_in_time_range)
-    activity_stats = _compute_author_activity_statistics(commits_in_time_range)
+    file_stats_table = _generate_file_statistics_table(activity.file_statistics())
+    activity_summary_table = _generate_activity_summary_table(activity.author_activity_statistics())
 
-    file_stats_table = _generate_file_statistics_table(file_stats)
-    activity_summary_table = _generate_activity_summary_table(activity_stats)
-
-    console.print(file_stats_table)
-    console.print(activity_summary_table)
+    with phase("table rendering"):
+        console.print(file_stats_table)
+        console.print(activity_summary_table)
 
 
 # ================================================================================
@@ -88,74 +90,102 @@ def command(
 # ================================================================================
 
 
-def _compute_file_statistics(commits: Sequence[Commit], result_limit: int = 10) -> List[FileStats]:
+class ActivityAggregator:
     """
-    Compute statistics about file activity considering date range,
-    returning a sorted list of FileStats.
+    Folds commits into everything `sa` reports, file statistics and author activity alike,
+    one commit at a time. Commits can be streamed through it, so memory grows with the
+    number of files and authors seen rather than with the number of commits. With a
+    since/until window, commits committed outside it are ignored.
     """
-    stats_map: Dict[str, FileStats] = {}
 
-    with Progress(
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TimeElapsedColumn(),
-        TimeRemainingColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Processing commits...", total=len(commits))
-        for commit in commits:
-            for fname, details in commit.stats.files.items():
-                fname = str(fname)
-                fs = stats_map.get(fname)
+    def __init__(self, since: Optional[datetime] = None, until: Optional[datetime] = None):
+        self.since = since
+        self.until = until
+        self.file_stats: Dict[str, FileStats] = {}
+        self.author_commit_count: Counter = Counter()
+        self.total_commits = 0
+        self.total_lines = 0
+        self.last_commit_date: Optional[datetime] = None
 
-                if fs is None:
-                    fs = FileStats(file=fname)
-                    stats_map[fname] = fs
+    def add(self, commit: CommitRecord) -> None:
+        committed = commit.committed_datetime
+        if (self.since and committed < self.since) or (self.until and committed > self.until):
+            return
 
-                fs.commits += 1
-                fs.lines += details.get("lines", 0)
-                fs.authors[commit.author.name] += 1
-            progress.update(task, advance=1)
+        for change in commit.files:
+            fs = self.file_stats.get(change.path)
 
-    # sort by total lines changed, descending, and trim to limit
-    sorted_list = sorted(stats_map.values(), key=lambda fs: fs.lines, reverse=True)[:result_limit]
+            if fs is None:
+                fs = FileStats(file=change.path)
+                self.file_stats[change.path] = fs
 
-    return sorted_list
+            fs.commits += 1
+            fs.lines += change.lines
+            fs.authors[commit.author] += 1
+            self.total_lines += change.lines
 
+        self.author_commit_count[commit.author] += 1
+        self.total_commits += 1
 
-def _compute_author_activity_statistics(
-    commits: Sequence[Commit],
-) -> AuthorActivityStats:
-    """Filter commits and count author activity considering date range."""
-    author_commit_count = Counter(c.author.name for c in commits)
+        if self.last_commit_date is None or committed > self.last_commit_date:
+            self.last_commit_date = committed
 
-    total_commits = len(commits)
-    num_authors = len(author_commit_count)
-    top_contributor, top_contributor_commits = ("", 0)
+    def file_statistics(self, result_limit: int = 10) -> List[FileStats]:
+        """Return the `result_limit` files with the most lines changed, descending."""
+        return heapq.nlargest(result_limit, self.file_stats.values(), key=lambda fs: fs.lines)
 
-    if author_commit_count:
-        top_contributor, top_contributor_commits = author_commit_count.most_common(1)[0]
+    def author_activity_statistics(self) -> AuthorActivityStats:
+        top_contributor, top_contributor_commits = ("", 0)
 
-    total_lines = sum(
-        details.get("lines", 0) for commit in commits for details in commit.stats.files.values()
-    )
+        if self.author_commit_count:
+            top_contributor, top_contributor_commits = self.author_commit_count.most_common(1)[0]
 
-    last_commit_date = max(
-        (commit.committed_datetime.astimezone(timezone.utc) for commit in commits),
-        default="N/A",
-    )
-    last_commit_date_str = (
-        last_commit_date.strftime("%Y-%m-%d") if last_commit_date != "N/A" else "N/A"
-    )
+        last_commit_date_str = (
+            self.last_commit_date.strftime("%Y-%m-%d") if self.last_commit_date else "N/A"
+        )
 
-    return AuthorActivityStats(
-        total_commits=total_commits,
-        num_authors=num_authors,
-        top_contributor=top_contributor or "",
-        top_contributor_commits=top_contributor_commits,
-        total_lines=total_lines,
-        last_commit_date=last_commit_date_str,
-    )
+        return AuthorActivityStats(
+            total_commits=self.total_commits,
+            num_authors=len(self.author_commit_count),
+            top_contributor=top_contributor or "",
+            top_contributor_commits=top_contributor_commits,
+            total_lines=self.total_lines,
+            last_commit_date=last_commit_date_str,
+        )
+
+    def render(self) -> List[RenderableType]:
+        return [
+            _generate_file_statistics_table(self.file_statistics()),
+            _generate_activity_summary_table(self.author_activity_statistics()),
+        ]
+
+
+def _aggregate_activity(
+    commits: Iterable[CommitRecord],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> ActivityAggregator:
+    """Fold `commits` into an ActivityAggregator in a single pass, with a progress bar."""
+    activity = ActivityAggregator(since, until)
+    observe_commits(commits, [activity], "Processing commits...")
+    return activity
+
+
+def _compute_file_statistics(
+    commits: Iterable[CommitRecord], result_limit: int = 10
+) -> List[FileStats]:
+    """
+    Compute statistics about file activity considering date range,
+    returning a sorted list of FileStats.
+    """
+    return _aggregate_activity(commits).file_statistics(result_limit)
+
+
+def _compute_author_activity_statistics(
+    commits: Iterable[CommitRecord],
+) -> AuthorActivityStats:
+    """Filter commits and count author activity considering date range."""
+    return _aggregate_activity(commits).author_activity_statistics()
 
 
 # ================================================================================
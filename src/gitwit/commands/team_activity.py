@@ -1,18 +1,16 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List, Set
 import typer
-from git import Repo
+from rich.console import RenderableType
 from rich.table import Table
-from rich.progress import (
-    Progress,
-    TextColumn,
-    BarColumn,
-    TimeElapsedColumn,
-    TimeRemainingColumn,
-)
 
+from gitwit.models.commit_record import CommitRecord
+from gitwit.utils.commit_observer import observe_commits
 from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.git_helpers import get_filtered_commits
+from gitwit.utils.output import OutputFormat, format_option, write_records
+from gitwit.utils.profiler import phase
 from gitwit.utils.typer_helpers import handle_since_until_arguments
 
 
@@ -27,72 +25,75 @@ class DeveloperActivity:
     files_touched: int
 
 
-console = ConsoleSingleton.get_console()
-
-
 def command(
     since: str = typer.Option(..., help="Start date in YYYY-MM-DD format"),
     until: str = typer.Option(..., help="End date in YYYY-MM-DD format"),
+    output_format: OutputFormat = format_option(),
 ):
     """
     Show developer activity summary between two dates.
     """
 
+    console = ConsoleSingleton.get_console()
     since_datetime, until_datetime = handle_since_until_arguments(since, until)
     developer_activities = _fetch_developer_activities(since_datetime, until_datetime)
+
+    if output_format is not OutputFormat.table:
+        write_records(developer_activities, output_format)
+        return
+
     table = _generate_activity_table(developer_activities)
 
-    console.print(table)
+    with phase("table rendering"):
+        console.print(table)
 
 
 def _fetch_developer_activities(since_datetime: datetime, until_datetime: datetime):
-    repo = Repo(".", search_parent_directories=True)
-    commits = list(
-        repo.iter_commits(since=since_datetime.isoformat(), until=until_datetime.isoformat())
-    )
-    total = len(commits)
-
-    activities = {}
-    files_seen = {}
-
-    with Progress(
-        TextColumn("[bold blue]{task.description}"),
-        BarColumn(),
-        TextColumn("{task.completed}/{task.total}"),
-        TimeElapsedColumn(),
-        TimeRemainingColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Scanning commits", total=total)
-
-        for commit in commits:
-            author = commit.author.name
-            stats = commit.stats
-
-            if author not in activities:
-                activities[author] = DeveloperActivity(
-                    developer=author,
-                    prs_merged=0,
-                    lines_added=0,
-                    lines_deleted=0,
-                    reviews_done=0,
-                    review_time_avg=timedelta(),
-                    files_touched=0,
-                )
-                files_seen[author] = set()
-
-            dev = activities[author]
-            dev.lines_added += stats.total["insertions"]
-            dev.lines_deleted += stats.total["deletions"]
-
-            for fn in stats.files:
-                if fn not in files_seen[author]:
-                    files_seen[author].add(fn)
-                    dev.files_touched += 1
-
-            progress.advance(task)
-
-    return list(activities.values())
+    commits = get_filtered_commits(since=since_datetime, until=until_datetime)
+
+    team_activity = TeamActivityAggregator()
+    observe_commits(commits, [team_activity])
+
+    return team_activity.developer_activities()
+
+
+class TeamActivityAggregator:
+    """Folds commits into one DeveloperActivity per author, a commit at a time."""
+
+    def __init__(self):
+        self.activities: Dict[str, DeveloperActivity] = {}
+        self.files_seen: Dict[str, Set[str]] = {}
+
+    def add(self, commit: CommitRecord) -> None:
+        author = commit.author
+
+        if author not in self.activities:
+            self.activities[author] = DeveloperActivity(
+                developer=author,
+                prs_merged=0,
+                lines_added=0,
+                lines_deleted=0,
+                reviews_done=0,
+                review_time_avg=timedelta(),
+                files_touched=0,
+            )
+            self.files_seen[author] = set()
+
+        dev = self.activities[author]
+        dev.lines_added += commit.insertions
+        dev.lines_deleted += commit.deletions
+
+        files_seen = self.files_seen[author]
+        for change in commit.files:
+            if change.path not in files_seen:
+                files_seen.add(change.path)
+                dev.files_touched += 1
+
+    def developer_activities(self) -> List[DeveloperActivity]:
+        return list(self.activities.values())
+
+    def render(self) -> List[RenderableType]:
+        return [_generate_activity_table(self.developer_activities())]
 
 
 def _generate_activity_table(developers: List[DeveloperActivity]) -> Table:
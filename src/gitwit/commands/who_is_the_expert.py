@@ -1,15 +1,28 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
+import os
 from pathlib import Path
+from typing import Dict, Optional
 import typer
-from git import Repo
+from git import GitCommandError, Repo
 from rich.table import Table
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 
-from gitwit.models.blame_line import BlameLine
+from gitwit.models.author_blame import AuthorBlame
+from gitwit.utils.blame_cache import DEFAULT_MAX_SIZE_MB, BlameCache, BlameCacheError, BlameKey
 from gitwit.utils.console_singleton import ConsoleSingleton
-from gitwit.utils.git_helpers import fetch_file_gitblame
+from gitwit.utils.git_helpers import (
+    fetch_blob_sizes,
+    fetch_committed_blob_shas,
+    fetch_file_blame_authors,
+    fetch_paths_excluded_by_attributes,
+)
+from gitwit.utils.git_process import GitProcessError
+from gitwit.utils.object_reader import ObjectReaderError
+from gitwit.utils.output import OutputFormat, format_option, write_records
+from gitwit.utils.profiler import phase
+from gitwit.utils.repo_singleton import RepoSingleton
 
 
 @dataclass
@@ -20,53 +33,145 @@ class AuthorActivityData:
     last_commit_message: str
 
 
-console = ConsoleSingleton.get_console()
+DEFAULT_MAX_FILE_SIZE_KB = 1024
+
 app = typer.Typer(name="blame_expert", help="Determine file or directory experts via git blame.")
 
 
 def command(
     path: str = typer.Option(..., help="Path to file or directory to analyze"),
     num_results: int = typer.Option(5, help="Number of top authors to display"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Blame every file, ignoring the cache"),
+    cache_size: int = typer.Option(
+        DEFAULT_MAX_SIZE_MB, help="Maximum size of the on-disk blame cache, in MB"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of files to blame in parallel  [default: number of CPUs]",
+    ),
+    processes: bool = typer.Option(
+        False,
+        "--processes",
+        help="Blame in worker processes instead of threads, so parsing isn't bound by the GIL",
+    ),
+    max_file_size: int = typer.Option(
+        DEFAULT_MAX_FILE_SIZE_KB,
+        min=0,
+        help="Skip files larger than this many KB when scanning a directory (0 for no limit)",
+    ),
+    include_all: bool = typer.Option(
+        False,
+        "--include-all",
+        help="Also blame files .gitattributes mark as generated, vendored or binary",
+    ),
+    output_format: OutputFormat = format_option(),
 ):
     """
     Determine who the expert is for a given file or directory based on blame ownership and recency.
     """
+    console = ConsoleSingleton.get_console()
     target = Path(path)
-    repo = Repo(".", search_parent_directories=True)
+    repo = RepoSingleton.get_repo()
 
     if not target.exists():
         console.print(f"[red]Error:[/red] Path '{target}' does not exist.")
         raise typer.Exit(code=1)
 
+    cache = None if no_cache else _open_blame_cache(cache_size)
     try:
-        blame_entries = _gather_blame_entries(repo, target)
+        author_blame = _gather_author_blame(
+            repo,
+            target,
+            cache,
+            jobs=jobs or os.cpu_count() or 1,
+            use_processes=processes,
+            max_file_size=max_file_size * 1024,
+            exclude_by_attributes=not include_all,
+        )
     except Exception as e:
         console.print(f"[red]Error running git blame:[/red] {e}")
         raise typer.Exit(code=1)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    authors_activity_list = _compute_author_activity(author_blame)
 
-    if not blame_entries:
+    if output_format is not OutputFormat.table:
+        write_records(_top_authors(authors_activity_list, num_results), output_format)
+        return
+
+    if not author_blame:
         console.print("[yellow]No blame data found for path.[/yellow]")
         raise typer.Exit()
 
-    authors_activity_list = _compute_author_activity(blame_entries)
     table = _generate_table(target, authors_activity_list, num_results)
 
-    console.print(table)
+    with phase("table rendering"):
+        console.print(table)
+
+
+def _open_blame_cache(cache_size: int) -> Optional[BlameCache]:
+    console = ConsoleSingleton.get_console()
+    try:
+        return BlameCache.for_repo(cache_size)
+    except BlameCacheError as e:
+        console.log(f"Blame cache unavailable, blaming every file: {e}", style="yellow")
+        return None
 
 
 # TODO: this need to be improved to ignore untracked directories
-def _gather_blame_entries(repo: Repo, target: Path) -> list[BlameLine]:
+@phase("blame fetch")
+def _gather_author_blame(
+    repo: Repo,
+    target: Path,
+    cache: Optional[BlameCache] = None,
+    jobs: int = 8,
+    use_processes: bool = False,
+    max_file_size: int = 0,
+    exclude_by_attributes: bool = False,
+) -> list[AuthorBlame]:
     """
-    Return a combined list of BlameLine entries for a file or all files under a directory,
-    fetching each in parallel with a progress bar.
+    Return one AuthorBlame per author, combined across a file or all files under a directory,
+    blaming each in parallel with a progress bar. Workers fold their file into per-author
+    counts, so memory grows with the number of authors rather than lines of code.
+
+    With a cache, files whose blob at HEAD was blamed before are served from it and only the
+    remaining files are blamed. Files are blamed largest first, so a huge file doesn't start
+    last and hold up the whole run.
+
+    Directory scans skip files over `max_file_size` bytes (0 for no limit) and, with
+    `exclude_by_attributes`, generated, vendored and binary files, deciding from git's
+    metadata before any blame starts. An explicitly targeted file is always blamed.
     """
 
+    console = ConsoleSingleton.get_console()
     if target.is_dir():
         files_to_process = repo.git.ls_files(str(target)).splitlines()
+        sizes = _blob_sizes(files_to_process)
+        files_to_process = _exclude_files(
+            files_to_process, sizes, max_file_size, exclude_by_attributes
+        )
     else:
         files_to_process = [str(target)]
+        sizes = {}
 
-    entries: list[BlameLine] = []
+    totals: Dict[str, AuthorBlame] = {}
+
+    cache_keys = _blame_cache_keys(target, files_to_process) if cache is not None else {}
+    cached = cache.get_many(cache_keys.values()) if cache_keys else {}
+    files_to_blame = []
+    for path in files_to_process:
+        key = cache_keys.get(path)
+        if key in cached:
+            _merge_author_blame(totals, cached[key])
+        else:
+            files_to_blame.append(path)
+
+    files_to_blame.sort(key=lambda p: sizes.get(p, 0), reverse=True)
 
     # 2) Kick off parallel fetches and track progress
     with Progress(
@@ -74,33 +179,101 @@ def _gather_blame_entries(repo: Repo, target: Path) -> list[BlameLine]:
         BarColumn(),
         TimeElapsedColumn(),
         console=console,
+        disable=not console.is_terminal,
     ) as progress:
         task = progress.add_task("Fetching blame entries", total=len(files_to_process))
+        progress.advance(task, len(files_to_process) - len(files_to_blame))
 
         # cap workers to number of files
-        max_workers = min(8, len(files_to_process))
-        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        max_workers = max(1, min(jobs, len(files_to_blame)))
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor(max_workers=max_workers) as pool:
             futures = {
-                pool.submit(fetch_file_gitblame, repo, path): path for path in files_to_process
+                pool.submit(fetch_file_blame_authors, repo, path): path for path in files_to_blame
             }
 
             for future in as_completed(futures):
                 path = futures[future]
 
                 try:
-                    result = future.result()  # List[BlameLine]
-                    entries.extend(result)
+                    result = future.result()  # List[AuthorBlame]
+                    _merge_author_blame(totals, result)
+                    if path in cache_keys:
+                        cache.put(cache_keys[path], result)
                 except Exception as e:
                     console.log(f"Blame failed for {path}: {e}", style="yellow")
                 finally:
                     progress.advance(task)
 
-    return entries
+    return list(totals.values())
+
+
+def _merge_author_blame(totals: Dict[str, AuthorBlame], blame: list[AuthorBlame]) -> None:
+    for b in blame:
+        if b.author in totals:
+            totals[b.author].merge(b)
+        else:
+            # copied, so merging never mutates a result that was also put in the cache
+            totals[b.author] = AuthorBlame(b.author, b.num_lines, b.author_time, b.summary)
+
+
+def _blob_sizes(files: list[str]) -> Dict[str, int]:
+    console = ConsoleSingleton.get_console()
+    try:
+        return fetch_blob_sizes(files)
+    except ObjectReaderError as e:
+        # only affects scheduling and the size limit, so carry on without them
+        console.log(f"Could not read file sizes: {e}", style="yellow")
+        return {}
+
+
+def _exclude_files(
+    files: list[str], sizes: Dict[str, int], max_file_size: int, exclude_by_attributes: bool
+) -> list[str]:
+    """Drop files too large, generated, vendored or binary to be worth blaming."""
+    console = ConsoleSingleton.get_console()
+    excluded = set()
+
+    if max_file_size:
+        excluded.update(f for f in files if sizes.get(f, 0) > max_file_size)
+
+    if exclude_by_attributes:
+        try:
+            excluded.update(fetch_paths_excluded_by_attributes(files))
+        except GitProcessError as e:
+            console.log(f"Could not read .gitattributes: {e}", style="yellow")
+
+    if excluded:
+        console.print(
+            f"[dim]Skipping {len(excluded)} generated, vendored, binary or oversized files[/dim]"
+        )
+
+    return [f for f in files if f not in excluded]
+
+
+def _blame_cache_keys(target: Path, files: list[str]) -> Dict[str, BlameKey]:
+    """
+    Map each file that can be served from the blame cache to its (path, blob SHA) key.
+    Files with uncommitted changes get no key and are always blamed.
+    """
+    try:
+        blobs = fetch_committed_blob_shas(target)
+    except GitCommandError:
+        # e.g. no commits yet
+        return {}
+
+    keys = {}
+    for path in files:
+        normalized = Path(os.path.normpath(path)).as_posix()
+        if normalized in blobs:
+            keys[path] = (normalized, blobs[normalized])
+
+    return keys
 
 
 def _compute_author_activity(blame_list) -> list[AuthorActivityData]:
     """
-    Aggregate blame entries into per-author activity data.
+    Aggregate per-author blame into activity data for the table.
     """
     data = {}
     for blame in blame_list:
@@ -124,6 +297,11 @@ def _compute_author_activity(blame_list) -> list[AuthorActivityData]:
     return list(data.values())
 
 
+def _top_authors(authors: list[AuthorActivityData], num_results: int) -> list[AuthorActivityData]:
+    """The `num_results` authors owning the most lines, most first."""
+    return sorted(authors, key=lambda a: a.line_count, reverse=True)[:num_results]
+
+
 def _generate_table(target: Path, authors: list[AuthorActivityData], num_results: int) -> Table:
     """
     Generate a Rich Table summarizing author activity.
@@ -137,9 +315,7 @@ def _generate_table(target: Path, authors: list[AuthorActivityData], num_results
     table.add_column("Last Touched", justify="right", style="cyan")
     table.add_column("Last Commit Message", style="yellow")
 
-    top = sorted(authors, key=lambda a: a.line_count, reverse=True)[:num_results]
-
-    for a in top:
+    for a in _top_authors(authors, num_results):
         pct = f"{(a.line_count / total_lines * 100):.1f}%" if total_lines else "0.0%"
         last = a.last_commit_date.isoformat(sep=" ")
         table.add_row(a.author, str(a.line_count), pct, last, a.last_commit_message)
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class AuthorBlame:
+    """An author's share of a blame: the lines they own and their latest commit among them."""
+
+    author: str
+    num_lines: int
+    author_time: int
+    summary: str
+
+    def merge(self, other: "AuthorBlame") -> None:
+        """Fold another share of the same author's blame into this one."""
+        self.num_lines += other.num_lines
+        if other.author_time > self.author_time:
+            self.author_time = other.author_time
+            self.summary = other.summary
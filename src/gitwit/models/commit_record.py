@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List
+
+
+@dataclass(slots=True)
+class FileChange:
+    path: str
+    insertions: int
+    deletions: int
+
+    @property
+    def lines(self) -> int:
+        return self.insertions + self.deletions
+
+
+@dataclass(slots=True)
+class CommitRecord:
+    hexsha: str
+    author: str
+    author_email: str
+    authored_date: int
+    committed_date: int
+    message: str
+    files: List[FileChange] = field(default_factory=list)
+
+    @property
+    def committed_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.committed_date, tz=timezone.utc)
+
+    @property
+    def insertions(self) -> int:
+        return sum(f.insertions for f in self.files)
+
+    @property
+    def deletions(self) -> int:
+        return sum(f.deletions for f in self.files)
+
+    @property
+    def lines(self) -> int:
+        return self.insertions + self.deletions
@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+
+@dataclass(slots=True)
+class FileCreation:
+    path: str
+    commit_hash: str
+    author: str
+    authored_date: int
+
+    @property
+    def created_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.authored_date, tz=timezone.utc)
@@ -1,10 +1,15 @@
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import List
 
 
 @dataclass
 class GitLogEntry:
     commit_hash: str
-    created_at_iso: str
+    authored_date: int
     author: str
     files: List[str]
+
+    @property
+    def authored_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.authored_date, tz=timezone.utc)
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ObjectInfo:
+    oid: str
+    type: str
+    size: int
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class SecretMatch:
+    commit_hash: str
+    path: str
+    rule: str
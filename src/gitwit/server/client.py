@@ -0,0 +1,100 @@
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from gitwit.server.protocol import (
+    EXIT,
+    FORWARDED_ENV,
+    SERVED_COMMANDS,
+    STDERR,
+    STDOUT,
+    find_git_dir,
+    read_frames,
+    socket_path,
+)
+
+# Set to run every command in the calling process, even if a server is running.
+NO_SERVER_ENV = "GITWIT_NO_SERVER"
+# gitwit.utils.profiler.PROFILE_ENV, not imported so asking a server stays cheap
+PROFILE_ENV = "GITWIT_PROFILE"
+# the values typer (click) reads as False for a boolean option like --profile
+FALSE_VALUES = ("", "0", "false", "f", "no", "n", "off")
+
+
+def forward_to_server(argv: List[str]) -> Optional[int]:
+    """
+    Run `gitwit <argv>` on the `gitwit serve` process for this worktree, copying its output
+    to ours, and return its exit code. Returns None without running anything when there is
+    no server to ask, so the caller runs the command itself.
+
+    This runs before typer or any command module is imported, so asking a server costs
+    little more than starting the interpreter.
+    """
+    if not argv or argv[0] not in SERVED_COMMANDS or os.environ.get(NO_SERVER_ENV):
+        return None
+    # a profile has to be taken of the command running here, not of the server; a value
+    # typer can't read is left for it to report, too
+    if os.environ.get(PROFILE_ENV, "").strip().lower() not in FALSE_VALUES:
+        return None
+
+    cwd = Path.cwd()
+    git_dir = find_git_dir(cwd)
+    if git_dir is None:
+        return None
+
+    path = socket_path(git_dir)
+    if not path.exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        # left behind by a server that didn't shut down cleanly
+        sock.close()
+        return None
+
+    streams = {STDOUT: sys.stdout.buffer, STDERR: sys.stderr.buffer}
+    with sock, sock.makefile("rb") as responses:
+        sock.sendall(json.dumps(_build_request(argv, cwd)).encode("utf-8") + b"\n")
+        return _copy_output(responses, streams)
+
+
+def _build_request(argv: List[str], cwd: Path) -> dict:
+    terminal = sys.stdout.isatty()
+    try:
+        width: Optional[int] = os.get_terminal_size(sys.stdout.fileno()).columns
+    except (OSError, ValueError):
+        width = None
+
+    return {
+        "argv": argv,
+        "cwd": str(cwd),
+        "terminal": terminal,
+        "width": width,
+        "env": {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ},
+    }
+
+
+def _copy_output(responses, streams: Dict[bytes, BinaryIO]) -> int:
+    for kind, payload in read_frames(responses):
+        if kind == EXIT:
+            return int(payload)
+
+        stream = streams.get(kind)
+        if stream is None:
+            continue
+
+        try:
+            stream.write(payload)
+            stream.flush()
+        except BrokenPipeError:
+            # whatever read our output stopped, e.g. `head`: stop too, and keep the exit
+            # flush of the unwritten output from complaining about it
+            os.dup2(os.open(os.devnull, os.O_WRONLY), stream.fileno())
+            return 1
+
+    raise ConnectionError("gitwit server closed the connection without an exit code")
@@ -0,0 +1,235 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+import traceback
+from datetime import date
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Set
+
+from rich.console import Console
+
+from gitwit.cli.cli import GitwitGroup
+from gitwit.server.protocol import EXIT, SERVED_COMMANDS, STDERR, STDOUT, write_frame
+from gitwit.utils.commit_index import CommitIndex, CommitIndexError
+from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.file_creation_index import FileCreationIndex, FileCreationIndexError
+from gitwit.utils.first_touch_index import FirstTouchIndex, FirstTouchIndexError
+from gitwit.utils.repo_singleton import RepoSingleton
+
+DEFAULT_REFRESH_INTERVAL = 2.0
+
+# The indexes commands read, refreshed in the background so a query never waits on them
+WARM_INDEXES = (
+    (CommitIndex, CommitIndexError),
+    (FileCreationIndex, FileCreationIndexError),
+    (FirstTouchIndex, FirstTouchIndexError),
+)
+
+
+class CommandServerError(Exception):
+    """Raised when a server can't start listening."""
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """
+    Runs gitwit commands for clients of one worktree inside a single long-lived process.
+
+    Every run then finds the command modules imported, the repository open and the on-disk
+    indexes open and up to date, where a fresh `gitwit` process would pay for all of them
+    first. Between requests the server checks whether HEAD moved, and brings the indexes up
+    to date straight away rather than when the next query needs them.
+
+    Commands share the process's working directory and `sys.stdout`, so requests are
+    handled one at a time.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        run: Callable[[List[str]], None],
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        self.socket_path = socket_path
+        self.run = run
+        self.refresh_interval = refresh_interval
+        self.worktree = Path(RepoSingleton.get_repo().working_tree_dir).resolve()
+        self._last_refresh = 0.0
+        self._loaded_on = date.today()
+        self._reported_errors: Set[str] = set()
+
+        _remove_stale_socket(socket_path)
+        try:
+            super().__init__(str(socket_path), _CommandHandler)
+        except OSError as e:
+            raise CommandServerError(f"failed to listen on {socket_path}: {e}") from e
+        # the socket runs commands as us, so only we may connect to it
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def service_actions(self) -> None:
+        # called by serve_forever between requests and at least every poll interval
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh_indexes()
+
+        if date.today() != self._loaded_on:
+            self._reload_commands()
+
+    # ================================================================================
+    # Public API
+    # ================================================================================
+
+    def preload(self) -> None:
+        """Import the served command modules and bring every index up to date."""
+        for name in sorted(SERVED_COMMANDS):
+            importlib.import_module(GitwitGroup.lazy_commands[name].module)
+
+        self.refresh_indexes()
+
+    def refresh_indexes(self) -> None:
+        console = ConsoleSingleton.get_console()
+        for index_class, error_class in WARM_INDEXES:
+            try:
+                index_class.for_repo().refresh()
+            except error_class as e:
+                # commands fall back to reading history themselves; report it once, not
+                # on every refresh
+                message = f"{index_class.__name__} unavailable: {e}"
+                if message not in self._reported_errors:
+                    self._reported_errors.add(message)
+                    console.log(message, style="yellow")
+
+        self._last_refresh = time.monotonic()
+
+    def run_request(self, request: dict, responses: BinaryIO) -> int:
+        """Run the command `request` asks for, streaming its output, and return its exit code."""
+        stdout = _FrameWriter(responses, STDOUT, request.get("terminal", False))
+        stderr = _FrameWriter(responses, STDERR, request.get("terminal", False))
+
+        argv = request.get("argv") or []
+        cwd = Path(request.get("cwd", "")).resolve()
+        if not argv or argv[0] not in SERVED_COMMANDS:
+            stderr.write(f"gitwit serve does not run {argv[:1]}\n")
+            return 2
+        if cwd != self.worktree and self.worktree not in cwd.parents:
+            stderr.write(f"gitwit serve only runs commands inside {self.worktree}\n")
+            return 2
+
+        output = Console(
+            file=stdout,
+            force_terminal=request.get("terminal", False),
+            width=request.get("width"),
+            _environ=request.get("env", {}),
+        )
+
+        previous_cwd = os.getcwd()
+        try:
+            os.chdir(cwd)
+        except OSError as e:
+            stderr.write(f"gitwit serve can't run commands in {cwd}: {e}\n")
+            return 2
+
+        try:
+            with ConsoleSingleton.redirected(output):
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    return self._run(argv)
+        finally:
+            os.chdir(previous_cwd)
+
+    # ================================================================================
+    # Helpers
+    # ================================================================================
+
+    def _run(self, argv: List[str]) -> int:
+        try:
+            self.run(argv)
+        except SystemExit as e:
+            return _exit_code(e)
+        except Exception:
+            sys.stderr.write(traceback.format_exc())
+            return 1
+
+        return 0
+
+    def _reload_commands(self) -> None:
+        # option defaults such as "10 days ago" are computed when a command is imported
+        for name in [m for m in sys.modules if m.startswith("gitwit.commands.")]:
+            importlib.reload(sys.modules[name])
+
+        self._loaded_on = date.today()
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            # a connection only checking the server is alive, see _remove_stale_socket
+            return
+
+        try:
+            try:
+                exit_code = self.server.run_request(json.loads(line), self.wfile)
+            except ValueError:
+                write_frame(self.wfile, STDERR, b"gitwit serve received a malformed request\n")
+                exit_code = 2
+            write_frame(self.wfile, EXIT, str(exit_code).encode("ascii"))
+        except OSError:
+            # the client went away, e.g. it was interrupted; nothing left to tell it
+            pass
+
+
+class _FrameWriter(io.TextIOBase):
+    """Text stream sending everything written to it to the client as `kind` frames."""
+
+    def __init__(self, responses: BinaryIO, kind: bytes, terminal: bool):
+        self._responses = responses
+        self._kind = kind
+        self._terminal = terminal
+
+    def isatty(self) -> bool:
+        return self._terminal
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            # like any text stream; click writes b"" to tell text streams from binary ones
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            write_frame(self._responses, self._kind, text.encode("utf-8"))
+        return len(text)
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Delete a socket left behind by a server that didn't shut down, or fail if one is live."""
+    if not path.exists():
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink(missing_ok=True)
+    else:
+        raise CommandServerError(f"a gitwit server is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def _exit_code(exit: SystemExit) -> int:
+    if exit.code is None:
+        return 0
+    if isinstance(exit.code, int):
+        return exit.code
+    # sys.exit("message") prints the message and exits with 1
+    sys.stderr.write(f"{exit.code}\n")
+    return 1
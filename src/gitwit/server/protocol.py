@@ -0,0 +1,77 @@
+"""
+Wire format between `gitwit serve` and the CLI.
+
+A client sends one JSON request per connection, on a single line, and the server answers
+with frames until it closes the connection: each frame is a one byte kind and a big-endian
+32-bit length, then that many bytes. Output frames are forwarded as they are produced, and
+the last frame holds the command's exit code.
+
+This module is imported by the client before anything else of gitwit's, so it must only
+use the standard library.
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+SOCKET_DIR_NAME = "gitwit"
+SOCKET_FILE_NAME = "serve.sock"
+
+# The commands a running server answers; anything else always runs in the calling process.
+SERVED_COMMANDS = frozenset({"ta", "sa", "wte", "rc", "leo", "hz", "report"})
+
+# Environment variables the server needs to render output as the client's terminal would.
+FORWARDED_ENV = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR", "COLUMNS", "LINES")
+
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+
+_FRAME_HEADER = struct.Struct(">cI")
+
+
+def write_frame(stream: BinaryIO, kind: bytes, payload: bytes) -> None:
+    stream.write(_FRAME_HEADER.pack(kind, len(payload)) + payload)
+    stream.flush()
+
+
+def read_frames(stream: BinaryIO) -> Iterator[Tuple[bytes, bytes]]:
+    """Yield the (kind, payload) frames on `stream` until it is closed."""
+    while header := stream.read(_FRAME_HEADER.size):
+        if len(header) < _FRAME_HEADER.size:
+            raise ConnectionError("gitwit server closed the connection mid-frame")
+
+        kind, length = _FRAME_HEADER.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ConnectionError("gitwit server closed the connection mid-frame")
+
+        yield kind, payload
+
+
+def socket_path(git_dir: Path) -> Path:
+    """Return where the server for the worktree with `git_dir` listens."""
+    return git_dir / SOCKET_DIR_NAME / SOCKET_FILE_NAME
+
+
+def find_git_dir(start: Path) -> Optional[Path]:
+    """
+    Return the git dir of the worktree containing `start`, as git would find it, or None
+    outside a repository. Unlike asking git, this costs no subprocess, which matters to a
+    client that must decide within milliseconds whether a server can answer it.
+    """
+    if "GIT_DIR" in os.environ:
+        return Path(os.environ["GIT_DIR"]).resolve()
+
+    for directory in (start, *start.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # a linked worktree or submodule: ".git" is a file saying where its git dir is
+            content = dot_git.read_text(errors="replace").strip()
+            key, _, value = content.partition(":")
+            return (directory / value.strip()).resolve() if key == "gitdir" else None
+
+    return None
@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import time
+import zlib
+from dataclasses import astuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from gitwit.models.author_blame import AuthorBlame
+from gitwit.utils.storage import get_storage_dir, open_database
+
+SCHEMA_VERSION = 2
+CACHE_FILE_NAME = "blame_cache.sqlite3"
+DEFAULT_MAX_SIZE_MB = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blames (
+    path TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (path, blob)
+);
+CREATE INDEX IF NOT EXISTS blames_last_used ON blames(last_used);
+"""
+
+BlameKey = Tuple[str, str]
+
+
+class BlameCacheError(Exception):
+    """Raised when the on-disk blame cache can't be opened or used."""
+
+
+class BlameCache:
+    """
+    Persistent, size capped LRU cache of per-file, per-author `git blame` summaries, kept
+    under the repository's git dir.
+
+    Entries are keyed by (path, blob SHA at HEAD): blaming the same content at the same path
+    yields the same result, so only files whose blob changed since the last run need to be
+    blamed again. Callers must only use it for files without uncommitted changes, as blame
+    then reflects the working tree rather than the blob.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.max_bytes = max_bytes
+        try:
+            self._conn = open_database(path, SCHEMA, SCHEMA_VERSION)
+        except (sqlite3.Error, OSError) as e:
+            raise BlameCacheError(f"failed to open blame cache at {path}: {e}") from e
+
+    @classmethod
+    def for_repo(cls, max_size_mb: int = DEFAULT_MAX_SIZE_MB) -> "BlameCache":
+        try:
+            path = get_storage_dir() / CACHE_FILE_NAME
+        except OSError as e:
+            raise BlameCacheError(f"failed to create blame cache directory: {e}") from e
+
+        return cls(path, max_size_mb * 1024 * 1024)
+
+    def get_many(self, keys: Iterable[BlameKey]) -> Dict[BlameKey, List[AuthorBlame]]:
+        """Return the cached blame for every key present, marking them as recently used."""
+        hits: Dict[BlameKey, List[AuthorBlame]] = {}
+        now = time.time()
+
+        with self._conn:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT data FROM blames WHERE path = ? AND blob = ?", key
+                ).fetchone()
+                if row is not None:
+                    hits[key] = _decode(row[0])
+
+            self._conn.executemany(
+                "UPDATE blames SET last_used = ? WHERE path = ? AND blob = ?",
+                [(now, path, blob) for path, blob in hits],
+            )
+
+        return hits
+
+    def put(self, key: BlameKey, blame: List[AuthorBlame]) -> None:
+        data = _encode(blame)
+
+        # a single result larger than the whole cache is never worth keeping
+        if len(data) > self.max_bytes:
+            return
+
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blames (path, blob, size, last_used, data)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (*key, len(data), time.time(), data),
+            )
+
+    def close(self) -> None:
+        """Evict least recently used entries until the cache fits its size cap, then close."""
+        with self._conn:
+            (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blames").fetchone()
+            if total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT path, blob, size FROM blames ORDER BY last_used ASC"
+                ).fetchall()
+                evicted = []
+                for path, blob, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((path, blob))
+                    total -= size
+
+                self._conn.executemany("DELETE FROM blames WHERE path = ? AND blob = ?", evicted)
+        self._conn.close()
+
+
+def _encode(blame: List[AuthorBlame]) -> bytes:
+    return zlib.compress(json.dumps([astuple(b) for b in blame]).encode("utf-8"))
+
+
+def _decode(data: bytes) -> List[AuthorBlame]:
+    return [AuthorBlame(*fields) for fields in json.loads(zlib.decompress(data))]
@@ -0,0 +1,116 @@
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from gitwit.models.commit_record import CommitRecord, FileChange
+from gitwit.utils.git_process import stream_git_output
+from gitwit.utils.profiler import profiled
+
+# Each commit starts with a record separator so headers can't be confused with numstat
+# entries; the remaining header fields are NUL separated to match `-z` numstat output.
+RECORD_START = b"\x1e"
+LOG_FORMAT = "%x1e%H%x00%an%x00%ae%x00%at%x00%ct%x00%B"
+HEADER_FIELDS = 6
+
+# Options shared by every numstat walk:
+#   --no-renames                    report renames as delete + add, like GitPython's stats
+#   --diff-merges=first-parent      give merges their first-parent diff, like GitPython's stats
+LOG_ARGS = (
+    "log",
+    "-z",
+    "--numstat",
+    "--no-renames",
+    "--diff-merges=first-parent",
+    f"--format={LOG_FORMAT}",
+)
+
+
+def iter_commit_records(
+    *rev_args: str, paths: Optional[Sequence[str]] = None
+) -> Iterator[CommitRecord]:
+    """
+    Stream commits from a single `git log --numstat` process as CommitRecords.
+
+    `rev_args` are passed straight to git log (revisions, --since, --author, ...),
+    `paths` are appended after `--` as pathspecs.
+    """
+    args: List[str] = [*LOG_ARGS, *rev_args]
+    if paths:
+        args += ["--", *paths]
+
+    yield from profiled("parsing", parse_numstat_log(stream_git_output(*args)))
+
+
+def iter_commit_records_by_sha(shas: Sequence[str]) -> Iterator[CommitRecord]:
+    """Stream CommitRecords for exactly `shas` (in that order) without walking their history."""
+    if not shas:
+        return
+
+    stdin = "".join(f"{sha}\n" for sha in shas).encode("ascii")
+    chunks = stream_git_output(*LOG_ARGS, "--no-walk=unsorted", "--stdin", input=stdin)
+    yield from profiled("parsing", parse_numstat_log(chunks))
+
+
+def parse_numstat_log(chunks: Iterable[bytes]) -> Iterator[CommitRecord]:
+    """
+    Parse the byte stream of `git log -z --numstat --format=LOG_FORMAT` into CommitRecords.
+
+    The stream is a sequence of NUL terminated tokens: a commit is HEADER_FIELDS tokens
+    (the first prefixed with RECORD_START) followed by zero or more numstat tokens of the
+    form `<insertions>\\t<deletions>\\t<path>`.
+    """
+    header: List[bytes] = []
+    files: List[FileChange] = []
+    pending = b""
+
+    for chunk in chunks:
+        tokens = (pending + chunk).split(b"\x00")
+        pending = tokens.pop()
+
+        for token in tokens:
+            if token.startswith(RECORD_START) and len(header) == HEADER_FIELDS:
+                yield _build_record(header, files)
+                header, files = [], []
+
+            if len(header) < HEADER_FIELDS:
+                header.append(token[1:] if not header else token)
+                continue
+
+            change = _parse_numstat_token(token)
+            if change is not None:
+                files.append(change)
+
+    if pending:
+        change = _parse_numstat_token(pending)
+        if change is not None:
+            files.append(change)
+
+    if len(header) == HEADER_FIELDS:
+        yield _build_record(header, files)
+
+
+def _parse_numstat_token(token: bytes) -> Optional[FileChange]:
+    token = token.lstrip(b"\n")
+    if not token:
+        return None
+
+    insertions, deletions, path = token.split(b"\t", 2)
+
+    # binary files are reported as "-\t-"
+    return FileChange(
+        path=path.decode("utf-8", errors="replace"),
+        insertions=int(insertions) if insertions != b"-" else 0,
+        deletions=int(deletions) if deletions != b"-" else 0,
+    )
+
+
+def _build_record(header: List[bytes], files: List[FileChange]) -> CommitRecord:
+    hexsha, author, author_email, authored_date, committed_date, message = header
+
+    return CommitRecord(
+        hexsha=hexsha.decode("ascii"),
+        author=author.decode("utf-8", errors="replace"),
+        author_email=author_email.decode("utf-8", errors="replace"),
+        authored_date=int(authored_date),
+        committed_date=int(committed_date),
+        message=message.decode("utf-8", errors="replace"),
+        files=files,
+    )
@@ -0,0 +1,303 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from git import GitCommandError
+
+from gitwit.models.commit_record import CommitRecord, FileChange
+from gitwit.utils.commit_history import iter_commit_records, iter_commit_records_by_sha
+from gitwit.utils.git_process import GitProcessError
+from gitwit.utils.path_matcher import PathMatcher
+from gitwit.utils.profiler import phase
+from gitwit.utils.repo_singleton import RepoSingleton
+from gitwit.utils.storage import (
+    BATCH_SIZE,
+    batched,
+    get_storage_dir,
+    open_database,
+    placeholders,
+    read_head_sha,
+)
+
+# Bump whenever the tables below (or what gets stored in them) change; an index with any
+# other version is thrown away and rebuilt. Commits are immutable, so nothing else ever
+# invalidates an entry.
+SCHEMA_VERSION = 2
+
+INDEX_FILE_NAME = "commit_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL UNIQUE,
+    author TEXT NOT NULL,
+    author_email TEXT NOT NULL,
+    authored_date INTEGER NOT NULL,
+    committed_date INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_changes (
+    commit_id INTEGER NOT NULL REFERENCES commits(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    insertions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS file_changes_commit_id ON file_changes(commit_id);
+CREATE INDEX IF NOT EXISTS commits_committed_date ON commits(committed_date);
+CREATE TABLE IF NOT EXISTS ref_tips (
+    ref TEXT PRIMARY KEY,
+    sha TEXT NOT NULL
+);
+"""
+
+
+class CommitIndexError(Exception):
+    """Raised when the on-disk commit index can't be opened or used."""
+
+
+class CommitIndex:
+    """
+    Persistent SHA -> CommitRecord store, kept in SQLite under the repository's git dir.
+
+    The index mirrors exactly the commits reachable from HEAD, which is what commands walk.
+    `refresh` records the tips it has indexed, so each run only reads
+    `git log <new tips> ^<old tips>` and drops commits a force-push, rebase or branch switch
+    made unreachable.
+    """
+
+    _instances: Dict[Path, "CommitIndex"] = {}
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            self._conn = open_database(path, SCHEMA, SCHEMA_VERSION)
+            self._conn.create_function("py_lower", 1, str.lower, deterministic=True)
+        except (sqlite3.Error, OSError) as e:
+            raise CommitIndexError(f"failed to open commit index at {path}: {e}") from e
+
+    @classmethod
+    def for_repo(cls) -> "CommitIndex":
+        """Return the shared index for the current repository, opening it on first use."""
+        try:
+            path = get_storage_dir() / INDEX_FILE_NAME
+        except OSError as e:
+            raise CommitIndexError(f"failed to create commit index directory: {e}") from e
+
+        if path not in cls._instances:
+            cls._instances[path] = cls(path)
+
+        return cls._instances[path]
+
+    # ================================================================================
+    # Public API
+    # ================================================================================
+
+    @phase("commit index refresh")
+    def refresh(self) -> int:
+        """
+        Bring the index in line with the current ref tips, returning the number of commits
+        added. Costs a single ref lookup when nothing has moved.
+        """
+        new_tips = _read_ref_tips()
+
+        try:
+            if self._indexed_tips() == new_tips:
+                return 0
+
+            # serialise concurrent refreshes; the loser re-reads the tips and finds no work
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old_tips = self._indexed_tips()
+                added = 0
+
+                if old_tips != new_tips:
+                    old, new = set(old_tips.values()), set(new_tips.values())
+                    self._collect_unreachable(old, new)
+                    added = self._add_records(self._iter_new_commits(old, new))
+
+                    self._conn.execute("DELETE FROM ref_tips")
+                    self._conn.executemany(
+                        "INSERT INTO ref_tips (ref, sha) VALUES (?, ?)", new_tips.items()
+                    )
+
+                self._conn.commit()
+                return added
+            except BaseException:
+                self._conn.rollback()
+                raise
+        except (sqlite3.Error, GitCommandError, GitProcessError) as e:
+            raise CommitIndexError(f"failed to refresh commit index: {e}") from e
+
+    def query(
+        self,
+        since: datetime,
+        until: datetime,
+        directories: Optional[List[str]] = None,
+        authors: Optional[List[str]] = None,
+    ) -> Iterator[CommitRecord]:
+        """
+        Yield indexed commits committed between since/until (inclusive), newest first,
+        keeping only those by one of `authors` (case-insensitive substring of the name) that
+        touched a file under one of `directories`. Directory globs only narrow the commits
+        to those touching their literal prefix; get_filtered_commits applies them exactly.
+        """
+        sql = (
+            "SELECT id, sha, author, author_email, authored_date, committed_date, message"
+            " FROM commits c WHERE committed_date BETWEEN ? AND ?"
+        )
+        params: List = [int(since.timestamp()), int(until.timestamp())]
+
+        if authors:
+            sql += " AND (" + " OR ".join("instr(py_lower(author), ?) > 0" for _ in authors) + ")"
+            params += [a.lower() for a in authors]
+
+        prefixes = PathMatcher(directories).literal_prefixes() if directories else None
+        if prefixes is not None:
+            # a prefix range keeps the match exact ("src/" never matches "srcx/")
+            ranges = " OR ".join("(fc.path >= ? AND fc.path < ?)" for _ in prefixes) or "0"
+            sql += (
+                " AND EXISTS (SELECT 1 FROM file_changes fc"
+                f" WHERE fc.commit_id = c.id AND ({ranges}))"
+            )
+            for prefix in prefixes:
+                params += [prefix, prefix[:-1] + chr(ord("/") + 1)]
+
+        sql += " ORDER BY committed_date DESC, id ASC"
+
+        cursor = self._conn.execute(sql, params)
+        while rows := cursor.fetchmany(BATCH_SIZE):
+            yield from self._hydrate(rows)
+
+    def records(self, shas: Iterable[str]) -> Iterator[CommitRecord]:
+        """
+        Yield the CommitRecord of each of `shas`, in that order. Any the index doesn't hold,
+        e.g. ones HEAD gained since the last refresh, are read from git.
+        """
+        for batch in batched(shas):
+            rows = self._conn.execute(
+                "SELECT id, sha, author, author_email, authored_date, committed_date, message"
+                f" FROM commits WHERE sha IN ({placeholders(batch)})",
+                batch,
+            ).fetchall()
+            found = {record.hexsha: record for record in self._hydrate(rows)} if rows else {}
+
+            missing = [sha for sha in batch if sha not in found]
+            found.update((record.hexsha, record) for record in iter_commit_records_by_sha(missing))
+
+            yield from (found[sha] for sha in batch if sha in found)
+
+    def add_records(self, records: Iterable[CommitRecord]) -> int:
+        with self._conn:
+            return self._add_records(records)
+
+    def close(self) -> None:
+        self._conn.close()
+        self._instances.pop(self.path, None)
+
+    # ================================================================================
+    # Helpers
+    # ================================================================================
+
+    def _add_records(self, records: Iterable[CommitRecord]) -> int:
+        added = 0
+
+        for record in records:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO commits"
+                " (sha, author, author_email, authored_date, committed_date, message)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record.hexsha,
+                    record.author,
+                    record.author_email,
+                    record.authored_date,
+                    record.committed_date,
+                    record.message,
+                ),
+            )
+
+            # already indexed, e.g. reachable again after switching back to a branch
+            if cursor.rowcount == 0:
+                continue
+
+            self._conn.executemany(
+                "INSERT INTO file_changes (commit_id, path, insertions, deletions)"
+                " VALUES (?, ?, ?, ?)",
+                [(cursor.lastrowid, f.path, f.insertions, f.deletions) for f in record.files],
+            )
+            added += 1
+
+        return added
+
+    def _indexed_tips(self) -> Dict[str, str]:
+        return dict(self._conn.execute("SELECT ref, sha FROM ref_tips"))
+
+    def _iter_new_commits(self, old_tips: set, new_tips: set) -> Iterator[CommitRecord]:
+        if not new_tips:
+            return
+
+        try:
+            yield from iter_commit_records(*new_tips, *(f"^{tip}" for tip in old_tips))
+        except GitProcessError:
+            # an old tip was pruned by git gc: only read the reachable commits we don't have
+            reachable = RepoSingleton.get_repo().git.rev_list(*new_tips).split()
+            yield from iter_commit_records_by_sha(self._missing_shas(reachable))
+
+    def _missing_shas(self, shas: Sequence[str]) -> List[str]:
+        known = set()
+        for batch in batched(shas):
+            rows = self._conn.execute(
+                f"SELECT sha FROM commits WHERE sha IN ({placeholders(batch)})", batch
+            )
+            known.update(sha for (sha,) in rows)
+
+        return [sha for sha in shas if sha not in known]
+
+    def _collect_unreachable(self, old_tips: set, new_tips: set) -> None:
+        """Delete the indexed commits that are no longer reachable from any tracked tip."""
+        if not old_tips or old_tips <= new_tips:
+            return
+
+        repo = RepoSingleton.get_repo()
+        try:
+            # everything the old tips reached that the new ones don't: empty for fast-forwards
+            gone = repo.git.rev_list(*old_tips, *(f"^{tip}" for tip in new_tips)).split()
+        except GitCommandError:
+            # an old tip was pruned by git gc: re-derive reachability from scratch
+            reachable = set(repo.git.rev_list(*new_tips).split()) if new_tips else set()
+            gone = [sha for (sha,) in self._conn.execute("SELECT sha FROM commits")]
+            gone = [sha for sha in gone if sha not in reachable]
+
+        for batch in batched(gone):
+            self._conn.execute(f"DELETE FROM commits WHERE sha IN ({placeholders(batch)})", batch)
+
+    def _hydrate(self, rows: Sequence[tuple]) -> List[CommitRecord]:
+        records_by_id: Dict[int, CommitRecord] = {}
+
+        for commit_id, sha, author, email, authored, committed, message in rows:
+            records_by_id[commit_id] = CommitRecord(
+                hexsha=sha,
+                author=author,
+                author_email=email,
+                authored_date=authored,
+                committed_date=committed,
+                message=message,
+            )
+
+        ids = list(records_by_id)
+        files = self._conn.execute(
+            "SELECT commit_id, path, insertions, deletions FROM file_changes"
+            f" WHERE commit_id IN ({placeholders(ids)}) ORDER BY rowid",
+            ids,
+        )
+        for commit_id, path, insertions, deletions in files:
+            records_by_id[commit_id].files.append(FileChange(path, insertions, deletions))
+
+        return list(records_by_id.values())
+
+
+def _read_ref_tips() -> Dict[str, str]:
+    # kept as a ref -> tip mapping so tracking more refs doesn't change the stored format
+    head = read_head_sha()
+    return {"HEAD": head} if head is not None else {}
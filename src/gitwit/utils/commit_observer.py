@@ -0,0 +1,53 @@
+from typing import Iterable, List, Protocol, Sequence
+
+from rich.console import RenderableType
+from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+
+from gitwit.models.commit_record import CommitRecord
+from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.profiler import timed
+
+
+class CommitObserver(Protocol):
+    """
+    An analysis fed one commit at a time, so several can share a single history scan.
+    """
+
+    def add(self, commit: CommitRecord) -> None: ...
+
+    def render(self) -> List[RenderableType]:
+        """Return the tables (or messages) that report the commits seen so far."""
+        ...
+
+
+def observe_commits(
+    commits: Iterable[CommitRecord],
+    observers: Sequence[CommitObserver],
+    description: str = "Scanning commits",
+) -> int:
+    """
+    Feed every commit of `commits` to each of `observers` in turn, with a progress bar,
+    and return the number of commits seen. `commits` is consumed once, as it streams.
+    """
+    console = ConsoleSingleton.get_console()
+    seen = 0
+    adds = [timed(f"aggregation ({type(o).__name__})", o.add) for o in observers]
+
+    with Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed} commits"),
+        TimeElapsedColumn(),
+        console=console,
+        # piped or redirected, a progress bar is only noise in the output
+        disable=not console.is_terminal,
+    ) as progress:
+        # the commits are streamed, so their number isn't known up front
+        task = progress.add_task(description, total=None)
+        for commit in commits:
+            for add in adds:
+                add(commit)
+            seen += 1
+            progress.advance(task)
+
+    return seen
@@ -1,13 +1,45 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
 from rich.console import Console
 
+# the console of the request or command being run, while one is redirected
+_redirected_console: ContextVar[Optional[Console]] = ContextVar(
+    "gitwit_redirected_console", default=None
+)
+
 
 class ConsoleSingleton:
-    """Singleton Console instance for consistent output formatting."""
+    """
+    Singleton Console instance for consistent output formatting.
+
+    Look the console up with `get_console()` when printing, rather than keeping it in a
+    module global, so output follows `redirected()`.
+    """
 
     _console = None
 
     @classmethod
     def get_console(cls) -> Console:
+        console = _redirected_console.get()
+        if console is not None:
+            return console
+
         if cls._console is None:
             cls._console = Console()
         return cls._console
+
+    @classmethod
+    @contextmanager
+    def redirected(cls, console: Console) -> Iterator[Console]:
+        """
+        Make `get_console()` return `console` until the block exits. The redirection is
+        held in a context variable, so it only applies to the thread (or asyncio task) that
+        made it, e.g. a server's request, and the shared console is never modified.
+        """
+        token = _redirected_console.set(console)
+        try:
+            yield console
+        finally:
+            _redirected_console.reset(token)
@@ -1,54 +1,76 @@
-from typing import List, Optional
+from typing import Iterable, Iterator, List
 
 from gitwit.models.git_log_entry import GitLogEntry
-from gitwit.utils.repo_singleton import RepoSingleton
+from gitwit.utils.commit_history import RECORD_START
+from gitwit.utils.git_process import stream_git_output
+from gitwit.utils.profiler import profiled
+
+# Same token layout as the numstat walk in commit_history: HEADER_FIELDS NUL terminated
+# header tokens, the first prefixed with RECORD_START, followed by one token per path
+ADDED_FILES_LOG_FORMAT = "%x1e%H%x00%at%x00%an"
+HEADER_FIELDS = 3
 
 
 # TODO: refactor this to be part of the git_fetch in git helpers
-def fetch_git_log_entries_of_added_files() -> List[GitLogEntry]:
-    repo = RepoSingleton.get_repo()
-
-    raw = repo.git.log("--diff-filter=A", "--format=%H%x00%aI%x00%an", "--name-only")
-
-    blocks: List[GitLogEntry] = []
-
-    current_hash: Optional[str] = None
-    current_iso_date: Optional[str] = None
-    current_author: Optional[str] = None
-    current_files: List[str] = []
-
-    for line in raw.splitlines():
-        if "\x00" in line:
-            # flush the previous block if we had one
-            if current_hash is not None:
-                blocks.append(
-                    GitLogEntry(
-                        commit_hash=current_hash,
-                        created_at_iso=current_iso_date,
-                        author=current_author,
-                        files=current_files,
-                    )
-                )
-            # parse new header
-            commit_hash, iso_date, author = line.split("\x00")
-            current_hash = commit_hash
-            current_iso_date = iso_date
-            current_author = author
-            current_files = []
-        else:
-            path = line.strip()
+def iter_git_log_entries_of_added_files(*rev_args: str) -> Iterator[GitLogEntry]:
+    """
+    Stream the commits that added files, newest first, each with the paths it added.
+
+    git's output is parsed as it arrives, so a caller that stops early never pays for the
+    rest of history: closing the iterator stops the git process.
+    """
+    yield from iter_git_log_entries("--diff-filter=A", *rev_args)
+
+
+def iter_git_log_entries(*log_args: str) -> Iterator[GitLogEntry]:
+    """Stream `git log <log_args>` as GitLogEntry, each with the paths its commit touched."""
+    chunks = stream_git_output(
+        "log",
+        "-z",
+        "--name-only",
+        f"--format={ADDED_FILES_LOG_FORMAT}",
+        *log_args,
+    )
+    yield from profiled("parsing", parse_added_files_log(chunks))
+
+
+def parse_added_files_log(chunks: Iterable[bytes]) -> Iterator[GitLogEntry]:
+    """Parse the byte stream of `git log -z --name-only --format=ADDED_FILES_LOG_FORMAT`."""
+    header: List[bytes] = []
+    files: List[str] = []
+    pending = b""
+
+    for chunk in chunks:
+        tokens = (pending + chunk).split(b"\x00")
+        pending = tokens.pop()
+
+        for token in tokens:
+            if token.startswith(RECORD_START) and len(header) == HEADER_FIELDS:
+                yield _build_entry(header, files)
+                header, files = [], []
+
+            if len(header) < HEADER_FIELDS:
+                header.append(token[1:] if not header else token)
+                continue
+
+            path = token.lstrip(b"\n")
             if path:
-                current_files.append(path)
-
-    # flush the final block
-    if current_hash is not None:
-        blocks.append(
-            GitLogEntry(
-                commit_hash=current_hash,
-                created_at_iso=current_iso_date,
-                author=current_author,
-                files=current_files,
-            )
-        )
-
-    return blocks
+                files.append(path.decode("utf-8", errors="replace"))
+
+    path = pending.lstrip(b"\n")
+    if path:
+        files.append(path.decode("utf-8", errors="replace"))
+
+    if len(header) == HEADER_FIELDS:
+        yield _build_entry(header, files)
+
+
+def _build_entry(header: List[bytes], files: List[str]) -> GitLogEntry:
+    commit_hash, authored_date, author = header
+
+    return GitLogEntry(
+        commit_hash=commit_hash.decode("ascii"),
+        authored_date=int(authored_date),
+        author=author.decode("utf-8", errors="replace"),
+        files=files,
+    )
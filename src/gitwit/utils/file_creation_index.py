@@ -0,0 +1,91 @@
+from typing import Iterable, List
+
+from gitwit.models.file_creation import FileCreation
+from gitwit.models.git_log_entry import GitLogEntry
+from gitwit.utils.fetch_git_log_entries import iter_git_log_entries_of_added_files
+from gitwit.utils.storage import HeadTrackedIndex, batched, placeholders
+
+# Bump whenever the tables below (or what gets stored in them) change; an index with any
+# other version is thrown away and rebuilt.
+SCHEMA_VERSION = 1
+INDEX_FILE_NAME = "file_creation_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_creations (
+    path TEXT PRIMARY KEY,
+    commit_hash TEXT NOT NULL,
+    author TEXT NOT NULL,
+    authored_date INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class FileCreationIndexError(Exception):
+    """Raised when the on-disk file creation index can't be opened or used."""
+
+
+class FileCreationIndex(HeadTrackedIndex):
+    """
+    Persistent path -> creating commit store, kept in SQLite under the repository's git dir.
+
+    For every path added in HEAD's history it records the newest commit that added it, i.e.
+    the one that created the current file if it was ever deleted and re-added. `refresh`
+    only reads `git log --diff-filter=A <new HEAD> ^<indexed HEAD>` when HEAD moved forward,
+    and rebuilds the index when HEAD moved to history that doesn't contain the indexed one.
+    `refresh` returns the number of paths recorded.
+    """
+
+    NAME = "file creation index"
+    ERROR = FileCreationIndexError
+    SCHEMA = SCHEMA
+    SCHEMA_VERSION = SCHEMA_VERSION
+    INDEX_FILE_NAME = INDEX_FILE_NAME
+
+    # ================================================================================
+    # Public API
+    # ================================================================================
+
+    def lookup(self, paths: Iterable[str]) -> List[FileCreation]:
+        """Return the creation of each of `paths` that is indexed, in no particular order."""
+        creations: List[FileCreation] = []
+
+        for batch in batched(paths):
+            rows = self._conn.execute(
+                "SELECT path, commit_hash, author, authored_date FROM file_creations"
+                f" WHERE path IN ({placeholders(batch)})",
+                batch,
+            )
+            creations += [FileCreation(*row) for row in rows]
+
+        return creations
+
+    # ================================================================================
+    # Helpers
+    # ================================================================================
+
+    def _clear(self) -> None:
+        self._conn.execute("DELETE FROM file_creations")
+
+    def _read_entries(self, *rev_args: str) -> Iterable[GitLogEntry]:
+        return iter_git_log_entries_of_added_files(*rev_args)
+
+    def _add_entries(self, entries: Iterable[GitLogEntry]) -> int:
+        """Record `entries`, newest first, over anything older already in the index."""
+        seen = set()
+
+        for entry in entries:
+            # only the newest add of a path counts, and it comes first
+            rows = [
+                (path, entry.commit_hash, entry.author, entry.authored_date)
+                for path in entry.files
+                if path not in seen
+            ]
+            seen.update(entry.files)
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_creations (path, commit_hash, author, authored_date)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+        return len(seen)
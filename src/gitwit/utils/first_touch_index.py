@@ -0,0 +1,106 @@
+import posixpath
+from typing import Dict, Iterable, List
+
+from gitwit.models.commit_record import CommitRecord
+from gitwit.utils.commit_index import CommitIndex, CommitIndexError
+from gitwit.utils.repo_singleton import RepoSingleton
+from gitwit.utils.storage import HeadTrackedIndex, batched, placeholders
+
+# Bump whenever the tables below (or what gets stored in them) change; an index with any
+# other version is thrown away and rebuilt.
+SCHEMA_VERSION = 3
+INDEX_FILE_NAME = "first_touch_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS author_areas (
+    author TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    PRIMARY KEY (author, directory)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS author_areas_commit ON author_areas (commit_hash);
+"""
+
+
+class FirstTouchIndexError(Exception):
+    """Raised when the on-disk first touch index can't be opened or used."""
+
+
+class FirstTouchIndex(HeadTrackedIndex):
+    """
+    Persistent store of who touched what first, kept in SQLite under the repository's git dir.
+
+    For every author in HEAD's history it records the directories (an "area") they changed,
+    each with the commit that first did, built in one oldest-first pass over history, so
+    asking whether a commit was its author's first change in an area is a single indexed
+    lookup however long the history is. Like FileCreationIndex, `refresh` only reads the
+    commits HEAD gained, and rebuilds when HEAD moved to history that doesn't contain the
+    indexed one. Their authors and files come from the CommitIndex, so git is only asked
+    for their order.
+    """
+
+    NAME = "first touch index"
+    ERROR = FirstTouchIndexError
+    SCHEMA = SCHEMA
+    SCHEMA_VERSION = SCHEMA_VERSION
+    INDEX_FILE_NAME = INDEX_FILE_NAME
+
+    # ================================================================================
+    # Public API
+    # ================================================================================
+
+    def first_areas(self, commit_hashes: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Map each of `commit_hashes` that was its author's first change to a directory to
+        those directories, sorted. "" is the repository root.
+        """
+        areas: Dict[str, List[str]] = {}
+
+        for batch in batched(commit_hashes):
+            rows = self._conn.execute(
+                "SELECT commit_hash, directory FROM author_areas"
+                f" WHERE commit_hash IN ({placeholders(batch)}) ORDER BY directory",
+                batch,
+            )
+            for commit_hash, directory in rows:
+                areas.setdefault(commit_hash, []).append(directory)
+
+        return areas
+
+    # ================================================================================
+    # Helpers
+    # ================================================================================
+
+    def _clear(self) -> None:
+        self._conn.execute("DELETE FROM author_areas")
+
+    def _read_entries(self, *rev_args: str) -> Iterable[CommitRecord]:
+        try:
+            commits = CommitIndex.for_repo()
+            commits.refresh()
+        except CommitIndexError as e:
+            raise FirstTouchIndexError(f"failed to read commits to index: {e}") from e
+
+        # a merge's first-parent diff repeats the changes its branch's authors made
+        shas = RepoSingleton.get_repo().git.rev_list("--reverse", "--no-merges", *rev_args)
+        return commits.records(shas.split())
+
+    def _add_entries(self, entries: Iterable[CommitRecord]) -> int:
+        """Record `entries`, oldest first, keeping anything older already in the index."""
+        read = 0
+
+        for entry in entries:
+            read += 1
+            areas = file_areas(f.path for f in entry.files)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO author_areas (author, directory, commit_hash)"
+                " VALUES (?, ?, ?)",
+                [(entry.author, d, entry.hexsha) for d in areas],
+            )
+
+        return read
+
+
+def file_areas(paths: Iterable[str]) -> List[str]:
+    """Return the directories `paths` are in, each once, with "" for the repository root."""
+    return list(dict.fromkeys(posixpath.dirname(path) for path in paths))
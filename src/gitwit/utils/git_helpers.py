@@ -1,11 +1,20 @@
+from collections import defaultdict
 from datetime import datetime
 import os
 from pathlib import Path
 import re
-from typing import Any, Dict, List, Optional, Iterable
-from git import Commit, Repo
+from typing import Any, Dict, List, Optional, Iterable, Iterator, Sequence, Set
+from git import Repo
 
+from gitwit.models.author_blame import AuthorBlame
 from gitwit.models.blame_line import BlameLine
+from gitwit.models.commit_record import CommitRecord
+from gitwit.utils.commit_history import iter_commit_records
+from gitwit.utils.commit_index import CommitIndex, CommitIndexError
+from gitwit.utils.git_process import stream_git_output
+from gitwit.utils.object_reader import ObjectReader
+from gitwit.utils.path_matcher import PathMatcher
+from gitwit.utils.profiler import phase, profiled
 from gitwit.utils.repo_singleton import RepoSingleton
 
 
@@ -21,53 +30,95 @@ def get_filtered_commits(
     until: datetime,
     directories: Optional[List[str]] = None,
     authors: Optional[List[str]] = None,
-) -> Iterable[Commit]:
+) -> Iterable[CommitRecord]:
     """
-    - Instantiates Repo()
-    - Yields commits between since/until
-    - Applies authors and directory filters
+    - Brings the persistent commit index up to date with HEAD, then answers the date range
+      and filters from it
+    - Without a usable index, streams commits from git, pushing authors and directory filters
+      down so git can prune commits natively
+    - Re-applies both filters in python to keep their exact semantics
+
+    `directories` may hold gitignore-style globs, see PathMatcher.
     """
-    repo = RepoSingleton.get_repo()
+    return profiled("get_filtered_commits", _filter_commits(since, until, directories, authors))
 
-    for commit in repo.iter_commits(since=since.isoformat(), until=until.isoformat()):
-        if authors and not any(a.lower() in commit.author.name.lower() for a in authors):
+
+def _filter_commits(
+    since: datetime,
+    until: datetime,
+    directories: Optional[List[str]],
+    authors: Optional[List[str]],
+) -> Iterator[CommitRecord]:
+    matcher = PathMatcher(directories or [])
+
+    for commit in _fetch_commits(since, until, directories, authors, matcher):
+        # git matches --author against "Name <email>", so it only narrows the candidates
+        if authors and not any(a.lower() in commit.author.lower() for a in authors):
             continue
 
-        if directories and not any(
-            str(f).startswith(d.rstrip("/") + "/") for f in commit.stats.files for d in directories
-        ):
+        if directories and not any(matcher.matches(f.path) for f in commit.files):
             continue
         yield commit
 
 
-# TODO WIP: improve efficiency of this function by doing filtering in git instead of in python
-# def get_filtered_commits(
-#     since: datetime,
-#     until: datetime,
-#     directories: Optional[List[str]] = None,
-#     authors: Optional[List[str]] = None,
-# ) -> Iterable[Commit]:
-#     """
-#     - Instantiates Repo()
-#     - Yields commits between since/until
-#     - Applies authors and directory filters
-#     """
-#     repo = RepoSingleton.get_repo()
+def _fetch_commits(
+    since: datetime,
+    until: datetime,
+    directories: Optional[List[str]],
+    authors: Optional[List[str]],
+    matcher: PathMatcher,
+) -> Iterable[CommitRecord]:
+    try:
+        index = CommitIndex.for_repo()
+        index.refresh()
+    except CommitIndexError:
+        # e.g. a read-only repository: stream the stats straight from git instead
+        rev_args = [f"--since={since.isoformat()}", f"--until={until.isoformat()}"]
+        rev_args += _author_filter_args(authors)
+        rev_args += _directory_filter_args(directories)
+        records = iter_commit_records(*rev_args, paths=_directory_pathspecs(matcher))
+        return profiled("stats retrieval (git log)", records)
+
+    return profiled("stats retrieval (index)", index.query(since, until, directories, authors))
+
+
+def _author_filter_args(authors: Optional[List[str]]) -> List[str]:
+    """
+    Build `git log` options that keep any commit whose author name contains one of `authors`
+    as a case-insensitive substring. Multiple --author options are OR-ed together by git.
+    """
+    if not authors:
+        return []
+
+    # git only folds ASCII case, so a non-ASCII name could be wrongly pruned; leave those to python
+    if not all(a.isascii() for a in authors):
+        return []
+
+    return [
+        "--no-mailmap",
+        "--regexp-ignore-case",
+        "--fixed-strings",
+        *(f"--author={a}" for a in authors),
+    ]
+
 
-#     kwargs = {
-#         "since": since.isoformat(),
-#         "until": until.isoformat(),
-#     }
+def _directory_filter_args(directories: Optional[List[str]]) -> List[str]:
+    if not directories:
+        return []
 
-#     if authors:
-#         # build a case-insensitive regex that matches any of the names as substrings
-#         pattern = "(?i)(" + "|".join(re.escape(a) for a in authors) + ")"
-#         kwargs["author"] = pattern
+    # --full-history keeps merges that differ from their first parent in the pathspecs,
+    # --full-diff keeps the numstat of every file in a matching commit, not just the pathspecs
+    return ["--full-history", "--full-diff"]
 
-#     # if directories:
-#     #     kwargs["paths"] = directories
 
-#     return repo.iter_commits(**kwargs)
+def _directory_pathspecs(matcher: PathMatcher) -> Optional[List[str]]:
+    # globs are only narrowed to their literal prefix here; the matcher then applies them exactly
+    prefixes = matcher.literal_prefixes()
+    if not prefixes:
+        return None
+
+    # the trailing slash restricts a pathspec to directories, matching PathMatcher
+    return [f":(literal){prefix}" for prefix in prefixes]
 
 
 def fetch_file_paths_tracked_by_git(search_term: str, directories) -> List[str]:
@@ -77,12 +128,82 @@ def fetch_file_paths_tracked_by_git(search_term: str, directories) -> List[str]:
     matching_files = [f for f in all_files if search_term in os.path.basename(f)]
 
     if directories:
-        dirs = [d.rstrip("/") + "/" for d in directories]
-        matching_files = [f for f in matching_files if any(f.startswith(d) for d in dirs)]
+        matcher = PathMatcher(directories)
+        matching_files = [f for f in matching_files if matcher.matches(f)]
 
     return matching_files
 
 
+def fetch_committed_blob_shas(target: Path) -> Dict[str, str]:
+    """
+    Map each file under `target` whose content matches HEAD to its blob SHA at HEAD.
+
+    Files with staged or unstaged changes are left out, since blaming them reports the
+    working tree rather than the committed blob.
+    """
+    repo = RepoSingleton.get_repo()
+
+    tree = repo.git.ls_tree("-r", "-z", "HEAD", "--", str(target))
+    modified = set(repo.git.diff("--name-only", "-z", "HEAD", "--", str(target)).split("\0"))
+
+    blobs: Dict[str, str] = {}
+    for entry in tree.split("\0"):
+        if not entry:
+            continue
+
+        meta, path = entry.split("\t", 1)
+        _, object_type, sha = meta.split()
+        if object_type == "blob" and path not in modified:
+            blobs[path] = sha
+
+    return blobs
+
+
+def fetch_blob_sizes(paths: Sequence[str]) -> Dict[str, int]:
+    """
+    Return the size in bytes of each path's blob in the index, looked up in one batch
+    through the shared ObjectReader. Paths git doesn't track are left out.
+    """
+    # cat-file reads one name per line, so a path containing one can't be asked for
+    paths = [p for p in paths if "\n" not in p]
+    infos = ObjectReader.for_repo().info([f":{p}" for p in paths])
+
+    return {path: info.size for path, info in zip(paths, infos) if info is not None}
+
+
+# Attributes that mark a file as not worth blaming, with the values that do so: code GitHub
+# linguist treats as generated or vendored, and files git won't diff (`-diff`, `binary`)
+BLAME_EXCLUDING_ATTRIBUTES = {
+    b"linguist-generated": (b"set", b"true"),
+    b"linguist-vendored": (b"set", b"true"),
+    b"diff": (b"unset",),
+    b"binary": (b"set",),
+}
+
+
+def fetch_paths_excluded_by_attributes(paths: Sequence[str]) -> Set[str]:
+    """
+    Return the paths whose .gitattributes mark them as generated, vendored or binary, read
+    with a single `git check-attr` call.
+    """
+    if not paths:
+        return set()
+
+    stdin = b"".join(p.encode("utf-8") + b"\0" for p in paths)
+    attributes = [a.decode("ascii") for a in BLAME_EXCLUDING_ATTRIBUTES]
+    output = b"".join(stream_git_output("check-attr", "-z", "--stdin", *attributes, input=stdin))
+
+    # -z output is a flat sequence of <path> NUL <attribute> NUL <value> NUL
+    tokens = output.split(b"\0")
+    excluded = set()
+    for i in range(0, len(tokens) - 2, 3):
+        path, attribute, value = tokens[i], tokens[i + 1], tokens[i + 2]
+        if value in BLAME_EXCLUDING_ATTRIBUTES.get(attribute, ()):
+            excluded.add(path.decode("utf-8"))
+
+    return excluded
+
+
 class BlameFetchError(Exception):
     """Raised when git-blame for a file can’t be fetched or parsed."""
 
@@ -102,6 +223,77 @@ def fetch_file_gitblame(repo: Repo, file_path: Path) -> List[BlameLine]:
     return blame_list
 
 
+def fetch_file_blame_authors(repo: Repo, file_path: Path) -> List[AuthorBlame]:
+    """
+    Blame `file_path` and fold the result into one AuthorBlame per author, streaming git's
+    output without ever materializing the individual lines.
+    """
+    try:
+        chunks = stream_git_output("blame", "--porcelain", "--", str(file_path))
+        return _summarize_porcelain_blame(chunks)
+    except Exception:
+        raise BlameFetchError("failed to fetch or parse blame")
+
+
+# the only commit metadata fields AuthorBlame needs
+BLAME_SUMMARY_KEYS = (b"author", b"author-time", b"summary")
+
+
+@phase("parsing")
+def _summarize_porcelain_blame(chunks: Iterable[bytes]) -> List[AuthorBlame]:
+    """
+    Fold the byte stream of `git blame --porcelain` into per-author line counts.
+
+    Each hunk starts with a header carrying its line count, followed by the commit's metadata
+    the first time that commit appears, then its first content line. The rest of the hunk is
+    a short header and content per line, so those lines are skipped unparsed, and only the
+    fields in BLAME_SUMMARY_KEYS are decoded, once per commit.
+    """
+    commits: Dict[bytes, Dict[bytes, bytes]] = {}
+    line_counts: Dict[bytes, int] = defaultdict(int)
+    metadata: Optional[Dict[bytes, bytes]] = None  # of the hunk whose header is being read
+    hunk_size = 0
+    skip = 0
+    pending = b""
+
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+
+        for line in lines:
+            if skip:
+                skip -= 1
+            elif metadata is None:
+                sha, _, _, size = line.split(b" ")
+                hunk_size = int(size)
+                line_counts[sha] += hunk_size
+                metadata = commits.setdefault(sha, {})
+            elif line.startswith(b"\t"):
+                skip = 2 * (hunk_size - 1)
+                metadata = None
+            else:
+                key, _, value = line.partition(b" ")
+                if key in BLAME_SUMMARY_KEYS:
+                    metadata[key] = value
+
+    authors: Dict[str, AuthorBlame] = {}
+    for sha, num_lines in line_counts.items():
+        meta = commits[sha]
+        blame = AuthorBlame(
+            author=meta[b"author"].decode("utf-8", errors="replace"),
+            num_lines=num_lines,
+            author_time=int(meta[b"author-time"]),
+            summary=meta[b"summary"].decode("utf-8", errors="replace"),
+        )
+
+        if blame.author in authors:
+            authors[blame.author].merge(blame)
+        else:
+            authors[blame.author] = blame
+
+    return list(authors.values())
+
+
 def _parse_porcelain_blame(blame_lines_str: List[str]) -> List[BlameLine]:
     blame_lines: List[BlameLine] = []
     current: Dict[str, Any] = {}
@@ -0,0 +1,74 @@
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Iterator, Optional
+
+from gitwit.utils.profiler import git_subcommand, record_git
+from gitwit.utils.repo_singleton import RepoSingleton
+
+CHUNK_SIZE = 64 * 1024
+
+
+class GitProcessError(Exception):
+    """Raised when a streamed git subprocess exits with a non-zero status."""
+
+
+def stream_git_output(*args: str, input: Optional[bytes] = None) -> Iterator[bytes]:
+    """
+    Run `git <args>` in the current repository and yield its stdout in raw byte chunks.
+
+    Output is never buffered as a whole, and the process is killed if the consumer
+    stops iterating early (e.g. `break` or generator close). `input` is fed to the
+    process's stdin (e.g. for `--stdin` options) while its output is being read.
+    """
+    repo = RepoSingleton.get_repo()
+    git_executable = repo.git.GIT_PYTHON_GIT_EXECUTABLE or "git"
+
+    # stderr goes to a temp file so a chatty git can never block on a full pipe
+    stderr_file = tempfile.TemporaryFile()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [git_executable, *args],
+        cwd=repo.working_dir,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=stderr_file,
+    )
+    finished = False
+    bytes_read = 0
+
+    if input is not None:
+        # write from a thread so a large input can't deadlock against a full stdout pipe
+        threading.Thread(target=_feed_stdin, args=(proc, input), daemon=True).start()
+
+    try:
+        while True:
+            chunk = proc.stdout.read1(CHUNK_SIZE)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            yield chunk
+        finished = True
+    finally:
+        if not finished:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+        stderr_file.close()
+        record_git(git_subcommand(args), 1, bytes_read, time.perf_counter() - started)
+
+    if returncode != 0:
+        message = stderr.decode("utf-8", errors="replace").strip()
+        raise GitProcessError(f"git {git_subcommand(args)} failed ({returncode}): {message}")
+
+
+def _feed_stdin(proc: subprocess.Popen, data: bytes) -> None:
+    try:
+        proc.stdin.write(data)
+        proc.stdin.close()
+    except (BrokenPipeError, OSError):
+        # the process exited (or was killed) before reading all of its input
+        pass
@@ -0,0 +1,158 @@
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Union
+
+# IDs are grouped by their high bits into chunks of 2**CHUNK_BITS, so a chunk's bitset is
+# at most 8KB however large the IDs get
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+# a chunk with more IDs than this is smaller as a bitset than as an array of 16-bit values
+ARRAY_MAX_SIZE = 4096
+
+# a chunk's low bits: a sorted array("H") of them, or a bitset
+Container = Union[array, int]
+
+
+class Interner:
+    """Assigns dense integer IDs to strings, in order of first appearance."""
+
+    __slots__ = ("_ids", "values")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        id_ = self._ids.get(value)
+        if id_ is None:
+            id_ = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return id_
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class IdBitmap:
+    """
+    Compact set of non-negative integer IDs, e.g. from an Interner.
+
+    Like a roaring bitmap, IDs are split into chunks on their high bits, and each chunk holds
+    its low bits in whichever container is smaller: a sorted array of 16-bit values, two
+    bytes per ID, while it has at most ARRAY_MAX_SIZE of them, and a bitset (here a Python
+    int, sized by its highest bit) beyond that. A set of a few scattered IDs costs a few
+    bytes each, and dense runs of IDs a bit each.
+    """
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._chunks: Dict[int, Container] = {}
+        for id_ in ids:
+            self.add(id_)
+
+    def add(self, id_: int) -> None:
+        key, low = id_ >> CHUNK_BITS, id_ & CHUNK_MASK
+        container = self._chunks.get(key)
+
+        if container is None:
+            self._chunks[key] = array("H", (low,))
+        elif isinstance(container, int):
+            self._chunks[key] = container | (1 << low)
+        else:
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return
+            if len(container) < ARRAY_MAX_SIZE:
+                container.insert(i, low)
+            else:
+                self._chunks[key] = _to_bits(container) | (1 << low)
+
+    def __contains__(self, id_: int) -> bool:
+        container = self._chunks.get(id_ >> CHUNK_BITS)
+        low = id_ & CHUNK_MASK
+
+        if container is None:
+            return False
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __len__(self) -> int:
+        return sum(
+            container.bit_count() if isinstance(container, int) else len(container)
+            for container in self._chunks.values()
+        )
+
+    def __bool__(self) -> bool:
+        # chunks are only ever created with an ID in them, and IDs are never removed
+        return bool(self._chunks)
+
+    def __ior__(self, other: "IdBitmap") -> "IdBitmap":
+        for key, container in other._chunks.items():
+            mine = self._chunks.get(key)
+            if mine is None:
+                self._chunks[key] = _copy(container)
+            elif isinstance(mine, int) or isinstance(container, int):
+                self._chunks[key] = _to_bits(mine) | _to_bits(container)
+            else:
+                merged = sorted(set(mine).union(container))
+                if len(merged) <= ARRAY_MAX_SIZE:
+                    self._chunks[key] = array("H", merged)
+                else:
+                    self._chunks[key] = _to_bits(merged)
+        return self
+
+    def __or__(self, other: "IdBitmap") -> "IdBitmap":
+        union = IdBitmap()
+        union._chunks = {key: _copy(container) for key, container in self._chunks.items()}
+        union |= other
+        return union
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._chunks):
+            container = self._chunks[key]
+            high = key << CHUNK_BITS
+            if not isinstance(container, int):
+                for low in container:
+                    yield high | low
+                continue
+
+            bits = container
+            while bits:
+                lowest = bits & -bits
+                yield high | (lowest.bit_length() - 1)
+                bits ^= lowest
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IdBitmap):
+            return NotImplemented
+        # a chunk is an array exactly while it has at most ARRAY_MAX_SIZE IDs, so equal sets
+        # have equal containers
+        return self._chunks == other._chunks
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self._chunks)
+            + sum(sys.getsizeof(container) for container in self._chunks.values())
+        )
+
+    def __repr__(self) -> str:
+        return f"IdBitmap({list(self)})"
+
+
+def _to_bits(container: Union[Container, Iterable[int]]) -> int:
+    if isinstance(container, int):
+        return container
+    bits = 0
+    for low in container:
+        bits |= 1 << low
+    return bits
+
+
+def _copy(container: Container) -> Container:
+    # arrays are grown in place, so a bitmap must never share one with another
+    return container if isinstance(container, int) else array("H", container)
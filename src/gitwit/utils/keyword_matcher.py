@@ -0,0 +1,80 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords occur in a text, case-insensitively, in a single pass.
+
+    The keywords are compiled once into one regex shaped like a trie of their characters
+    (`pass(?:word)?|key(?:s)?|...`), so at each position of the text the regex engine follows
+    only the keywords sharing the characters seen so far, rather than trying every keyword in
+    turn. A lookahead reports the longest keyword at each position without consuming it, and
+    keywords that are prefixes of it are looked up, so overlapping keywords are all found.
+
+    With `whole_words`, a keyword only matches when it isn't part of a longer word, e.g.
+    `key` matches "rotate key" but not "keyboard".
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = False):
+        self.keywords: List[str] = list(dict.fromkeys(k.lower() for k in keywords if k))
+        self.whole_words = whole_words
+
+        keyword_set = set(self.keywords)
+        # for each keyword, the shorter keywords that start it, found at the same position
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [keyword[:i] for i in range(1, len(keyword)) if keyword[:i] in keyword_set]
+            for keyword in self.keywords
+        }
+
+        pattern = _trie_pattern(self.keywords)
+        if whole_words:
+            pattern = rf"\b{pattern}\b"
+        # texts are lowercased up front instead; re.IGNORECASE is several times slower
+        self._regex = re.compile(f"(?=({pattern}))") if self.keywords else None
+
+    def find(self, text: str) -> List[str]:
+        """Return the keywords found in `text`, in the order they were given."""
+        if self._regex is None:
+            return []
+
+        text = text.lower()
+        found: Set[str] = set()
+        for match in self._regex.finditer(text):
+            keyword = match.group(1)
+            found.add(keyword)
+
+            start = match.start()
+            for prefix in self._prefixes.get(keyword, ()):
+                if not self.whole_words or _ends_word(text, start + len(prefix)):
+                    found.add(prefix)
+
+        return [k for k in self.keywords if k in found]
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict) -> str:
+    branches = [re.escape(char) + _node_pattern(child) for char, child in node.items() if char]
+    if not branches:
+        return ""
+
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    # a keyword ends here too: the rest is optional, and greedy so the longest match wins
+    if "" in node:
+        pattern = f"(?:{pattern})?"
+
+    return pattern
+
+
+def _ends_word(text: str, end: int) -> bool:
+    return end == len(text) or not (text[end].isalnum() or text[end] == "_")
@@ -0,0 +1,172 @@
+import os
+import subprocess
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from gitwit.models.git_object import ObjectInfo
+from gitwit.utils.profiler import Profiler, record_git
+from gitwit.utils.repo_singleton import RepoSingleton
+
+T = TypeVar("T")
+
+# answers to names git can't resolve, e.g. "<name> missing"
+UNRESOLVED = (b" missing", b" ambiguous")
+
+
+class ObjectReaderError(Exception):
+    """Raised when git cat-file can't be started or stops answering."""
+
+
+class ObjectReader:
+    """
+    Reads objects from the repository through long-running `git cat-file` processes.
+
+    A `--batch-check` process answers type and size lookups. It is started on first use
+    and then kept for every later lookup, so a lookup costs a pipe round trip rather than a
+    git process. Names are fed to it all at once while its answers are read back, so a
+    lookup of many objects is one pipelined exchange rather than one per object.
+
+    Lookups may come from several threads; the process answers one batch at a time.
+    """
+
+    _instances: Dict[str, "ObjectReader"] = {}
+
+    def __init__(self, working_dir: str):
+        self.working_dir = working_dir
+        self._check = _CatFile(working_dir, "--batch-check")
+
+    @classmethod
+    def for_repo(cls) -> "ObjectReader":
+        """Return the shared reader for the current repository, creating it on first use."""
+        working_dir = RepoSingleton.get_repo().working_dir
+
+        if working_dir not in cls._instances:
+            cls._instances[working_dir] = cls(working_dir)
+
+        return cls._instances[working_dir]
+
+    # ================================================================================
+    # Public API
+    # ================================================================================
+
+    def info(self, names: Sequence[str]) -> List[Optional[ObjectInfo]]:
+        """
+        Return the type and size of each of `names` (anything git names an object by, e.g.
+        a SHA, `HEAD:path` or `:path` for the index), or None for those that don't exist.
+        """
+        return self._check.query(names, _read_header)
+
+    def close(self) -> None:
+        self._check.close()
+        self._instances.pop(self.working_dir, None)
+
+
+class _CatFile:
+    """A `git cat-file` process in one of its batch modes, answering one batch at a time."""
+
+    def __init__(self, working_dir: str, mode: str):
+        self.working_dir = working_dir
+        self.mode = mode
+        self._proc: Optional[subprocess.Popen] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def query(self, names: Sequence[str], read_answer: Callable[[BinaryIO], T]) -> List[T]:
+        # the protocol is one name per line, so a name containing one can't be asked for
+        if any("\n" in name for name in names):
+            raise ValueError("object names can't contain newlines")
+        if not names:
+            return []
+
+        requests = "".join(f"{name}\n" for name in names).encode("utf-8")
+
+        with self._lock:
+            proc = self._start()
+            started = time.perf_counter()
+            stdout = proc.stdout if Profiler.active() is None else _CountingReader(proc.stdout)
+            # written from a thread, so a batch whose answers outgrow the pipe can't deadlock
+            writer = threading.Thread(target=_write_requests, args=(proc, requests), daemon=True)
+            writer.start()
+            try:
+                answers = [read_answer(stdout) for _ in names]
+            except (OSError, ValueError) as e:
+                self._stop()
+                raise ObjectReaderError(f"git cat-file {self.mode} stopped answering: {e}") from e
+            finally:
+                writer.join()
+                if isinstance(stdout, _CountingReader):
+                    record_git("cat-file", 0, stdout.bytes_read, time.perf_counter() - started)
+
+        return answers
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _start(self) -> subprocess.Popen:
+        # a forked child (e.g. a process pool worker) must not share its parent's pipes
+        if self._proc is not None and self._proc.poll() is None and self._pid == os.getpid():
+            return self._proc
+
+        git_executable = RepoSingleton.get_repo().git.GIT_PYTHON_GIT_EXECUTABLE or "git"
+        try:
+            self._proc = subprocess.Popen(
+                [git_executable, "cat-file", self.mode],
+                cwd=self.working_dir,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise ObjectReaderError(f"failed to start git cat-file {self.mode}: {e}") from e
+
+        self._pid = os.getpid()
+        record_git("cat-file", processes=1)
+        return self._proc
+
+    def _stop(self) -> None:
+        if self._proc is not None and self._pid == os.getpid():
+            self._proc.kill()
+            self._proc.wait()
+        self._proc = None
+
+
+class _CountingReader:
+    """Counts the bytes read from a cat-file process's stdout, while profiling."""
+
+    def __init__(self, stdout: BinaryIO):
+        self.stdout = stdout
+        self.bytes_read = 0
+
+    def readline(self) -> bytes:
+        line = self.stdout.readline()
+        self.bytes_read += len(line)
+        return line
+
+    def read(self, size: int) -> bytes:
+        data = self.stdout.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def _write_requests(proc: subprocess.Popen, requests: bytes) -> None:
+    try:
+        proc.stdin.write(requests)
+        proc.stdin.flush()
+    except (BrokenPipeError, OSError):
+        # the process died; the reader sees its output end and reports it
+        pass
+
+
+def _read_header(stdout: BinaryIO) -> Optional[ObjectInfo]:
+    line = stdout.readline()
+    if not line.endswith(b"\n"):
+        raise ValueError("unexpected end of output")
+
+    line = line[:-1]
+    if line.endswith(UNRESOLVED):
+        return None
+
+    oid, object_type, size = line.split(b" ")
+    return ObjectInfo(oid.decode("ascii"), object_type.decode("ascii"), int(size))
@@ -0,0 +1,142 @@
+import csv
+import json
+import sys
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO
+
+import typer
+from rich.console import Console
+
+from gitwit.utils.console_singleton import ConsoleSingleton
+from gitwit.utils.profiler import phase
+
+
+class OutputFormat(str, Enum):
+    table = "table"
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def format_option() -> Any:
+    """The `--format` option of every command whose results are rows of a dataclass."""
+    return typer.Option(
+        OutputFormat.table,
+        "--format",
+        case_sensitive=False,
+        callback=_send_console_to_stderr,
+        help="Print the results as a table, or as JSON, NDJSON (one object per line) or CSV",
+    )
+
+
+def _send_console_to_stderr(ctx: typer.Context, output_format: OutputFormat) -> OutputFormat:
+    # with a machine-readable format stdout carries only the results, so progress bars,
+    # warnings and messages go to stderr until the command finishes
+    if output_format is not OutputFormat.table and not ctx.resilient_parsing:
+        ctx.with_resource(ConsoleSingleton.redirected(Console(stderr=True)))
+    # typer converts what a callback returns to an OutputFormat once more, from its value
+    return output_format.value
+
+
+@phase("record writing")
+def write_records(
+    rows: Iterable[Any], output_format: OutputFormat, file: Optional[TextIO] = None
+) -> int:
+    """
+    Write each of `rows` (dataclasses) to `file`, stdout by default, in `output_format`, and
+    return how many were written. Rows are written and flushed one at a time as `rows`
+    yields them, so a consumer of NDJSON can start on the first before the last exists.
+    """
+    writer = _WRITERS[output_format]
+    return writer(rows, file or sys.stdout)
+
+
+def to_record(value: Any) -> Any:
+    """
+    Convert `value` to something json can encode: dataclasses become dicts of their fields,
+    dates ISO 8601 strings and durations seconds, recursively.
+    """
+    if is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_record(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Path):
+        return value.as_posix()
+    if isinstance(value, dict):
+        return {str(k): to_record(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_record(v) for v in value]
+    return value
+
+
+def to_csv_row(value: Any, prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten a dataclass into one CSV row: nested dataclasses become `parent.field` columns,
+    and lists and dicts (e.g. an author -> count mapping) a JSON encoded cell, so every row
+    of a type has the same columns.
+    """
+    row: Dict[str, Any] = {}
+
+    for f in fields(value):
+        name, field_value = f"{prefix}{f.name}", getattr(value, f.name)
+        if is_dataclass(field_value) and not isinstance(field_value, type):
+            row.update(to_csv_row(field_value, f"{name}."))
+            continue
+
+        record = to_record(field_value)
+        if isinstance(record, (dict, list)):
+            record = json.dumps(record, ensure_ascii=False)
+        row[name] = record
+
+    return row
+
+
+def _write_json(rows: Iterable[Any], file: TextIO) -> int:
+    # a single array, one row per line, so it is still written as the rows arrive
+    count = 0
+    file.write("[")
+    for row in rows:
+        file.write(("," if count else "") + "\n  " + json.dumps(to_record(row), ensure_ascii=False))
+        file.flush()
+        count += 1
+    file.write("\n]\n" if count else "]\n")
+    file.flush()
+    return count
+
+
+def _write_ndjson(rows: Iterable[Any], file: TextIO) -> int:
+    count = 0
+    for row in rows:
+        file.write(json.dumps(to_record(row), ensure_ascii=False) + "\n")
+        file.flush()
+        count += 1
+    return count
+
+
+def _write_csv(rows: Iterable[Any], file: TextIO) -> int:
+    # the columns are those of the first row, so no rows is no output at all, not even a header
+    writer = None
+    count = 0
+    for row in rows:
+        values = to_csv_row(row)
+        if writer is None:
+            writer = csv.DictWriter(file, fieldnames=list(values), lineterminator="\n")
+            writer.writeheader()
+        writer.writerow(values)
+        file.flush()
+        count += 1
+    return count
+
+
+_WRITERS: Dict[OutputFormat, Callable[[Iterable[Any], TextIO], int]] = {
+    OutputFormat.json: _write_json,
+    OutputFormat.ndjson: _write_ndjson,
+    OutputFormat.csv: _write_csv,
+}
@@ -0,0 +1,166 @@
+import fnmatch
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+GLOB_CHARACTERS = "*?["
+
+
+class _Node:
+    __slots__ = ("children", "globs", "any_depth", "loops", "terminal")
+
+    def __init__(self, loops: bool = False):
+        self.children: Dict[str, _Node] = {}
+        self.globs: List[Tuple[str, Callable, _Node]] = []
+        self.any_depth: Optional[_Node] = None
+        # a `**` node consumes any number of directories before moving on
+        self.loops = loops
+        self.terminal = False
+
+
+class PathMatcher:
+    """
+    Compiled set of directory patterns, matching the paths under any of them.
+
+    Patterns are anchored at the repository root, like gitignore patterns containing a
+    slash: `src/api` matches `src/api/views.py` but not `src/apiary/x.py` or `lib/src/api/x`.
+    A component may hold the gitignore globs `*`, `?` and `[...]`, and `**` stands for any
+    number of directories, so `services/*/tests` and `**/migrations` both work. As in
+    gitignore, a backslash escapes the character after it, so `lib/\\[x]` names the
+    directory `lib/[x]` itself.
+
+    Patterns are built into a trie of their components once, and a path is matched by
+    walking its directories through it. Literal components are a dict lookup, so matching
+    is linear in the length of the path however many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self._root = _Node()
+        self._prefixes: Optional[List[str]] = []
+        self._has_patterns = False
+
+        for pattern in patterns:
+            self._add(pattern)
+
+    def __bool__(self) -> bool:
+        return self._has_patterns
+
+    def matches(self, path: str) -> bool:
+        """Return whether `path` lies under a directory one of the patterns names."""
+        states = _closure([self._root])
+        if any(node.terminal for node in states):
+            # a leading `**`, which matches every directory including the root
+            return True
+
+        for part in path.split("/")[:-1]:
+            next_states = []
+            for node in states:
+                if node.loops:
+                    next_states.append(node)
+
+                child = node.children.get(part)
+                if child is not None:
+                    next_states.append(child)
+
+                next_states += [n for _, match, n in node.globs if match(part)]
+
+            states = _closure(next_states)
+            if not states:
+                return False
+            if any(node.terminal for node in states):
+                return True
+
+        return False
+
+    def literal_prefixes(self) -> Optional[List[str]]:
+        """
+        Return the literal directory each pattern starts with, e.g. `services/` for
+        `services/*/tests`, as `/`-terminated prefixes every match starts with. Returns None
+        when a pattern starts with a glob, so there is no prefix to narrow a search by.
+        """
+        return None if self._prefixes is None else list(self._prefixes)
+
+    # ================================================================================
+    # Helpers
+    # ================================================================================
+
+    def _add(self, pattern: str) -> None:
+        parts = [p for p in pattern.strip("/").split("/") if p not in ("", ".")]
+        if not parts:
+            # "" or "/" has never matched anything, as no repository path starts with "/"
+            return
+
+        components = [_parse_component(part) for part in parts]
+
+        node = self._root
+        for part, is_glob in components:
+            if is_glob and part == "**":
+                if node.any_depth is None:
+                    node.any_depth = _Node(loops=True)
+                node = node.any_depth
+            elif is_glob:
+                node = _glob_child(node, part)
+            else:
+                node = node.children.setdefault(part, _Node())
+
+        node.terminal = True
+        self._has_patterns = True
+
+        literal = []
+        for part, is_glob in components:
+            if is_glob:
+                break
+            literal.append(part)
+
+        if not literal:
+            self._prefixes = None
+        elif self._prefixes is not None:
+            self._prefixes.append("/".join(literal) + "/")
+
+
+def _parse_component(part: str) -> Tuple[str, bool]:
+    """
+    Return a pattern's directory name with its escapes removed and False if it holds no
+    unescaped glob, or else the fnmatch pattern it stands for and True.
+    """
+    name: List[str] = []
+    glob: List[str] = []
+    is_glob = False
+
+    chars = iter(part)
+    for char in chars:
+        if char == "\\":
+            # fnmatch has no escapes, but a glob character alone in a class is literal
+            char = next(chars, "\\")
+            name.append(char)
+            glob.append(f"[{char}]" if char in GLOB_CHARACTERS else char)
+            continue
+
+        is_glob = is_glob or char in GLOB_CHARACTERS
+        name.append(char)
+        glob.append(char)
+
+    return ("".join(glob), True) if is_glob else ("".join(name), False)
+
+
+def _glob_child(node: _Node, glob: str) -> _Node:
+    for existing, _, child in node.globs:
+        if existing == glob:
+            return child
+
+    child = _Node()
+    node.globs.append((glob, re.compile(fnmatch.translate(glob)).match, child))
+    return child
+
+
+def _closure(nodes: Iterable[_Node]) -> List[_Node]:
+    """Add the `**` nodes reachable without consuming a directory, as `**` can match none."""
+    closure: List[_Node] = []
+    seen: Set[int] = set()
+
+    for node in nodes:
+        while node is not None and id(node) not in seen:
+            seen.add(id(node))
+            closure.append(node)
+            node = node.any_depth
+
+    return closure
@@ -0,0 +1,375 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+T = TypeVar("T")
+
+# Set (e.g. to 1) to profile every command, like passing --profile.
+PROFILE_ENV = "GITWIT_PROFILE"
+# git options that take their value as the next argument, before the subcommand
+GIT_OPTIONS_WITH_VALUES = ("-c", "-C", "--git-dir", "--work-tree", "--namespace")
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+
+
+@dataclass
+class GitStats:
+    command: str
+    processes: int = 0
+    bytes_read: int = 0
+    wall_s: float = 0.0
+
+
+class Profiler:
+    """
+    Records where a command's time goes while `--profile` is on: wall and CPU time per named
+    phase, and every git process started along with how much output was read from it.
+
+    Phases are inclusive and may nest, e.g. "parsing" runs within "get_filtered_commits",
+    so their times overlap rather than add up. A phase's CPU time is that of the thread it
+    ran on, so time spent waiting on git shows up as wall time only, and phases run on
+    several threads at once add up to more than the command's wall time.
+
+    Git processes are counted when started through stream_git_output, ObjectReader or
+    GitPython, from any thread; those started by worker processes (`wte --processes`,
+    `rc --scan-diffs`) aren't seen. When no profiler is running, all the hooks cost next
+    to nothing.
+    """
+
+    _active: Optional["Profiler"] = None
+
+    def __init__(self, command: Optional[str] = None, argv: Sequence[str] = ()):
+        self.command = command
+        self.argv = list(argv)
+        self.phases: Dict[str, PhaseStats] = {}
+        self.git: Dict[str, GitStats] = {}
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.git_cpu_s: Optional[float] = None
+        self._lock = threading.Lock()
+        self._restore_gitpython: Optional[Callable[[], None]] = None
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_children_cpu = _children_cpu()
+
+    @classmethod
+    def start(cls, command: Optional[str] = None, argv: Sequence[str] = ()) -> "Profiler":
+        """Start recording into a new profiler, replacing any running one."""
+        profiler = cls(command, argv)
+        profiler._restore_gitpython = _count_gitpython_processes(profiler)
+        cls._active = profiler
+        return profiler
+
+    @classmethod
+    def active(cls) -> Optional["Profiler"]:
+        return cls._active
+
+    def stop(self) -> None:
+        """Stop recording, and take the command's total wall and CPU times."""
+        if Profiler._active is self:
+            Profiler._active = None
+        if self._restore_gitpython is not None:
+            self._restore_gitpython()
+            self._restore_gitpython = None
+
+        self.wall_s = time.perf_counter() - self._start_wall
+        self.cpu_s = time.process_time() - self._start_cpu
+        children_cpu = _children_cpu()
+        if children_cpu is not None:
+            # only children that have exited and been waited for, i.e. (nearly) all git
+            self.git_cpu_s = children_cpu - self._start_children_cpu
+
+    # ================================================================================
+    # Recording
+    # ================================================================================
+
+    def open_phase(self, name: str) -> None:
+        """List `name` from when it starts, so phases are reported in the order they ran."""
+        self.add_phase(name, 0.0, 0.0, calls=0)
+
+    def add_phase(self, name: str, wall_s: float, cpu_s: float, calls: int = 1) -> None:
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats(name)
+            stats.calls += calls
+            stats.wall_s += wall_s
+            stats.cpu_s += cpu_s
+
+    def add_git(
+        self, command: str, processes: int = 0, bytes_read: int = 0, wall_s: float = 0.0
+    ) -> None:
+        with self._lock:
+            stats = self.git.get(command)
+            if stats is None:
+                stats = self.git[command] = GitStats(command)
+            stats.processes += processes
+            stats.bytes_read += bytes_read
+            stats.wall_s += wall_s
+
+    # ================================================================================
+    # Reporting
+    # ================================================================================
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "command": self.command,
+            "argv": self.argv,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "git_cpu_s": None if self.git_cpu_s is None else round(self.git_cpu_s, 6),
+            "phases": [_rounded(asdict(stats)) for stats in self.phases.values()],
+            "git": {
+                "processes": sum(stats.processes for stats in self.git.values()),
+                "bytes_read": sum(stats.bytes_read for stats in self.git.values()),
+                "commands": [_rounded(asdict(stats)) for stats in self.git.values()],
+            },
+        }
+
+    def write_json(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+
+    def summary(self) -> List[Any]:
+        """Return rich tables of the phases and git processes recorded, and the totals."""
+        from rich.table import Table
+
+        title = "Profile" + (f" of gitwit {self.command}" if self.command else "")
+        phases = Table(title=title)
+        phases.add_column("Phase", style="cyan")
+        phases.add_column("Calls", justify="right")
+        phases.add_column("Wall s", justify="right", style="green")
+        phases.add_column("CPU s", justify="right", style="magenta")
+        for stats in self.phases.values():
+            phases.add_row(
+                stats.name, str(stats.calls), f"{stats.wall_s:.3f}", f"{stats.cpu_s:.3f}"
+            )
+
+        git = Table(title="Git processes")
+        git.add_column("Command", style="cyan")
+        git.add_column("Processes", justify="right")
+        git.add_column("Bytes read", justify="right", style="yellow")
+        git.add_column("Wall s", justify="right", style="green")
+        for stats in self.git.values():
+            git.add_row(
+                stats.command, str(stats.processes), f"{stats.bytes_read:,}", f"{stats.wall_s:.3f}"
+            )
+        totals = self.to_dict()["git"]
+        git.add_row(
+            "total", str(totals["processes"]), f"{totals['bytes_read']:,}", "", style="bold"
+        )
+
+        git_cpu = "" if self.git_cpu_s is None else f", {self.git_cpu_s:.3f}s CPU in git"
+        total = f"Total: {self.wall_s:.3f}s wall, {self.cpu_s:.3f}s CPU in gitwit{git_cpu}"
+        return [phases, git, total]
+
+
+def start_profiling(
+    command: Optional[str],
+    argv: Sequence[str],
+    show_summary: bool = True,
+    output: Optional[Path] = None,
+    cprofile_output: Optional[Path] = None,
+) -> Callable[[], None]:
+    """
+    Start profiling a command, and return the function to call once it has finished, which
+    prints the summary to stderr, writes the JSON trace to `output` and, when asked for,
+    dumps the command's cProfile stats to `cprofile_output` (e.g. for `python -m pstats`).
+    """
+    profiler = Profiler.start(command, argv)
+    stats = None
+    if cprofile_output is not None:
+        import cProfile
+
+        stats = cProfile.Profile()
+        stats.enable()
+
+    def finish() -> None:
+        if stats is not None:
+            stats.disable()
+            stats.dump_stats(cprofile_output)
+        profiler.stop()
+
+        if output is not None:
+            profiler.write_json(output)
+        if show_summary:
+            from rich.console import Console
+
+            Console(stderr=True).print(*profiler.summary())
+
+    return finish
+
+
+# ================================================================================
+# Hooks
+# ================================================================================
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Record the wall and CPU time of the block (or, as a decorator, the function) as `name`.
+    """
+    profiler = Profiler._active
+    if profiler is None:
+        yield
+        return
+
+    profiler.open_phase(name)
+    start_wall, start_cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        profiler.add_phase(name, time.perf_counter() - start_wall, time.thread_time() - start_cpu)
+
+
+def profiled(name: str, iterable: Iterable[T]) -> Iterable[T]:
+    """
+    Record the time spent producing each item of `iterable` as `name`, e.g. that of a
+    generator which streams and parses git's output, but not the time its consumer spends
+    on them. Returns `iterable` itself when no profiler is running.
+    """
+    profiler = Profiler._active
+    if profiler is None:
+        return iterable
+
+    profiler.open_phase(name)
+    return _profiled(profiler, name, iterable)
+
+
+def _profiled(profiler: Profiler, name: str, iterable: Iterable[T]) -> Iterator[T]:
+    iterator = iter(iterable)
+    wall = cpu = 0.0
+
+    try:
+        while True:
+            start_wall, start_cpu = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                wall += time.perf_counter() - start_wall
+                cpu += time.thread_time() - start_cpu
+            yield item
+    finally:
+        # stopping early must still stop the source, e.g. kill its git process
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        profiler.add_phase(name, wall, cpu)
+
+
+def timed(name: str, function: Callable[..., T]) -> Callable[..., T]:
+    """
+    Return `function` recording every call's time as `name`, for functions called too often
+    to wrap each call in a phase, or `function` itself when no profiler is running.
+    """
+    profiler = Profiler._active
+    if profiler is None:
+        return function
+
+    profiler.open_phase(name)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profiler.add_phase(
+                name, time.perf_counter() - start_wall, time.thread_time() - start_cpu
+            )
+
+    return wrapper
+
+
+def record_git(command: str, processes: int = 0, bytes_read: int = 0, wall_s: float = 0.0) -> None:
+    """Count git processes started for `command` (e.g. "log") and output read from them."""
+    profiler = Profiler._active
+    if profiler is not None:
+        profiler.add_git(command, processes, bytes_read, wall_s)
+
+
+def git_subcommand(args: Sequence[str]) -> str:
+    """Return the subcommand of git arguments, e.g. "log" for ["-c", "x=y", "log", "-z"]."""
+    args = iter(args)
+    for arg in args:
+        if arg in GIT_OPTIONS_WITH_VALUES:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return "git"
+
+
+def _count_gitpython_processes(profiler: Profiler) -> Optional[Callable[[], None]]:
+    """
+    Count the git processes GitPython runs (`repo.git.<command>(...)`) into `profiler`, and
+    return the function that stops counting them.
+    """
+    try:
+        from git.cmd import Git
+    except ImportError:
+        return None
+
+    execute = Git.execute
+
+    @functools.wraps(execute)
+    def counted_execute(self, command, *args, **kwargs):
+        start = time.perf_counter()
+        output = None
+        try:
+            output = execute(self, command, *args, **kwargs)
+            return output
+        finally:
+            argv = [command] if isinstance(command, str) else list(command)[1:]
+            profiler.add_git(
+                git_subcommand(argv), 1, _output_size(output), time.perf_counter() - start
+            )
+
+    Git.execute = counted_execute
+
+    def restore() -> None:
+        Git.execute = execute
+
+    return restore
+
+
+def _output_size(output: Any) -> int:
+    # with_extended_output returns (status, stdout, stderr)
+    if isinstance(output, tuple) and len(output) == 3:
+        output = output[1]
+    if isinstance(output, str):
+        return len(output.encode("utf-8", errors="replace"))
+    if isinstance(output, bytes):
+        return len(output)
+    # e.g. a process handed back by as_process, whose output the caller reads itself
+    return 0
+
+
+def _children_cpu() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _rounded(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: round(value, 6) if isinstance(value, float) else value for key, value in stats.items()
+    }
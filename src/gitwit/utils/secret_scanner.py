@@ -0,0 +1,148 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from gitwit.models.secret_match import SecretMatch
+from gitwit.utils.commit_history import RECORD_START
+from gitwit.utils.git_process import stream_git_output
+from gitwit.utils.profiler import profiled
+
+PATCH_LOG_FORMAT = "%x1e%H"
+
+# Files adding more than this much are generated, vendored or data rather than code someone
+# typed a secret into; the rest of their diff is skipped
+DEFAULT_MAX_FILE_DIFF_BYTES = 1024 * 1024
+
+# rule -> description, with each rule's pattern below
+SECRET_RULES: Dict[str, str] = {
+    "aws_access_key": "AWS access key ID",
+    "private_key": "Private key",
+    "github_token": "GitHub token",
+    "slack_token": "Slack token",
+    "google_api_key": "Google API key",
+    "stripe_key": "Stripe live key",
+    "credential_assignment": "Hard-coded credential",
+}
+
+SECRET_PATTERNS: Dict[str, bytes] = {
+    "aws_access_key": rb"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "private_key": rb"-----BEGIN (?:[A-Z0-9]+ )?PRIVATE KEY-----",
+    "github_token": rb"\bgh[pousr]_[A-Za-z0-9]{36,}\b",
+    "slack_token": rb"\bxox[abposr]-[A-Za-z0-9-]{10,}",
+    "google_api_key": rb"\bAIza[0-9A-Za-z_\-]{35}",
+    "stripe_key": rb"\b[rs]k_live_[0-9A-Za-z]{16,}",
+    "credential_assignment": (
+        rb"(?i:\b(?:password|passwd|secret|api[_-]?key|access[_-]?token|auth[_-]?token)\b)"
+        rb"[\"']?\s*[:=]\s*[\"'][^\"'\s]{8,}[\"']"
+    ),
+}
+
+# all rules in one alternation of named groups, so each added line is scanned once
+SECRET_REGEX = re.compile(
+    b"|".join(b"(?P<%s>%s)" % (rule.encode(), p) for rule, p in SECRET_PATTERNS.items())
+)
+
+HUNK_HEADER = re.compile(rb"@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+def iter_secret_matches(
+    commit_hashes: Sequence[str], max_file_diff_bytes: int = DEFAULT_MAX_FILE_DIFF_BYTES
+) -> Iterator[SecretMatch]:
+    """
+    Stream the patches of `commit_hashes` and yield each secret found in their added lines.
+
+    Only `+` lines are matched, with no context lines, and binary files never produce any.
+    Each (commit, path, rule) is reported once.
+    """
+    chunks = stream_git_output(
+        "log",
+        "--patch",
+        "--unified=0",
+        "--no-color",
+        "--no-ext-diff",
+        # pinned, so a user's diff.noprefix or diff.mnemonicPrefix can't change what
+        # _decode_patch_path strips
+        "--src-prefix=a/",
+        "--dst-prefix=b/",
+        "--no-walk=unsorted",
+        f"--format={PATCH_LOG_FORMAT}",
+        "--stdin",
+        input="".join(f"{sha}\n" for sha in commit_hashes).encode(),
+    )
+    yield from profiled("parsing", parse_patch_log(chunks, max_file_diff_bytes))
+
+
+def scan_commits_for_secrets(
+    commit_hashes: Sequence[str], max_file_diff_bytes: int = DEFAULT_MAX_FILE_DIFF_BYTES
+) -> List[SecretMatch]:
+    """iter_secret_matches as a list, so it can be run in a worker process."""
+    return list(iter_secret_matches(commit_hashes, max_file_diff_bytes))
+
+
+def parse_patch_log(
+    chunks: Iterable[bytes], max_file_diff_bytes: Optional[int] = DEFAULT_MAX_FILE_DIFF_BYTES
+) -> Iterator[SecretMatch]:
+    """
+    Parse the byte stream of `git log --patch --unified=0 --format=PATCH_LOG_FORMAT`.
+
+    Hunk headers give the number of lines in each hunk, so a removed line starting `--` or
+    an added line starting `++` is never mistaken for the next file's header.
+    """
+    commit_hash = ""
+    path = ""
+    path_bytes = 0
+    old_lines = new_lines = 0
+    found = set()
+
+    for line in _iter_lines(chunks):
+        if old_lines or new_lines:
+            if line.startswith(b"+"):
+                new_lines -= 1
+                if max_file_diff_bytes and path_bytes > max_file_diff_bytes:
+                    continue
+                path_bytes += len(line)
+
+                for match in SECRET_REGEX.finditer(line, 1):
+                    key = (commit_hash, path, match.lastgroup)
+                    if key not in found:
+                        found.add(key)
+                        yield SecretMatch(*key)
+            elif line.startswith(b"-"):
+                old_lines -= 1
+            # anything else is a "\ No newline at end of file" marker
+            continue
+
+        if line.startswith(RECORD_START):
+            commit_hash = line[1:].decode("ascii")
+            found.clear()
+        elif line.startswith(b"+++ "):
+            path = _decode_patch_path(line[4:])
+            path_bytes = 0
+        elif line.startswith(b"@@ "):
+            header = HUNK_HEADER.match(line)
+            if header:
+                old_count, new_count = header.groups()
+                old_lines = 1 if old_count is None else int(old_count)
+                new_lines = 1 if new_count is None else int(new_count)
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    pending = b""
+
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+
+    if pending:
+        yield pending
+
+
+def _decode_patch_path(raw: bytes) -> str:
+    # like diff, git ends the header with a tab when the path has a space in it
+    raw = raw.removesuffix(b"\t")
+    # git quotes paths with unusual characters, C-style
+    if raw.startswith(b'"') and raw.endswith(b'"'):
+        raw = raw[1:-1].decode("unicode_escape").encode("latin-1")
+    if raw.startswith(b"b/"):
+        raw = raw[2:]
+    return raw.decode("utf-8", errors="replace")
@@ -0,0 +1,228 @@
+import sqlite3
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Type, TypeVar
+
+from git import GitCommandError
+
+from gitwit.utils.git_process import GitProcessError
+from gitwit.utils.profiler import phase
+from gitwit.utils.repo_singleton import RepoSingleton
+
+STORAGE_DIR_NAME = "gitwit"
+
+# Keeps "IN (...)" lookups well under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+INDEXED_HEAD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_head (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    sha TEXT NOT NULL
+);
+"""
+
+IndexType = TypeVar("IndexType", bound="HeadTrackedIndex")
+
+
+def get_storage_dir() -> Path:
+    """
+    Return (creating it if needed) the directory gitwit keeps its per-repository data in.
+
+    It lives inside the repository's (common) git dir, so it is never tracked and is
+    shared by all worktrees of the repository.
+    """
+    repo = RepoSingleton.get_repo()
+    storage_dir = Path(repo.common_dir) / STORAGE_DIR_NAME
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    return storage_dir
+
+
+def open_database(path: Path, schema: str, schema_version: int) -> sqlite3.Connection:
+    """
+    Open (creating if needed) one of gitwit's SQLite stores and apply `schema` to it.
+
+    Everything gitwit stores can be rebuilt from git, so a database stamped with any other
+    `schema_version` is simply thrown away and recreated.
+    """
+    conn = _connect(path)
+    version = _read_schema_version(conn)
+
+    if version is not None and version != schema_version:
+        conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        conn = _connect(path)
+
+    with conn:
+        conn.executescript(META_SCHEMA + schema)
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+            (str(schema_version),),
+        )
+    return conn
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    # several gitwit processes may share a store, so wait on locks instead of failing
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def _read_schema_version(conn: sqlite3.Connection) -> Optional[int]:
+    """Return the stored schema version, or None for a brand new database."""
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return int(row[0]) if row else 0
+
+
+def batched(values: Iterable, size: int = BATCH_SIZE) -> Iterator[list]:
+    """Split `values` into lists of at most `size`, e.g. to bound the parameters of a query."""
+    iterator = iter(values)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def placeholders(values: Sequence) -> str:
+    """Return the "?, ?, ..." parameter list for an "IN (...)" clause over `values`."""
+    return ", ".join("?" * len(values))
+
+
+def read_head_sha() -> Optional[str]:
+    """Return the SHA HEAD points at, or None in a repository without commits."""
+    repo = RepoSingleton.get_repo()
+
+    # resolved from the ref files by GitPython, so an unchanged repo costs no subprocess
+    if not repo.head.is_valid():
+        return None
+    return repo.head.commit.hexsha
+
+
+def is_ancestor(old: str, new: str) -> bool:
+    """Return whether `old` is in `new`'s history, i.e. an index of `old` can be extended."""
+    try:
+        RepoSingleton.get_repo().git.merge_base("--is-ancestor", old, new)
+    except GitCommandError:
+        # not an ancestor, or `old` was pruned by git gc
+        return False
+    return True
+
+
+class HeadTrackedIndex:
+    """
+    Base of the SQLite stores under the repository's git dir that mirror HEAD's history.
+
+    `refresh` records the HEAD it indexed, so each run only reads `<new HEAD> ^<indexed HEAD>`
+    when HEAD moved forward, and starts over when HEAD moved to history that doesn't contain
+    the indexed one. Subclasses provide:
+
+    - NAME, e.g. "file creation index", used in errors and the refresh's profiler phase
+    - ERROR, the exception failures to open or refresh the index are raised as
+    - SCHEMA (without the indexed_head table), SCHEMA_VERSION and INDEX_FILE_NAME
+    - `_clear()`, emptying their tables before a rebuild
+    - `_read_entries(*rev_args)`, reading the history `rev_args` selects from git
+    - `_add_entries(entries)`, recording it and returning the count `refresh` reports
+    """
+
+    NAME: str
+    ERROR: Type[Exception]
+    SCHEMA: str
+    SCHEMA_VERSION: int
+    INDEX_FILE_NAME: str
+
+    _instances: Dict[Path, "HeadTrackedIndex"] = {}
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            self._conn = open_database(path, self.SCHEMA + INDEXED_HEAD_SCHEMA, self.SCHEMA_VERSION)
+        except (sqlite3.Error, OSError) as e:
+            raise self.ERROR(f"failed to open {self.NAME} at {path}: {e}") from e
+
+    @classmethod
+    def for_repo(cls: Type[IndexType]) -> IndexType:
+        """Return the shared index for the current repository, opening it on first use."""
+        try:
+            path = get_storage_dir() / cls.INDEX_FILE_NAME
+        except OSError as e:
+            raise cls.ERROR(f"failed to create index directory: {e}") from e
+
+        if path not in cls._instances:
+            cls._instances[path] = cls(path)
+
+        return cls._instances[path]  # type: ignore[return-value]
+
+    def refresh(self) -> int:
+        """
+        Bring the index in line with HEAD, returning what `_add_entries` counted. Costs a
+        single ref lookup when HEAD hasn't moved.
+        """
+        with phase(f"{self.NAME} refresh"):
+            new_head = read_head_sha()
+
+            try:
+                if self._indexed_head() == new_head:
+                    return 0
+
+                # serialise concurrent refreshes; the loser re-reads HEAD and finds no work
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    old_head = self._indexed_head()
+                    added = 0
+
+                    if old_head != new_head:
+                        added = self._update(old_head, new_head)
+
+                    self._conn.commit()
+                    return added
+                except BaseException:
+                    self._conn.rollback()
+                    raise
+            except (sqlite3.Error, GitCommandError, GitProcessError) as e:
+                raise self.ERROR(f"failed to refresh {self.NAME}: {e}") from e
+
+    def close(self) -> None:
+        self._conn.close()
+        self._instances.pop(self.path, None)
+
+    def _indexed_head(self) -> Optional[str]:
+        row = self._conn.execute("SELECT sha FROM indexed_head").fetchone()
+        return row[0] if row else None
+
+    def _update(self, old_head: Optional[str], new_head: Optional[str]) -> int:
+        if old_head is not None and new_head is not None and is_ancestor(old_head, new_head):
+            rev_args = [new_head, f"^{old_head}"]
+        else:
+            # rewritten history, a branch switch or an empty repository: start over
+            self._clear()
+            rev_args = [new_head] if new_head else []
+
+        added = 0
+        if rev_args:
+            added = self._add_entries(self._read_entries(*rev_args))
+
+        self._conn.execute("DELETE FROM indexed_head")
+        if new_head is not None:
+            self._conn.execute("INSERT INTO indexed_head (id, sha) VALUES (0, ?)", (new_head,))
+
+        return added
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def _read_entries(self, *rev_args: str) -> Iterable[Any]:
+        raise NotImplementedError
+
+    def _add_entries(self, entries: Iterable[Any]) -> int:
+        raise NotImplementedError
@@ -1,8 +1,21 @@
+import json
 import pytest
 from datetime import datetime
 
 import gitwit.commands.latest_examples_of as latest
 import gitwit.utils.repo_singleton as repo_singleton
+from gitwit.models.git_log_entry import GitLogEntry
+from gitwit.utils.file_creation_index import FileCreationIndexError
+from gitwit.utils.output import OutputFormat
+
+
+def entry(commit_hash, created_at_iso, author, *files):
+    authored_date = int(datetime.fromisoformat(created_at_iso).timestamp())
+    return GitLogEntry(commit_hash, authored_date, author, list(files))
+
+
+def unavailable_index(cls):
+    raise FileCreationIndexError("read-only repository")
 
 
 @pytest.fixture
@@ -21,9 +34,6 @@ def patch_repo_ls(monkeypatch):
             def ls_files(self):
                 return "\n".join(self._files)
 
-            def log(self, *args, **kwargs):
-                return ""  # no log
-
         dummy = DummyRepo(files)
         monkeypatch.setattr(
             repo_singleton.RepoSingleton, "get_repo", classmethod(lambda cls: dummy)
@@ -34,53 +44,25 @@ def patch_repo_ls(monkeypatch):
 
 @pytest.fixture
 def patch_repo_log(monkeypatch):
-    """Patch RepoSingleton.get_repo so git.log returns our raw log only."""
-
-    def _patch(raw_log):
-        repo_singleton.RepoSingleton._repo = None
+    """
+    Patch the added-files log stream so it yields our entries only, and make leo read it
+    rather than the file creation index.
+    """
 
-        class DummyRepoLog:
-            def __init__(self, raw):
-                self.git = self
-                self._raw = raw
-
-            def log(self, *args, **kwargs):
-                return self._raw
-
-            def ls_files(self):
-                return ""  # no files
-
-        dummy = DummyRepoLog(raw_log)
-        monkeypatch.setattr(
-            repo_singleton.RepoSingleton, "get_repo", classmethod(lambda cls: dummy)
-        )
+    def _patch(log):
+        monkeypatch.setattr(latest.FileCreationIndex, "for_repo", classmethod(unavailable_index))
+        monkeypatch.setattr(latest, "iter_git_log_entries_of_added_files", lambda: (e for e in log))
 
     return _patch
 
 
 @pytest.fixture
-def patch_both(monkeypatch):
-    """Patch RepoSingleton.get_repo so ls_files and git.log both return specified values."""
-
-    def _patch(files, raw_log):
-        repo_singleton.RepoSingleton._repo = None
-
-        class CombinedRepo:
-            def __init__(self, files, raw):
-                self.git = self
-                self._files = files
-                self._raw = raw
-
-            def ls_files(self):
-                return "\n".join(self._files)
+def patch_both(patch_repo_ls, patch_repo_log):
+    """Patch ls_files and the added-files log to return the specified values."""
 
-            def log(self, *args, **kwargs):
-                return self._raw
-
-        combined = CombinedRepo(files, raw_log)
-        monkeypatch.setattr(
-            repo_singleton.RepoSingleton, "get_repo", classmethod(lambda cls: combined)
-        )
+    def _patch(files, log):
+        patch_repo_ls(files)
+        patch_repo_log(log)
 
     return _patch
 
@@ -91,13 +73,11 @@ def patch_both(monkeypatch):
 
 
 def test_hydrate_examples_and_filter_based_on_git_data__no_filter(patch_repo_log):
-    raw = (
-        "h1\x002025-05-02T11:00:00+00:00\x00Carol\n"
-        "foo.py\n"
-        "h2\x002025-05-03T12:30:00+00:00\x00Dave\n"
-        "bar.py\n"
-    )
-    patch_repo_log(raw)
+    log = [
+        entry("h1", "2025-05-02T11:00:00+00:00", "Carol", "foo.py"),
+        entry("h2", "2025-05-03T12:30:00+00:00", "Dave", "bar.py"),
+    ]
+    patch_repo_log(log)
 
     examples = latest._hydrate_examples_and_filter_based_on_git_data(["foo.py", "bar.py"], None)
 
@@ -113,13 +93,11 @@ def test_hydrate_examples_and_filter_based_on_git_data__no_filter(patch_repo_log
 def test_hydrate_examples_and_filter_based_on_git_data__author_filter_exact_match(
     patch_repo_log,
 ):
-    raw = (
-        "h1\x002025-05-02T11:00:00+00:00\x00Carol\n"
-        "foo.py\n"
-        "h2\x002025-05-03T12:30:00+00:00\x00Dave\n"
-        "bar.py\n"
-    )
-    patch_repo_log(raw)
+    log = [
+        entry("h1", "2025-05-02T11:00:00+00:00", "Carol", "foo.py"),
+        entry("h2", "2025-05-03T12:30:00+00:00", "Dave", "bar.py"),
+    ]
+    patch_repo_log(log)
 
     examples = latest._hydrate_examples_and_filter_based_on_git_data(["foo.py", "bar.py"], ["Dave"])
 
@@ -131,15 +109,12 @@ def test_hydrate_examples_and_filter_based_on_git_data__author_filter_exact_matc
 def test_hydrate_examples_and_filter_based_on_git_data__author_filter_substring(
     patch_repo_log,
 ):
-    raw = (
-        "h1\x002025-05-02T11:00:00+00:00\x00Jack\n"
-        "foo.py\n"
-        "h2\x002025-05-03T12:30:00+00:00\x00Jane\n"
-        "bar.py\n"
-        "h3\x002025-05-03T12:30:00+00:00\x00James\n"
-        "zoo.py\n"
-    )
-    patch_repo_log(raw)
+    log = [
+        entry("h1", "2025-05-02T11:00:00+00:00", "Jack", "foo.py"),
+        entry("h2", "2025-05-03T12:30:00+00:00", "Jane", "bar.py"),
+        entry("h3", "2025-05-03T12:30:00+00:00", "James", "zoo.py"),
+    ]
+    patch_repo_log(log)
 
     examples = latest._hydrate_examples_and_filter_based_on_git_data(
         ["foo.py", "bar.py", "zoo.py"], ["ja"]
@@ -156,8 +131,10 @@ def test_hydrate_examples_and_filter_based_on_git_data__author_filter_substring(
 
 def test_find_latest_examples_no_matching_files(patch_both):
     files = ["foo.txt", "bar.js"]
-    raw = "h1\x002025-05-01T00:00:00+00:00\x00Alice\n" "foo.txt\n"
-    patch_both(files, raw)
+    log = [
+        entry("h1", "2025-05-01T00:00:00+00:00", "Alice", "foo.txt"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", None, None, limit=5)
     assert examples == []
@@ -165,7 +142,7 @@ def test_find_latest_examples_no_matching_files(patch_both):
 
 def test_find_latest_examples_no_log_entries(patch_both):
     files = ["a.py", "b.py"]
-    patch_both(files, "")
+    patch_both(files, [])
 
     examples = latest._find_latest_examples(".py", None, None, limit=5)
     assert examples == []
@@ -173,13 +150,11 @@ def test_find_latest_examples_no_log_entries(patch_both):
 
 def test_find_latest_examples_limit_zero(patch_both):
     files = ["x.py", "y.py"]
-    raw = (
-        "h1\x002025-05-01T01:00:00+00:00\x00A\n"
-        "x.py\n"
-        "h2\x002025-05-02T02:00:00+00:00\x00B\n"
-        "y.py\n"
-    )
-    patch_both(files, raw)
+    log = [
+        entry("h1", "2025-05-01T01:00:00+00:00", "A", "x.py"),
+        entry("h2", "2025-05-02T02:00:00+00:00", "B", "y.py"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", None, None, limit=0)
     assert examples == []
@@ -187,13 +162,11 @@ def test_find_latest_examples_limit_zero(patch_both):
 
 def test_find_latest_examples_limit_exceeds_count(patch_both):
     files = ["u.py", "v.py"]
-    raw = (
-        "h1\x002025-05-01T03:00:00+00:00\x00Alice\n"
-        "u.py\n"
-        "h2\x002025-05-02T04:00:00+00:00\x00Bob\n"
-        "v.py\n"
-    )
-    patch_both(files, raw)
+    log = [
+        entry("h1", "2025-05-01T03:00:00+00:00", "Alice", "u.py"),
+        entry("h2", "2025-05-02T04:00:00+00:00", "Bob", "v.py"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", None, None, limit=10)
     assert [e.path for e in examples] == ["v.py", "u.py"]
@@ -202,15 +175,13 @@ def test_find_latest_examples_limit_exceeds_count(patch_both):
 
 def test_find_latest_examples_limit_one(patch_both):
     files = ["a.py", "b.py", "c.py"]
-    raw = (
-        "h1\x002025-05-01T01:00:00+00:00\x00A\n"
-        "a.py\n"
-        "h2\x002025-05-02T02:00:00+00:00\x00B\n"
-        "b.py\n"
-        "h3\x002025-05-03T03:00:00+00:00\x00C\n"
-        "c.py\n"
-    )
-    patch_both(files, raw)
+    # newest first, as git log emits them
+    log = [
+        entry("h3", "2025-05-03T03:00:00+00:00", "C", "c.py"),
+        entry("h2", "2025-05-02T02:00:00+00:00", "B", "b.py"),
+        entry("h1", "2025-05-01T01:00:00+00:00", "A", "a.py"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", None, None, limit=1)
     assert len(examples) == 1
@@ -219,15 +190,12 @@ def test_find_latest_examples_limit_one(patch_both):
 
 def test_find_latest_examples_author_filter_integration(patch_both):
     files = ["m.py", "n.py", "o.py"]
-    raw = (
-        "h1\x002025-05-01T05:00:00+00:00\x00Carol\n"
-        "m.py\n"
-        "h2\x002025-05-02T06:00:00+00:00\x00Dave\n"
-        "n.py\n"
-        "h3\x002025-05-03T07:00:00+00:00\x00Eve\n"
-        "o.py\n"
-    )
-    patch_both(files, raw)
+    log = [
+        entry("h1", "2025-05-01T05:00:00+00:00", "Carol", "m.py"),
+        entry("h2", "2025-05-02T06:00:00+00:00", "Dave", "n.py"),
+        entry("h3", "2025-05-03T07:00:00+00:00", "Eve", "o.py"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", None, ["da"], limit=5)
     assert len(examples) == 1
@@ -237,15 +205,11 @@ def test_find_latest_examples_author_filter_integration(patch_both):
 
 def test_find_latest_examples_directories_filter_integration(patch_both):
     files = ["src/a.py", "src/sub/b.py", "lib/c.py", "d.py"]
-    raw = (
-        "h1\x002025-05-01T08:00:00+00:00\x00X\n"
-        "src/a.py\n"
-        "lib/c.py\n"
-        "h2\x002025-05-02T09:00:00+00:00\x00Y\n"
-        "src/sub/b.py\n"
-        "d.py\n"
-    )
-    patch_both(files, raw)
+    log = [
+        entry("h1", "2025-05-01T08:00:00+00:00", "X", "src/a.py", "lib/c.py"),
+        entry("h2", "2025-05-02T09:00:00+00:00", "Y", "src/sub/b.py", "d.py"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", ["src"], None, limit=10)
     paths = [e.path for e in examples]
@@ -255,11 +219,72 @@ def test_find_latest_examples_directories_filter_integration(patch_both):
 
 def test_find_latest_examples_multiple_files_same_commit(patch_both):
     files = ["one.py", "two.py"]
-    raw = "h1\x002025-05-04T10:00:00+00:00\x00Zed\n" "one.py\n" "two.py\n"
-    patch_both(files, raw)
+    log = [
+        entry("h1", "2025-05-04T10:00:00+00:00", "Zed", "one.py", "two.py"),
+    ]
+    patch_both(files, log)
 
     examples = latest._find_latest_examples(".py", None, None, limit=10)
     assert [e.path for e in examples] == ["one.py", "two.py"]
     times = {e.created_at for e in examples}
     assert len(times) == 1
     assert next(iter(times)) == datetime.fromisoformat("2025-05-04T10:00:00+00:00")
+
+
+def test_find_latest_examples_stops_reading_history_at_limit(patch_both):
+    consumed = []
+
+    def log():
+        for e in [
+            entry("h3", "2025-05-03T03:00:00+00:00", "C", "c.py"),
+            entry("h2", "2025-05-02T02:00:00+00:00", "B", "b.py"),
+            entry("h1", "2025-05-01T01:00:00+00:00", "A", "a.py"),
+        ]:
+            consumed.append(e.commit_hash)
+            yield e
+
+    patch_both(["a.py", "b.py", "c.py"], log())
+
+    examples = latest._find_latest_examples(".py", None, None, limit=2)
+
+    assert [e.path for e in examples] == ["c.py", "b.py"]
+    assert consumed == ["h3", "h2"]
+
+
+def test_command_ndjson_writes_each_example_before_the_history_is_read(patch_both, capsys):
+    written = []
+
+    def log():
+        yield entry("h2", "2025-05-01T01:00:00+00:00", "B", "b.py")
+        # the first example was flushed before the next commit was even read
+        written.extend(capsys.readouterr().out.splitlines())
+        assert len(written) == 1
+        yield entry("h1", "2025-05-02T02:00:00+00:00", "A", "a.py")
+
+    patch_both(["a.py", "b.py"], log())
+
+    latest.command(".py", None, None, limit=10, output_format=OutputFormat.ndjson)
+    written.extend(capsys.readouterr().out.splitlines())
+
+    # in history order, not by creation date
+    assert [json.loads(line)["path"] for line in written] == ["b.py", "a.py"]
+
+
+# =====================================================
+# Tests for _find_latest_examples backed by the file creation index
+# =====================================================
+
+
+def test_find_latest_examples_from_index(git_repo, mocker):
+    git_repo.commit(
+        "one", {"a.py": "1\n", "b.txt": "1\n"}, author="Rand", date="2024-01-01T00:00:00Z"
+    )
+    git_repo.commit("two", {"sub/c.py": "1\n"}, author="Mat", date="2024-01-02T00:00:00Z")
+    latest._find_latest_examples(".py", None, None, limit=10)
+    spy = mocker.spy(latest, "_hydrate_examples_and_filter_based_on_git_data")
+
+    examples = latest._find_latest_examples(".py", None, ["ran"], limit=10)
+
+    assert [(e.path, e.author) for e in examples] == [("a.py", "Rand")]
+    assert examples[0].created_at == datetime.fromisoformat("2024-01-01T00:00:00+00:00")
+    spy.assert_not_called()
@@ -1,14 +1,17 @@
+import random
 import pytest
 from datetime import datetime, timezone, timedelta
 
 import gitwit.commands.repo_hot_zones as hz
 from gitwit.commands.repo_hot_zones import (
     FileCommitEntry,
-    _collect_file_commit_entries,
+    HotZoneAggregator,
+    _aggregate_commits,
     _generate_file_tree,
     _compress_node_tree,
     _calculate_hot_zones,
 )
+from gitwit.models.commit_record import CommitRecord, FileChange
 from gitwit.models.git_log_entry import GitLogEntry
 
 FIXED_NOW = datetime(2025, 5, 6, 0, 0, 0, tzinfo=timezone.utc)
@@ -36,16 +39,19 @@ def make_iso(days_delta: int, hours: int = 0):
 
 
 # ====================================================
-# Tests for: _collect_file_commit_entries()
+# Tests for: _aggregate_commits()
 # ====================================================
 
 
-def test_generate_entries__empty():
+def test_aggregate_commits__empty():
     since = FIXED_NOW - timedelta(days=5)
     until = FIXED_NOW
-    entries = _collect_file_commit_entries(since=since, until=until, directories=None, authors=None)
+    aggregator = HotZoneAggregator(since, until)
 
-    assert entries == []
+    num_commits = _aggregate_commits(aggregator, since, until, directories=None, authors=None)
+
+    assert num_commits == 0
+    assert aggregator.hot_zones() == []
 
 
 # ====================================================
@@ -139,3 +145,119 @@ def test_calculate_hot_zones__flat_tree():
     assert zmap["/x"].contributors == 1
     assert zmap["/y"].commits == 1
     assert zmap["/y"].contributors == 2
+
+
+def test_file_tree__counts_match_sets():
+    rng = random.Random(0)
+    dirs = ["", "a/", "a/b/", "a/b/c/", "d/", "d/e/"]
+    entries = [
+        FileCommitEntry(
+            f"h{rng.randrange(200)}",
+            f"{rng.choice(dirs)}f{rng.randrange(5)}.py",
+            f"author{rng.randrange(7)}",
+            FIXED_NOW - timedelta(days=rng.randrange(30)),
+        )
+        for _ in range(500)
+    ]
+
+    zones = {z.path: z for z in _calculate_hot_zones(_generate_file_tree(entries))}
+
+    for d in ["a", "a/b", "a/b/c", "d", "d/e"]:
+        under = [e for e in entries if e.path.startswith(d + "/")]
+        assert zones[f"/{d}"].commits == len({e.commit_hash for e in under})
+        assert zones[f"/{d}"].contributors == len({e.author for e in under})
+        assert zones[f"/{d}"].last_change == max(e.date for e in under)
+
+
+# ====================================================
+# Tests for: --depth and --limit
+# ====================================================
+
+
+def test_file_tree__depth_rolls_up_deeper_directories():
+    entries = [
+        FileCommitEntry("h1", "a/b/c/file", "X", FIXED_NOW),
+        FileCommitEntry("h2", "a/b/d/file", "Y", FIXED_NOW),
+        FileCommitEntry("h3", "a/file", "Z", FIXED_NOW),
+        FileCommitEntry("h4", "e/f/file", "X", FIXED_NOW),
+    ]
+
+    root = _generate_file_tree(entries, depth=2)
+    zones = {z.path: z for z in _calculate_hot_zones(_compress_node_tree(root))}
+
+    assert set(zones) == {"/a", "/a/b", "/e/f"}
+    assert zones["/a/b"].commits == 2
+    assert zones["/a"].commits == 3
+    assert not root.children["a"].children["b"].children
+
+
+def test_calculate_hot_zones__limit_keeps_busiest_in_order():
+    entries = [
+        FileCommitEntry(f"h{i}", f"{d}/file", "X", FIXED_NOW)
+        for i, d in enumerate(["x", "y", "y", "z", "z", "z", "w", "w"])
+    ]
+
+    zones = _calculate_hot_zones(_generate_file_tree(entries), limit=3)
+
+    assert [(z.path, z.commits) for z in zones] == [("/z", 3), ("/y", 2), ("/w", 2)]
+
+
+# ====================================================
+# Tests for: HotZoneAggregator
+# ====================================================
+
+
+def test_hot_zone_aggregator__matches_file_tree_of_entries():
+    # Arrange
+    timestamp = int(FIXED_NOW.timestamp())
+    commits = [
+        CommitRecord(
+            f"h{i}",
+            author,
+            "dev@example.com",
+            timestamp,
+            timestamp,
+            "msg",
+            [FileChange(path=p, insertions=1, deletions=0) for p in paths],
+        )
+        for i, (author, paths) in enumerate(
+            [("A", ["dir/a.txt", "test/t.txt"]), ("B", ["dir/b.txt"]), ("B", ["dir/sub/c"])]
+        )
+    ]
+    entries = [
+        FileCommitEntry(c.hexsha, f.path, c.author, c.committed_datetime)
+        for c in commits
+        for f in c.files
+    ]
+    aggregator = HotZoneAggregator(FIXED_NOW, FIXED_NOW, limit=None)
+
+    # Act
+    for commit in commits:
+        aggregator.add(commit)
+
+    # Assert
+    expected = _calculate_hot_zones(_compress_node_tree(_generate_file_tree(entries)))
+    assert aggregator.hot_zones() == expected
+
+
+def test_aggregate_commits__feeds_each_commit_as_it_is_streamed(monkeypatch):
+    # Arrange
+    timestamp = int(FIXED_NOW.timestamp())
+    aggregator = HotZoneAggregator(FIXED_NOW, FIXED_NOW, limit=None)
+
+    def commits(since, until, directories, authors):
+        for i, path in enumerate(["dir/a.txt", "dir/sub/b.txt"]):
+            # nothing is held back: the previous commit is already in the tree
+            assert len(aggregator.tree.commit_ids) == i
+            yield CommitRecord(
+                f"h{i}", "A", "a@example.com", timestamp, timestamp, "msg", [FileChange(path, 1, 0)]
+            )
+
+    monkeypatch.setattr(hz, "get_filtered_commits", commits)
+
+    # Act
+    num_commits = _aggregate_commits(aggregator, FIXED_NOW, FIXED_NOW, None, None)
+
+    # Assert
+    assert num_commits == 2
+    assert {z.path: z.commits for z in aggregator.hot_zones()} == {"/dir": 2, "/dir/sub": 1}
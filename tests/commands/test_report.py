@@ -0,0 +1,105 @@
+from datetime import datetime, timezone
+
+import pytest
+import typer
+
+import gitwit.commands.report as report
+from gitwit.commands.repo_hot_zones import HotZoneAggregator
+from gitwit.commands.report import Analysis, _create_observers
+from gitwit.commands.risky_commits import RiskyCommitAggregator
+from gitwit.commands.show_activity import ActivityAggregator
+from gitwit.commands.team_activity import TeamActivityAggregator
+from gitwit.models.commit_record import CommitRecord, FileChange
+
+SINCE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+UNTIL = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+
+def make_commit(hexsha, author, day, path, message="msg"):
+    timestamp = int(datetime(2024, 1, day, tzinfo=timezone.utc).timestamp())
+    return CommitRecord(
+        hexsha=hexsha,
+        author=author,
+        author_email=f"{author}@example.com",
+        authored_date=timestamp,
+        committed_date=timestamp,
+        message=message,
+        files=[FileChange(path=path, insertions=600, deletions=0)],
+    )
+
+
+@pytest.fixture
+def commits(mocker):
+    commits = [
+        make_commit("a" * 40, "Alice", 2, "src/api/views.py", "Fix password reset"),
+        make_commit("b" * 40, "Bob", 3, "docs/index.md"),
+    ]
+    mocker.patch("gitwit.commands.risky_commits._first_areas_finder", return_value=lambda shas: {})
+    return commits
+
+
+def run_report(analyses, since="2024-01-01", until="2024-02-01"):
+    report.command(analyses=analyses, since=since, until=until, rules=None)
+
+
+# ====================================================
+# Tests for: _create_observers()
+# ====================================================
+
+
+def test_create_observers__in_order_and_deduplicated(mocker):
+    mocker.patch("gitwit.commands.report.load_rules")
+
+    observers = _create_observers(
+        [Analysis.rc, Analysis.sa, Analysis.rc, Analysis.hz, Analysis.ta], SINCE, UNTIL
+    )
+
+    assert [type(o) for o in observers] == [
+        RiskyCommitAggregator,
+        ActivityAggregator,
+        HotZoneAggregator,
+        TeamActivityAggregator,
+    ]
+
+
+# ====================================================
+# Tests for: command()
+# ====================================================
+
+
+def test_report__scans_history_once_for_every_analysis(commits, mocker, capsys):
+    mock_fetch = mocker.patch(
+        "gitwit.commands.report.get_filtered_commits", return_value=iter(commits)
+    )
+
+    run_report(None)
+
+    mock_fetch.assert_called_once()
+    output = capsys.readouterr().out
+    for title in [
+        "Developer Activity Summary",
+        "File Statistics",
+        "Commit Activity Summary",
+        "Hot Zones",
+        "High Risk Commits",
+    ]:
+        assert title in output
+
+
+def test_report__only_requested_analyses(commits, mocker, capsys):
+    mocker.patch("gitwit.commands.report.get_filtered_commits", return_value=iter(commits))
+
+    run_report([Analysis.hz])
+
+    output = capsys.readouterr().out
+    assert "Hot Zones" in output
+    assert "Developer Activity Summary" not in output
+
+
+def test_report__no_commits(mocker, capsys):
+    mocker.patch("gitwit.commands.report.get_filtered_commits", return_value=iter([]))
+
+    with pytest.raises(typer.Exit):
+        run_report([Analysis.sa])
+
+    assert "No commits found" in capsys.readouterr().out
@@ -1,35 +1,39 @@
-from git import Actor, Commit
+import json
 import pytest
-from unittest.mock import MagicMock
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from collections import Counter
 
 from gitwit.commands.show_activity import (
+    ActivityAggregator,
+    _aggregate_activity,
     _compute_file_statistics,
     _compute_author_activity_statistics,
     FileStats,
     AuthorActivityStats,
+    command,
 )
+from gitwit.models.commit_record import CommitRecord, FileChange
+from gitwit.utils.output import OutputFormat
 
-FIXED_NOW = datetime(2023, 1, 1, 12, 0, 0)
+FIXED_NOW = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
 
 
-@pytest.fixture
-def commit_data():
-    author1 = MagicMock(spec=Actor)
-    author1.name = "Alice"
-    author2 = MagicMock(spec=Actor)
-    author2.name = "Bob"
+def make_commit(author, committed_datetime, path, insertions, deletions):
+    return CommitRecord(
+        hexsha=f"{author}-sha",
+        author=author,
+        author_email=f"{author}@example.com",
+        authored_date=int(committed_datetime.timestamp()),
+        committed_date=int(committed_datetime.timestamp()),
+        message="msg",
+        files=[FileChange(path=path, insertions=insertions, deletions=deletions)],
+    )
 
-    commit1 = MagicMock(spec=Commit)
-    commit1.committed_datetime = FIXED_NOW - timedelta(days=2)
-    commit1.author = author1
-    commit1.stats.files = {"file1.py": {"lines": 10}}
 
-    commit2 = MagicMock(spec=Commit)
-    commit2.committed_datetime = FIXED_NOW - timedelta(days=1)
-    commit2.author = author2
-    commit2.stats.files = {"file2.py": {"lines": 5}}
+@pytest.fixture
+def commit_data():
+    commit1 = make_commit("Alice", FIXED_NOW - timedelta(days=2), "file1.py", 6, 4)
+    commit2 = make_commit("Bob", FIXED_NOW - timedelta(days=1), "file2.py", 5, 0)
 
     return {
         "commit1": commit1,
@@ -113,11 +117,7 @@ def test_compute_author_activity_statistics_cases(
     assert stats.top_contributor_commits == count
 
     # Total lines
-    total_lines = sum(
-        details.get("lines", 0)
-        for commit in mock_commits
-        for details in commit.stats.files.values()
-    )
+    total_lines = sum(change.lines for commit in mock_commits for change in commit.files)
     assert stats.total_lines == total_lines
 
     # Last commit date
@@ -126,3 +126,62 @@ def test_compute_author_activity_statistics_cases(
     else:
         expected_last = "N/A"
     assert stats.last_commit_date == expected_last
+
+
+# ====================================================
+# Tests for: ActivityAggregator / _aggregate_activity()
+# ====================================================
+
+
+def test_aggregate_activity__single_pass_over_a_stream():
+    # Arrange
+    commits = [
+        make_commit("Alice", FIXED_NOW - timedelta(days=3), "a.py", 1, 1),
+        make_commit("Bob", FIXED_NOW - timedelta(days=1), "b.py", 10, 0),
+        make_commit("Alice", FIXED_NOW - timedelta(days=2), "a.py", 3, 0),
+    ]
+    stream = iter(commits)
+
+    # Act
+    activity = _aggregate_activity(stream)
+
+    # Assert
+    assert next(stream, None) is None
+    assert [(fs.file, fs.commits, fs.lines) for fs in activity.file_statistics()] == [
+        ("b.py", 1, 10),
+        ("a.py", 2, 5),
+    ]
+    assert activity.author_activity_statistics() == AuthorActivityStats(
+        total_commits=3,
+        num_authors=2,
+        top_contributor="Alice",
+        top_contributor_commits=2,
+        total_lines=15,
+        last_commit_date=(FIXED_NOW - timedelta(days=1)).strftime("%Y-%m-%d"),
+    )
+
+
+def test_activity_aggregator__file_statistics_limit():
+    activity = ActivityAggregator()
+    for i in range(5):
+        activity.add(make_commit("Alice", FIXED_NOW, f"f{i}.py", i, 0))
+
+    assert [fs.file for fs in activity.file_statistics(2)] == ["f4.py", "f3.py"]
+
+
+def test_command__ignores_commits_outside_the_window(mocker, capsys):
+    # Arrange: get_filtered_commits may hand back commits just outside the window
+    commits = [
+        make_commit("Alice", FIXED_NOW, "in.py", 1, 0),
+        make_commit("Bob", FIXED_NOW + timedelta(days=5), "late.py", 1, 0),
+    ]
+    mocker.patch("gitwit.commands.show_activity.get_filtered_commits", return_value=commits)
+
+    # Act
+    command(
+        since="2022-12-31", until="2023-01-02", directories=None, output_format=OutputFormat.ndjson
+    )
+
+    # Assert
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row["file"] for row in rows] == ["in.py"]
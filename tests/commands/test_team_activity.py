@@ -3,51 +3,45 @@ from datetime import datetime, timedelta
 import pytest
 
 import gitwit.commands.team_activity as team_activity
+from gitwit.models.commit_record import CommitRecord, FileChange
 
 # Define a fixed reference date for "now"
 FIXED_NOW = datetime(2023, 1, 1)
 
 
-class DummyCommit:
-    def __init__(self, hexsha, author_name, committed_date, message, stats):
-        self.hexsha = hexsha
-        self.author = DummyAuthor(author_name)
-        self.committed_date = committed_date
-        self.message = message
-        self.stats = stats
-
-
-class DummyAuthor:
-    def __init__(self, name):
-        self.name = name
-
-
 class DummyStats:
     def __init__(self, insertions, deletions, files):
-        self.total = {"insertions": insertions, "deletions": deletions}
+        self.insertions = insertions
+        self.deletions = deletions
         self.files = files
 
 
+def make_commit(hexsha, author_name, committed_date, message, stats):
+    # attribute the commit totals to the first file so per-commit sums stay exact
+    changes = [FileChange(path=f, insertions=0, deletions=0) for f in stats.files]
+    changes[0].insertions = stats.insertions
+    changes[0].deletions = stats.deletions
+
+    return CommitRecord(
+        hexsha=hexsha,
+        author=author_name,
+        author_email=f"{author_name}@example.com",
+        authored_date=int(committed_date),
+        committed_date=int(committed_date),
+        message=message,
+        files=changes,
+    )
+
+
 @pytest.fixture
 def repo_mock(monkeypatch):
-    class RepoMock:
-        def __init__(self, commits):
-            self._commits = commits
-
-        def iter_commits(self, since=None, until=None, author=None):
-            since_ts = datetime.fromisoformat(since).timestamp() if since else 0
-            until_ts = datetime.fromisoformat(until).timestamp() if until else float("inf")
-
-            filtered_commits = [
-                c
-                for c in self._commits
-                if since_ts <= c.committed_date <= until_ts
-                and (author is None or c.author.name == author)
-            ]
-            return iter(filtered_commits)
-
     def mock_repo(commits):
-        monkeypatch.setattr(team_activity, "Repo", lambda *_args, **_kwargs: RepoMock(commits))
+        def fake_get_filtered_commits(since, until):
+            return iter(
+                c for c in commits if since.timestamp() <= c.committed_date <= until.timestamp()
+            )
+
+        monkeypatch.setattr(team_activity, "get_filtered_commits", fake_get_filtered_commits)
 
     return mock_repo
 
@@ -72,7 +66,7 @@ def test_fetch_developer_activities__no_commits(repo_mock):
 
 def test_fetch_developer_activities__commit_out_of_range(repo_mock):
     # Arrange
-    commit_outside_of_date_range = DummyCommit(
+    commit_outside_of_date_range = make_commit(
         hexsha="def5678",
         author_name="Dev2",
         committed_date=(FIXED_NOW - timedelta(days=7, seconds=1)).timestamp(),
@@ -93,14 +87,14 @@ def test_fetch_developer_activities__commit_out_of_range(repo_mock):
 
 def test_fetch_developer_activities__valid_commits(repo_mock):
     # Arrange
-    simple_commit = DummyCommit(
+    simple_commit = make_commit(
         hexsha="abc1234",
         author_name="Dev1",
         committed_date=FIXED_NOW.timestamp(),
         message="Initial commit",
         stats=DummyStats(10, 5, ["file1.py"]),
     )
-    commit_with_multiple_files = DummyCommit(
+    commit_with_multiple_files = make_commit(
         hexsha="def5678",
         author_name="Dev2",
         committed_date=FIXED_NOW.timestamp(),
@@ -141,14 +135,14 @@ def test_fetch_developer_activities__valid_commits(repo_mock):
 
 def test_fetch_developer_activities__valid_commits_from_same_author(repo_mock):
     # Arrange
-    simple_commit = DummyCommit(
+    simple_commit = make_commit(
         hexsha="abc1234",
         author_name="Dev1",
         committed_date=FIXED_NOW.timestamp(),
         message="Initial commit",
         stats=DummyStats(10, 5, ["file1.py"]),
     )
-    commit_with_multiple_files = DummyCommit(
+    commit_with_multiple_files = make_commit(
         hexsha="def5678",
         author_name="Dev1",
         committed_date=FIXED_NOW.timestamp(),
@@ -177,21 +171,21 @@ def test_fetch_developer_activities__valid_commits_from_same_author(repo_mock):
 
 def test_fetch_developer_activities__valid_commits_on_the_same_file(repo_mock):
     # Arrange
-    simple_commit = DummyCommit(
+    simple_commit = make_commit(
         hexsha="abc1234",
         author_name="Dev1",
         committed_date=FIXED_NOW.timestamp(),
         message="Initial commit",
         stats=DummyStats(10, 5, ["file1.py"]),
     )
-    commit_on_the_same_file = DummyCommit(
+    commit_on_the_same_file = make_commit(
         hexsha="def5678",
         author_name="Dev1",
         committed_date=FIXED_NOW.timestamp(),
         message="Update file",
         stats=DummyStats(20, 10, ["file1.py", "file2.py"]),
     )
-    commit_from_different_author_on_same_file = DummyCommit(
+    commit_from_different_author_on_same_file = make_commit(
         hexsha="def5678",
         author_name="Dev2",
         committed_date=FIXED_NOW.timestamp(),
@@ -7,8 +7,11 @@ from typer import Exit as TyperExit
 import gitwit.commands.who_is_the_expert as file_expert
 from gitwit.commands.who_is_the_expert import (
     _compute_author_activity,
-    _gather_blame_entries,
+    _gather_author_blame,
 )
+from gitwit.models.author_blame import AuthorBlame
+from gitwit.utils.blame_cache import BlameCache
+from gitwit.utils.output import OutputFormat
 
 
 class DummyBlame:
@@ -40,6 +43,21 @@ def tmp_dir(tmp_path):
     return d
 
 
+def run_command(path, **options):
+    """Call the command directly, with the CLI's defaults for any option not given."""
+    defaults = dict(
+        num_results=5,
+        no_cache=True,
+        cache_size=256,
+        jobs=2,
+        processes=False,
+        max_file_size=1024,
+        include_all=False,
+        output_format=OutputFormat.table,
+    )
+    file_expert.command(path, **{**defaults, **options})
+
+
 # ====================================================
 # Tests for: command()
 # ====================================================
@@ -48,31 +66,31 @@ def tmp_dir(tmp_path):
 def test_command_file_not_exists(tmp_path):
     missing = tmp_path / "noexist.py"
     with pytest.raises(TyperExit):
-        file_expert.command(str(missing))
+        run_command(str(missing))
 
 
 def test_command_fetch_error(tmp_file, monkeypatch):
     monkeypatch.setattr(
         file_expert,
-        "fetch_file_gitblame",
+        "fetch_file_blame_authors",
         lambda repo, path: (_ for _ in ()).throw(Exception("Git blame failed")),
     )
     with pytest.raises(TyperExit):
-        file_expert.command(str(tmp_file))
+        run_command(str(tmp_file))
 
 
 def test_command_empty(tmp_file, monkeypatch):
-    monkeypatch.setattr(file_expert, "fetch_file_gitblame", lambda repo, path: [])
+    monkeypatch.setattr(file_expert, "fetch_file_blame_authors", lambda repo, path: [])
     with pytest.raises(TyperExit):
-        file_expert.command(str(tmp_file))
+        run_command(str(tmp_file))
 
 
 def test_command_file_success(tmp_file, monkeypatch, capsys):
     # Single blame entry for file
     blame = DummyBlame("Alice", 100, "init commit", 4)
-    monkeypatch.setattr(file_expert, "fetch_file_gitblame", lambda repo, path: [blame])
+    monkeypatch.setattr(file_expert, "fetch_file_blame_authors", lambda repo, path: [blame])
     # Limit results to 1
-    file_expert.command(str(tmp_file), num_results=1)
+    run_command(str(tmp_file), num_results=1)
     captured = capsys.readouterr()
     assert "Alice" in captured.out
     assert "4" in captured.out
@@ -98,8 +116,8 @@ def test_command_dir_success(tmp_dir, monkeypatch, capsys):
         name = Path(path).name
         return [DummyBlame(name, 50, f"edit {name}", 1)]
 
-    monkeypatch.setattr(file_expert, "fetch_file_gitblame", fake_blame)
-    file_expert.command(str(tmp_dir), num_results=2)
+    monkeypatch.setattr(file_expert, "fetch_file_blame_authors", fake_blame)
+    run_command(str(tmp_dir), num_results=2)
     out = capsys.readouterr().out
     # Should include directory path in title
     assert str(tmp_dir) in out
@@ -109,11 +127,11 @@ def test_command_dir_success(tmp_dir, monkeypatch, capsys):
 
 
 # ====================================================
-# Tests for: _gather_blame_entries()
+# Tests for: _gather_author_blame()
 # ====================================================
 
 
-def test_gather_blame_entries__file(tmp_file, monkeypatch):
+def test_gather_author_blame__file(tmp_file, monkeypatch):
     # Arrange
     bm = DummyBlame("A", 123, "msg", 2)
 
@@ -122,17 +140,17 @@ def test_gather_blame_entries__file(tmp_file, monkeypatch):
         assert Path(path) == tmp_file
         return [bm]
 
-    monkeypatch.setattr(file_expert, "fetch_file_gitblame", fake)
+    monkeypatch.setattr(file_expert, "fetch_file_blame_authors", fake)
     repo = file_expert.Repo(".", search_parent_directories=True)
 
     # Act
-    entries = _gather_blame_entries(repo, tmp_file)
+    entries = _gather_author_blame(repo, tmp_file)
 
     # Assert
-    assert entries == [bm]
+    assert entries == [AuthorBlame("A", 2, 123, "msg")]
 
 
-def test_gather_blame_entries__dir(tmp_dir, monkeypatch):
+def test_gather_author_blame__dir(tmp_dir, monkeypatch):
     # Monkeypatch git ls-files to return our test files
     monkeypatch.setattr(
         Git,
@@ -157,16 +175,17 @@ def test_gather_blame_entries__dir(tmp_dir, monkeypatch):
             return [b2]
         return []
 
-    monkeypatch.setattr(file_expert, "fetch_file_gitblame", fake)
+    monkeypatch.setattr(file_expert, "fetch_file_blame_authors", fake)
     repo = file_expert.Repo(".", search_parent_directories=True)
 
     # Act
-    entries = _gather_blame_entries(repo, tmp_dir)
+    entries = _gather_author_blame(repo, tmp_dir)
 
     # Assert
-    assert len(entries) == 2
-    assert b1 in entries
-    assert b2 in entries
+    assert sorted(entries, key=lambda b: b.author) == [
+        AuthorBlame("X", 1, 10, "m1"),
+        AuthorBlame("Y", 2, 20, "m2"),
+    ]
 
 
 # ====================================================
@@ -200,3 +219,113 @@ def test_compute_author_activity__aggregation():
     assert bob.line_count == 1
     assert bob.last_commit_message == "fix"
     assert bob.last_commit_date == datetime.fromtimestamp(120)
+
+
+# ====================================================
+# Tests for: _gather_author_blame() with a blame cache
+# ====================================================
+
+
+@pytest.fixture
+def blame_cache(git_repo):
+    cache = BlameCache.for_repo()
+    yield cache
+    cache.close()
+
+
+def test_gather_author_blame__only_changed_blobs_reblamed(git_repo, blame_cache, mocker):
+    git_repo.commit("init", {"src/a.py": "a\n", "src/b.py": "b\n"}, author="Egwene")
+    repo = file_expert.Repo(".")
+    first = _gather_author_blame(repo, Path("src"), blame_cache)
+
+    git_repo.commit("edit", {"src/b.py": "b\nmore\n"}, author="Nynaeve")
+    spy = mocker.spy(file_expert, "fetch_file_blame_authors")
+    second = _gather_author_blame(repo, Path("src"), blame_cache)
+
+    assert [args[1] for args, _ in spy.call_args_list] == ["src/b.py"]
+    assert {b.author: b.num_lines for b in first} == {"Egwene": 2}
+    assert {b.author: b.num_lines for b in second} == {"Egwene": 2, "Nynaeve": 1}
+
+
+def test_gather_author_blame__uncommitted_files_bypass_cache(git_repo, blame_cache, mocker):
+    git_repo.commit("init", {"a.py": "a\n"})
+    repo = file_expert.Repo(".")
+    _gather_author_blame(repo, Path("a.py"), blame_cache)
+
+    git_repo.write("a.py", "a\nwip\n")
+    spy = mocker.spy(file_expert, "fetch_file_blame_authors")
+    entries = _gather_author_blame(repo, Path("a.py"), blame_cache)
+
+    assert spy.call_count == 1
+    assert {b.author: b.num_lines for b in entries} == {"Default Author": 1, "Not Committed Yet": 1}
+
+
+# ====================================================
+# Tests for: _gather_author_blame() scheduling
+# ====================================================
+
+
+def test_gather_author_blame__largest_files_first(git_repo, mocker):
+    git_repo.commit("init", {"small.py": "1\n", "big.py": "1\n" * 50, "mid.py": "1\n" * 5})
+    spy = mocker.spy(file_expert, "fetch_file_blame_authors")
+
+    _gather_author_blame(file_expert.Repo("."), Path("."), jobs=1)
+
+    assert [args[1] for args, _ in spy.call_args_list] == ["big.py", "mid.py", "small.py"]
+
+
+def test_gather_author_blame__process_pool_matches_threads(git_repo):
+    git_repo.commit("one", {"a.py": "1\n2\n", "b.py": "1\n"}, author="Min")
+    git_repo.commit("two", {"a.py": "1\nx\n"}, author="Siuan", date="2024-01-02T00:00:00Z")
+    repo = file_expert.Repo(".")
+
+    threads = _gather_author_blame(repo, Path("."), jobs=2)
+    processes = _gather_author_blame(repo, Path("."), jobs=2, use_processes=True)
+
+    assert sorted(processes, key=lambda b: b.author) == sorted(threads, key=lambda b: b.author)
+    assert {b.author: b.num_lines for b in threads} == {"Min": 2, "Siuan": 1}
+
+
+# ====================================================
+# Tests for: _gather_author_blame() exclusions
+# ====================================================
+
+
+@pytest.fixture
+def repo_with_generated_files(git_repo):
+    git_repo.commit(
+        "init",
+        {
+            ".gitattributes": "gen/** linguist-generated\n",
+            "src/app.py": "1\n2\n",
+            "gen/schema.py": "1\n",
+            "data.json": "x" * 3000,
+        },
+    )
+    return git_repo
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ({}, {".gitattributes", "src/app.py", "gen/schema.py", "data.json"}),
+        ({"exclude_by_attributes": True}, {".gitattributes", "src/app.py", "data.json"}),
+        ({"max_file_size": 2048}, {".gitattributes", "src/app.py", "gen/schema.py"}),
+    ],
+)
+def test_gather_author_blame__exclusions(repo_with_generated_files, mocker, options, expected):
+    spy = mocker.spy(file_expert, "fetch_file_blame_authors")
+
+    _gather_author_blame(file_expert.Repo("."), Path("."), **options)
+
+    assert {args[1] for args, _ in spy.call_args_list} == expected
+
+
+def test_gather_author_blame__explicit_file_never_excluded(repo_with_generated_files, mocker):
+    spy = mocker.spy(file_expert, "fetch_file_blame_authors")
+
+    _gather_author_blame(
+        file_expert.Repo("."), Path("gen/schema.py"), max_file_size=1, exclude_by_attributes=True
+    )
+
+    assert spy.call_count == 1
@@ -0,0 +1,83 @@
+import os
+import subprocess
+
+import pytest
+
+import gitwit.utils.repo_singleton as repo_singleton
+
+
+class GitRepoBuilder:
+    """Small helper for building real throwaway git repositories in tests."""
+
+    def __init__(self, path):
+        self.path = path
+        self.git("init", "-q", "-b", "main")
+        self.git("config", "user.email", "default@example.com")
+        self.git("config", "user.name", "Default Author")
+        self.git("config", "commit.gpgsign", "false")
+
+    def git(self, *args, env=None) -> str:
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.path,
+            env={**os.environ, **(env or {})},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    def write(self, rel_path: str, content) -> None:
+        target = self.path / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            target.write_bytes(content)
+        else:
+            target.write_text(content)
+
+    def commit(
+        self,
+        message: str,
+        files=None,
+        author: str = "Default Author",
+        email: str = "default@example.com",
+        date: str = "2024-01-01T12:00:00+00:00",
+    ) -> str:
+        for rel_path, content in (files or {}).items():
+            if content is None:
+                self.git("rm", "-q", rel_path)
+            else:
+                self.write(rel_path, content)
+                self.git("add", rel_path)
+
+        dates = {"GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+        self.git(
+            "commit",
+            "-q",
+            "--allow-empty",
+            "-m",
+            message,
+            f"--author={author} <{email}>",
+            env=dates,
+        )
+        return self.git("rev-parse", "HEAD")
+
+
+def use_repo(monkeypatch, builder: GitRepoBuilder) -> GitRepoBuilder:
+    """Make RepoSingleton resolve to `builder`'s repository for the duration of a test."""
+    monkeypatch.chdir(builder.path)
+    monkeypatch.setattr(repo_singleton.RepoSingleton, "_repo", None)
+    return builder
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """A fresh git repository that RepoSingleton resolves to for the duration of a test."""
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    return use_repo(monkeypatch, GitRepoBuilder(repo_path))
+
+
+@pytest.fixture(scope="module")
+def module_git_repo(tmp_path_factory):
+    """A git repository shared by every test in a module; activate it with `use_repo`."""
+    return GitRepoBuilder(tmp_path_factory.mktemp("repo"))
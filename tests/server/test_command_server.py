@@ -0,0 +1,142 @@
+import json
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from gitwit.cli.cli import GitwitGroup, app
+from gitwit.server.client import forward_to_server
+from gitwit.server.command_server import CommandServer, CommandServerError
+from gitwit.server.protocol import SERVED_COMMANDS, socket_path
+from gitwit.utils.commit_index import CommitIndex
+from gitwit.utils.profiler import PROFILE_ENV
+
+SA_ARGS = ["sa", "--since", "2024-01-01", "--until", "2024-02-01"]
+
+
+def make_server(git_repo) -> CommandServer:
+    path = socket_path(Path(git_repo.path) / ".git")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return CommandServer(path, lambda argv: app(argv, prog_name="gitwit"), refresh_interval=0)
+
+
+@pytest.fixture
+def server(git_repo, monkeypatch):
+    monkeypatch.delenv("GITWIT_NO_SERVER", raising=False)
+    monkeypatch.delenv("GIT_DIR", raising=False)
+    git_repo.commit("add app", files={"src/app.py": "x = 1\n"}, date="2024-01-10T12:00:00Z")
+
+    server = make_server(git_repo)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05})
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_forwards_command_output(server, capfd):
+    assert forward_to_server(SA_ARGS) == 0
+
+    assert "src/app.py" in capfd.readouterr().out
+
+
+def test_forwards_machine_readable_output(server, capfd):
+    assert forward_to_server([*SA_ARGS, "--format", "ndjson"]) == 0
+
+    assert json.loads(capfd.readouterr().out)["file"] == "src/app.py"
+
+
+def test_forwards_exit_code(server, capfd):
+    assert forward_to_server(["sa", "--since", "not-a-date", "--until", "2024-02-01"]) == 1
+
+    assert "Invalid date format" in capfd.readouterr().out
+
+
+def test_forwards_usage_errors(server, capfd):
+    assert forward_to_server(["sa", "--no-such-option"]) == 2
+
+    assert "No such option" in capfd.readouterr().err
+
+
+def test_runs_from_subdirectory(server, git_repo, monkeypatch, capfd):
+    monkeypatch.chdir(git_repo.path / "src")
+
+    assert forward_to_server(SA_ARGS) == 0
+    assert "src/app.py" in capfd.readouterr().out
+
+
+def test_only_served_commands_are_forwarded(server):
+    assert forward_to_server([]) is None
+    assert forward_to_server(["--help"]) is None
+    assert forward_to_server(["serve"]) is None
+
+
+def test_no_server_env_runs_locally(server, monkeypatch):
+    monkeypatch.setenv("GITWIT_NO_SERVER", "1")
+
+    assert forward_to_server(SA_ARGS) is None
+
+
+def test_profiled_commands_run_locally(server, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, "1")
+
+    assert forward_to_server(SA_ARGS) is None
+    assert forward_to_server(["--profile", *SA_ARGS]) is None
+
+
+@pytest.mark.parametrize("value", ["0", "false", "Off", ""])
+def test_profile_env_read_as_false_is_forwarded(server, monkeypatch, capfd, value):
+    monkeypatch.setenv(PROFILE_ENV, value)
+
+    assert forward_to_server(SA_ARGS) == 0
+    assert "src/app.py" in capfd.readouterr().out
+
+
+def test_second_server_is_refused(server, git_repo):
+    with pytest.raises(CommandServerError, match="already listening"):
+        make_server(git_repo)
+
+
+def test_socket_is_removed_on_close(git_repo):
+    server = make_server(git_repo)
+    path = server.socket_path
+    assert path.exists()
+
+    server.server_close()
+
+    assert not path.exists()
+    assert forward_to_server(SA_ARGS) is None
+
+
+def test_stale_socket_is_ignored_and_replaced(git_repo, monkeypatch):
+    monkeypatch.delenv("GITWIT_NO_SERVER", raising=False)
+    path = socket_path(Path(git_repo.path) / ".git")
+    path.parent.mkdir(parents=True)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+
+    assert forward_to_server(SA_ARGS) is None
+
+    server = make_server(git_repo)
+    server.server_close()
+
+
+def test_refreshes_indexes_when_head_moves(git_repo):
+    git_repo.commit("first", files={"a.py": "a\n"})
+    server = make_server(git_repo)
+    try:
+        server.preload()
+        git_repo.commit("second", files={"b.py": "b\n"})
+
+        server.service_actions()
+
+        assert CommitIndex.for_repo().refresh() == 0
+    finally:
+        server.server_close()
+
+
+def test_served_commands_are_registered():
+    assert SERVED_COMMANDS <= set(GitwitGroup.lazy_commands)
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from gitwit.server.protocol import (
+    EXIT,
+    STDOUT,
+    find_git_dir,
+    read_frames,
+    socket_path,
+    write_frame,
+)
+
+
+def test_frames_round_trip():
+    stream = io.BytesIO()
+    write_frame(stream, STDOUT, "héllo\n".encode("utf-8"))
+    write_frame(stream, STDOUT, b"")
+    write_frame(stream, EXIT, b"3")
+    stream.seek(0)
+
+    assert list(read_frames(stream)) == [
+        (STDOUT, "héllo\n".encode("utf-8")),
+        (STDOUT, b""),
+        (EXIT, b"3"),
+    ]
+
+
+def test_truncated_frame_raises():
+    stream = io.BytesIO()
+    write_frame(stream, STDOUT, b"output")
+    stream = io.BytesIO(stream.getvalue()[:-2])
+
+    with pytest.raises(ConnectionError):
+        list(read_frames(stream))
+
+
+def test_find_git_dir_from_subdirectory(tmp_path, monkeypatch):
+    monkeypatch.delenv("GIT_DIR", raising=False)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+
+    assert find_git_dir(tmp_path / "src" / "pkg") == tmp_path / ".git"
+    assert socket_path(tmp_path / ".git") == tmp_path / ".git" / "gitwit" / "serve.sock"
+
+
+def test_find_git_dir_follows_gitdir_file(tmp_path, monkeypatch):
+    monkeypatch.delenv("GIT_DIR", raising=False)
+    worktree = tmp_path / "worktree"
+    worktree.mkdir()
+    (worktree / ".git").write_text("gitdir: ../main/.git/worktrees/wt\n")
+
+    assert find_git_dir(worktree) == (tmp_path / "main" / ".git" / "worktrees" / "wt").resolve()
+
+
+def test_find_git_dir_outside_repository(tmp_path, monkeypatch):
+    monkeypatch.delenv("GIT_DIR", raising=False)
+    if any((d / ".git").exists() for d in (tmp_path, *tmp_path.parents)):
+        pytest.skip("the temporary directory is inside a git repository")
+
+    assert find_git_dir(tmp_path) is None
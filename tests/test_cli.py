@@ -0,0 +1,151 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import gitwit
+from gitwit.cli.cli import GitwitGroup, app
+
+# gitwit's own share of `import gitwit.cli.cli`, i.e. excluding typer; currently a few ms
+IMPORT_BUDGET_US = 50_000
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    # the checkout's src directory needn't be installed, so hand it to the child explicitly
+    src_dir = str(Path(gitwit.__file__).parent.parent)
+    pythonpath = os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")]))
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        env={**os.environ, "PYTHONPATH": pythonpath},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def cumulative_import_times(stderr: str):
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_help_does_not_import_commands():
+    code = (
+        "import sys\n"
+        "from gitwit.cli.cli import app\n"
+        "try:\n"
+        "    app(['--help'], prog_name='gitwit')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(','.join(sys.modules), file=sys.stderr)\n"
+    )
+    result = run_python(code)
+    modules = result.stderr.strip().split(",")
+
+    assert "ta" in result.stdout and "report" in result.stdout
+    assert [m for m in modules if m.startswith("gitwit.commands")] == []
+    assert "git" not in modules
+    assert "concurrent.futures" not in modules
+
+
+def test_cli_import_time_budget():
+    result = run_python("import gitwit.cli.cli", "-X", "importtime")
+    times = cumulative_import_times(result.stderr)
+
+    assert times["gitwit.cli"] - times["typer"] < IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize("name", sorted(GitwitGroup.lazy_commands))
+def test_lazy_command_help_matches_docstring(name):
+    spec = GitwitGroup.lazy_commands[name]
+    command = importlib.import_module(spec.module).command
+
+    assert spec.short_help == command.__doc__.strip().splitlines()[0]
+
+
+def test_lazy_command_runs(git_repo, capsys):
+    git_repo.commit("add file", files={"src/app.py": "x = 1\n"}, date="2024-01-10T12:00:00Z")
+
+    with pytest.raises(SystemExit) as exit_info:
+        app(["sa", "--since", "2024-01-01", "--until", "2024-02-01"], prog_name="gitwit")
+
+    assert exit_info.value.code == 0
+    assert "src/app.py" in capsys.readouterr().out
+
+
+def test_lazy_command_parses_its_options(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        app(["rc", "--help"], prog_name="gitwit")
+
+    assert exit_info.value.code == 0
+    assert "--scan-diffs" in capsys.readouterr().out
+
+
+def test_unknown_command_fails(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        app(["nope"], prog_name="gitwit")
+
+    assert exit_info.value.code == 2
+
+
+def test_profile_output(git_repo, tmp_path, capsys):
+    git_repo.commit("add file", files={"src/app.py": "x = 1\n"}, date="2024-01-10T12:00:00Z")
+    output = tmp_path / "profile.json"
+
+    with pytest.raises(SystemExit) as exit_info:
+        app(
+            [
+                "--profile-output",
+                str(output),
+                "sa",
+                "--since",
+                "2024-01-01",
+                "--until",
+                "2024-02-01",
+            ],
+            prog_name="gitwit",
+        )
+
+    profile = json.loads(output.read_text())
+    phases = [p["name"] for p in profile["phases"]]
+    assert exit_info.value.code == 0
+    assert profile["command"] == "sa"
+    assert {"get_filtered_commits", "table rendering"} <= set(phases)
+    assert profile["git"]["processes"] > 0
+    # only a file was asked for, so no summary on stderr
+    assert "Profile of" not in capsys.readouterr().err
+
+
+def test_format_json_keeps_stdout_for_results(git_repo, capsys):
+    git_repo.commit("add file", files={"src/app.py": "x = 1\n"}, date="2024-01-10T12:00:00Z")
+
+    with pytest.raises(SystemExit) as exit_info:
+        app(
+            ["sa", "--since", "2024-01-01", "--until", "2024-02-01", "--format", "json"],
+            prog_name="gitwit",
+        )
+
+    assert exit_info.value.code == 0
+    rows = json.loads(capsys.readouterr().out)
+    assert [(r["file"], r["commits"], r["authors"]) for r in rows] == [
+        ("src/app.py", 1, {"Default Author": 1})
+    ]
+
+
+def test_format_sends_messages_to_stderr(git_repo, capsys):
+    git_repo.commit("init", date="2024-01-10T12:00:00Z")
+
+    with pytest.raises(SystemExit):
+        app(["wte", "--path", "missing.py", "--format", "ndjson"], prog_name="gitwit")
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "does not exist" in captured.err
@@ -0,0 +1,94 @@
+import pytest
+
+from gitwit.models.author_blame import AuthorBlame
+from gitwit.utils.blame_cache import BlameCache, BlameCacheError
+from gitwit.utils.git_helpers import fetch_committed_blob_shas
+
+
+def make_blame(author="Moiraine", num_lines=1, summary="init"):
+    return AuthorBlame(author, num_lines, 1704100000, summary)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = BlameCache(tmp_path / "blame.sqlite3", max_bytes=1024 * 1024)
+    yield c
+    c.close()
+
+
+# ====================================================
+# Tests for: BlameCache
+# ====================================================
+
+
+def test_blame_cache__round_trip(cache):
+    blame = [make_blame(), make_blame(author="Lan")]
+    cache.put(("a.py", "b" * 40), blame)
+
+    assert cache.get_many([("a.py", "b" * 40), ("a.py", "c" * 40)]) == {("a.py", "b" * 40): blame}
+
+
+def test_blame_cache__persists_across_instances(tmp_path):
+    path = tmp_path / "blame.sqlite3"
+    first = BlameCache(path, max_bytes=1024 * 1024)
+    first.put(("a.py", "b" * 40), [make_blame()])
+    first.close()
+
+    second = BlameCache(path, max_bytes=1024 * 1024)
+
+    assert second.get_many([("a.py", "b" * 40)]) == {("a.py", "b" * 40): [make_blame()]}
+    second.close()
+
+
+def test_blame_cache__evicts_least_recently_used(tmp_path, mocker):
+    path = tmp_path / "blame.sqlite3"
+    clock = mocker.patch("gitwit.utils.blame_cache.time.time")
+    blames = {
+        name: [make_blame(author=f"{name} {i}", summary=f"{name} {i}" * 20) for i in range(50)]
+        for name in "abc"
+    }
+
+    cache = BlameCache(path, max_bytes=1024 * 1024)
+    for tick, name in enumerate("abc"):
+        clock.return_value = tick
+        cache.put((name, "0" * 40), blames[name])
+
+    # touching "a" makes "b" the least recently used entry
+    clock.return_value = 10
+    cache.get_many([("a", "0" * 40)])
+    sizes = [len(data) for (data,) in cache._conn.execute("SELECT data FROM blames")]
+    cache.max_bytes = sum(sizes) - 1
+    cache.close()
+
+    reopened = BlameCache(path, max_bytes=1024 * 1024)
+    keys = [(name, "0" * 40) for name in "abc"]
+
+    assert set(reopened.get_many(keys)) == {("a", "0" * 40), ("c", "0" * 40)}
+    reopened.close()
+
+
+def test_blame_cache__skips_entries_larger_than_cap(tmp_path):
+    cache = BlameCache(tmp_path / "blame.sqlite3", max_bytes=10)
+    cache.put(("a.py", "b" * 40), [make_blame()])
+
+    assert cache.get_many([("a.py", "b" * 40)]) == {}
+    cache.close()
+
+
+def test_blame_cache__unusable_path(tmp_path):
+    with pytest.raises(BlameCacheError):
+        BlameCache(tmp_path / "missing-dir" / "blame.sqlite3", max_bytes=1024)
+
+
+# ====================================================
+# Tests for: fetch_committed_blob_shas()
+# ====================================================
+
+
+def test_fetch_committed_blob_shas__skips_modified_files(git_repo):
+    git_repo.commit("init", {"src/a.py": "a\n", "src/b.py": "b\n", "c.py": "c\n"})
+    git_repo.write("src/b.py", "changed\n")
+
+    blobs = fetch_committed_blob_shas("src")
+
+    assert blobs == {"src/a.py": git_repo.git("rev-parse", "HEAD:src/a.py")}
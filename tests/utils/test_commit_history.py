@@ -0,0 +1,114 @@
+import pytest
+from git import Repo
+
+from gitwit.models.commit_record import CommitRecord, FileChange
+from gitwit.utils.commit_history import iter_commit_records, parse_numstat_log
+from gitwit.utils.git_process import GitProcessError
+
+RAW_LOG = (
+    b"\x1eaaa111\x00Rand al'Thor\x00rand@example.com\x001700000000\x001700000100\x00"
+    b"Add sword\n\nlong body\n\x00\x00\n3\t1\tsrc/sword.py\x00-\t-\timg/logo.png\x00"
+    b"\x1ebbb222\x00Egwene\x00egwene@example.com\x001600000000\x001600000050\x00"
+    b"Empty commit\n\x00"
+)
+
+
+def chunked(data: bytes, size: int):
+    view = memoryview(data)
+    chunks = []
+    while view:
+        chunks.append(bytes(view[:size]))
+        view = view[size:]
+    return chunks
+
+
+# ====================================================
+# Tests for: parse_numstat_log()
+# ====================================================
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, len(RAW_LOG)])
+def test_parse_numstat_log__chunk_boundaries(chunk_size):
+    result = list(parse_numstat_log(chunked(RAW_LOG, chunk_size)))
+
+    assert result == [
+        CommitRecord(
+            hexsha="aaa111",
+            author="Rand al'Thor",
+            author_email="rand@example.com",
+            authored_date=1700000000,
+            committed_date=1700000100,
+            message="Add sword\n\nlong body\n",
+            files=[
+                FileChange(path="src/sword.py", insertions=3, deletions=1),
+                FileChange(path="img/logo.png", insertions=0, deletions=0),
+            ],
+        ),
+        CommitRecord(
+            hexsha="bbb222",
+            author="Egwene",
+            author_email="egwene@example.com",
+            authored_date=1600000000,
+            committed_date=1600000050,
+            message="Empty commit\n",
+            files=[],
+        ),
+    ]
+
+
+def test_parse_numstat_log__empty():
+    assert list(parse_numstat_log([])) == []
+
+
+def test_parse_numstat_log__totals():
+    record = next(parse_numstat_log([RAW_LOG]))
+
+    assert record.insertions == 3
+    assert record.deletions == 1
+    assert record.lines == 4
+
+
+# ====================================================
+# Tests for: iter_commit_records()
+# ====================================================
+
+
+def test_iter_commit_records__matches_gitpython_stats(git_repo):
+    git_repo.commit("root", {"a.txt": "1\n2\n3\n", "bin.dat": b"\x00\x01"})
+    git_repo.commit("edit", {"a.txt": "1\nchanged\n3\n4\n", "dir/b.txt": "x\n"})
+    git_repo.git("checkout", "-q", "-b", "side")
+    git_repo.commit("side", {"side.txt": "s\n"}, date="2024-01-02T12:00:00+00:00")
+    git_repo.git("checkout", "-q", "main")
+    git_repo.commit("main", {"dir/b.txt": None}, date="2024-01-03T12:00:00+00:00")
+    git_repo.git("merge", "-q", "--no-edit", "--no-ff", "side")
+
+    records = {r.hexsha: r for r in iter_commit_records()}
+    commits = list(Repo(".").iter_commits())
+
+    assert set(records) == {c.hexsha for c in commits}
+    for commit in commits:
+        record = records[commit.hexsha]
+        assert record.author == commit.author.name
+        assert record.message == commit.message
+        assert record.committed_date == commit.committed_date
+        assert record.insertions == commit.stats.total["insertions"]
+        assert record.deletions == commit.stats.total["deletions"]
+        assert {f.path: f.lines for f in record.files} == {
+            path: stats["lines"] for path, stats in commit.stats.files.items()
+        }
+
+
+def test_iter_commit_records__early_stop(git_repo):
+    for i in range(5):
+        git_repo.commit(f"commit {i}", {f"f{i}.txt": "x\n"})
+
+    records = iter_commit_records()
+    first = next(records)
+    records.close()
+
+    assert first.message == "commit 4\n"
+
+
+def test_iter_commit_records__git_error(git_repo):
+    with pytest.raises(GitProcessError):
+        list(iter_commit_records("not-a-revision"))
@@ -0,0 +1,239 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import gitwit.utils.commit_index as commit_index
+from gitwit.models.commit_record import CommitRecord, FileChange
+from gitwit.utils.commit_index import SCHEMA_VERSION, CommitIndex, CommitIndexError
+from gitwit.utils.git_helpers import get_filtered_commits
+
+SINCE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+UNTIL = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+
+def make_record(sha, committed_date=1704100000, author="Perrin Aybara", files=()):
+    return CommitRecord(
+        hexsha=sha,
+        author=author,
+        author_email="perrin@example.com",
+        authored_date=committed_date,
+        committed_date=committed_date,
+        message=f"commit {sha}\n",
+        files=[FileChange(path, 2, 1) for path in files],
+    )
+
+
+def indexed_shas(index):
+    return {sha for (sha,) in index._conn.execute("SELECT sha FROM commits")}
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = CommitIndex(tmp_path / "index.sqlite3")
+    yield idx
+    idx.close()
+
+
+@pytest.fixture
+def repo_index(git_repo):
+    idx = CommitIndex.for_repo()
+    yield idx
+    idx.close()
+
+
+# ====================================================
+# Tests for: CommitIndex.add_records() / query()
+# ====================================================
+
+
+def test_commit_index__round_trip(index):
+    older = make_record("a" * 40, committed_date=1704100000, files=["z.py", "a.py"])
+    newer = make_record("b" * 40, committed_date=1704200000)
+
+    assert index.add_records([older, newer]) == 2
+    assert list(index.query(SINCE, UNTIL)) == [newer, older]
+
+
+def test_commit_index__duplicate_records_ignored(index):
+    record = make_record("a" * 40, files=["a.py"])
+
+    assert index.add_records([record]) == 1
+    assert index.add_records([record]) == 0
+    assert list(index.query(SINCE, UNTIL)) == [record]
+
+
+@pytest.mark.parametrize(
+    "since, until, directories, authors, expected",
+    [
+        (SINCE, UNTIL, None, None, ["c", "b", "a"]),
+        # inclusive on both ends
+        (datetime.fromtimestamp(1704200000, timezone.utc), UNTIL, None, None, ["c", "b"]),
+        (SINCE, datetime.fromtimestamp(1704200000, timezone.utc), None, None, ["b", "a"]),
+        (SINCE, UNTIL, ["src"], None, ["b", "a"]),
+        (SINCE, UNTIL, ["src/sub/"], None, ["b"]),
+        (SINCE, UNTIL, ["srcx", "docs"], None, ["c"]),
+        (SINCE, UNTIL, None, ["AYBARA"], ["b", "a"]),
+        (SINCE, UNTIL, None, ["jörg", "nobody"], ["c"]),
+        (SINCE, UNTIL, ["src"], ["jörg"], []),
+    ],
+)
+def test_commit_index__query_filters(index, since, until, directories, authors, expected):
+    index.add_records(
+        [
+            make_record("a", 1704100000, files=["src/a.py"]),
+            make_record("b", 1704200000, files=["src/sub/b.py", "README"]),
+            make_record("c", 1704300000, author="JÖRG", files=["srcx/c.py"]),
+        ]
+    )
+
+    result = index.query(since, until, directories, authors)
+
+    assert [r.hexsha for r in result] == expected
+
+
+def test_commit_index__records_in_the_order_given(git_repo, repo_index):
+    first = git_repo.commit("one", {"src/a.py": "1\n"})
+    repo_index.refresh()
+    # not indexed yet, so read from git
+    second = git_repo.commit("two", {"b.py": "1\n"})
+
+    records = list(repo_index.records([second, first]))
+
+    assert [r.hexsha for r in records] == [second, first]
+    assert [[f.path for f in r.files] for r in records] == [["b.py"], ["src/a.py"]]
+    assert indexed_shas(repo_index) == {first}
+
+
+def test_commit_index__rebuilt_on_schema_change(tmp_path):
+    path = tmp_path / "index.sqlite3"
+    CommitIndex(path).add_records([make_record("a" * 40)])
+
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "UPDATE meta SET value = ? WHERE key = 'schema_version'", (SCHEMA_VERSION + 1,)
+        )
+
+    reopened = CommitIndex(path)
+
+    assert list(reopened.query(SINCE, UNTIL)) == []
+
+
+def test_commit_index__unusable_path(tmp_path):
+    with pytest.raises(CommitIndexError):
+        CommitIndex(tmp_path / "missing-dir" / "index.sqlite3")
+
+
+# ====================================================
+# Tests for: CommitIndex.refresh()
+# ====================================================
+
+
+def test_refresh__empty_repository(repo_index):
+    assert repo_index.refresh() == 0
+    assert indexed_shas(repo_index) == set()
+
+
+def test_refresh__only_reads_new_commits(git_repo, repo_index, mocker):
+    first = git_repo.commit("one", {"a.py": "1\n"})
+    assert repo_index.refresh() == 1
+
+    second = git_repo.commit("two", {"a.py": "2\n"})
+    spy = mocker.spy(commit_index, "iter_commit_records")
+
+    assert repo_index.refresh() == 1
+    spy.assert_called_once_with(second, f"^{first}")
+    assert indexed_shas(repo_index) == {first, second}
+
+
+def test_refresh__noop_when_tips_unchanged(git_repo, repo_index, mocker):
+    git_repo.commit("one", {"a.py": "1\n"})
+    repo_index.refresh()
+    spy = mocker.spy(commit_index, "iter_commit_records")
+
+    assert repo_index.refresh() == 0
+    spy.assert_not_called()
+
+
+def test_refresh__force_push_collects_unreachable(git_repo, repo_index):
+    base = git_repo.commit("base", {"a.py": "1\n"})
+    rewritten = git_repo.commit("to be rewritten", {"a.py": "2\n"})
+    repo_index.refresh()
+
+    git_repo.git("reset", "-q", "--hard", base)
+    replacement = git_repo.commit("replacement", {"b.py": "1\n"})
+    repo_index.refresh()
+
+    assert rewritten not in indexed_shas(repo_index)
+    assert indexed_shas(repo_index) == {base, replacement}
+
+
+def test_refresh__branch_switch_round_trip(git_repo, repo_index):
+    base = git_repo.commit("base", {"a.py": "1\n"})
+    git_repo.git("checkout", "-q", "-b", "feature")
+    feature = git_repo.commit("feature", {"f.py": "1\n"})
+    repo_index.refresh()
+
+    git_repo.git("checkout", "-q", "main")
+    repo_index.refresh()
+    assert indexed_shas(repo_index) == {base}
+
+    git_repo.git("checkout", "-q", "feature")
+    repo_index.refresh()
+    assert indexed_shas(repo_index) == {base, feature}
+
+
+def test_refresh__old_tip_pruned_from_repository(git_repo, repo_index):
+    base = git_repo.commit("base", {"a.py": "1\n"})
+    repo_index.refresh()
+
+    # simulate a tip that `git gc` has since pruned, plus the commit it pointed at
+    pruned = "f" * 40
+    repo_index.add_records([make_record(pruned)])
+    with repo_index._conn:
+        repo_index._conn.execute("UPDATE ref_tips SET sha = ?", (pruned,))
+
+    new = git_repo.commit("new", {"b.py": "1\n"})
+    repo_index.refresh()
+
+    assert indexed_shas(repo_index) == {base, new}
+
+
+# ====================================================
+# Tests for: get_filtered_commits() backed by the index
+# ====================================================
+
+
+@pytest.fixture
+def small_history(git_repo):
+    git_repo.commit("one", {"src/a.py": "1\n"}, date="2024-01-02T00:00:00Z")
+    git_repo.commit("two", {"src/a.py": "1\n2\n", "b.py": "x\n"}, date="2024-01-03T00:00:00Z")
+    return git_repo
+
+
+def test_get_filtered_commits__history_only_read_once(small_history, mocker):
+    first = list(get_filtered_commits(SINCE, UNTIL))
+    spy = mocker.spy(commit_index, "iter_commit_records")
+
+    second = list(get_filtered_commits(SINCE, UNTIL))
+
+    assert [c.message for c in first] == ["two\n", "one\n"]
+    assert second == first
+    spy.assert_not_called()
+
+
+def test_get_filtered_commits__new_commits_visible(small_history):
+    list(get_filtered_commits(SINCE, UNTIL))
+    small_history.commit("three", {"c.py": "x\n"}, date="2024-01-04T00:00:00Z")
+
+    result = list(get_filtered_commits(SINCE, UNTIL))
+
+    assert [c.message for c in result] == ["three\n", "two\n", "one\n"]
+
+
+def test_get_filtered_commits__falls_back_without_index(small_history, mocker):
+    mocker.patch.object(CommitIndex, "for_repo", side_effect=CommitIndexError("read-only"))
+
+    result = list(get_filtered_commits(SINCE, UNTIL))
+
+    assert [(c.message, c.lines) for c in result] == [("two\n", 2), ("one\n", 1)]
@@ -0,0 +1,41 @@
+import io
+import threading
+
+from rich.console import Console
+
+from gitwit.utils.console_singleton import ConsoleSingleton
+
+
+def test_redirected_swaps_the_console_without_modifying_the_shared_one(monkeypatch):
+    shared = Console(file=io.StringIO(), width=120)
+    monkeypatch.setattr(ConsoleSingleton, "_console", shared)
+    redirected = Console(file=io.StringIO(), width=40)
+
+    with ConsoleSingleton.redirected(redirected) as console:
+        assert console is redirected
+        ConsoleSingleton.get_console().print("inside")
+
+        with ConsoleSingleton.redirected(Console(file=io.StringIO())):
+            assert ConsoleSingleton.get_console() is not redirected
+        assert ConsoleSingleton.get_console() is redirected
+
+    ConsoleSingleton.get_console().print("outside")
+
+    assert redirected.file.getvalue() == "inside\n"
+    assert shared.file.getvalue() == "outside\n"
+    assert shared.width == 120
+
+
+def test_redirected_only_applies_to_the_thread_that_made_it(monkeypatch):
+    shared = Console(file=io.StringIO())
+    monkeypatch.setattr(ConsoleSingleton, "_console", shared)
+    seen_by_other_thread = []
+
+    with ConsoleSingleton.redirected(Console(file=io.StringIO())):
+        thread = threading.Thread(
+            target=lambda: seen_by_other_thread.append(ConsoleSingleton.get_console())
+        )
+        thread.start()
+        thread.join()
+
+    assert seen_by_other_thread == [shared]
@@ -1,77 +1,82 @@
-from git import Repo
+import functools
+import io
+
 import pytest
-from unittest.mock import MagicMock, patch
-from gitwit.utils.fetch_git_log_entries import fetch_git_log_entries_of_added_files
+
 from gitwit.models.git_log_entry import GitLogEntry
+from gitwit.utils.fetch_git_log_entries import (
+    iter_git_log_entries_of_added_files,
+    parse_added_files_log,
+)
 
 
-@pytest.fixture
-def mock_repo():
-    with patch("gitwit.utils.repo_singleton.RepoSingleton.get_repo") as mock_get_repo:
-        mock_repo_instance = MagicMock(spec=Repo)
-        mock_get_repo.return_value = mock_repo_instance
-        yield mock_repo_instance
+def log_bytes(*commits):
+    """Render commits as `git log -z --name-only --format=ADDED_FILES_LOG_FORMAT` would."""
+    out = b""
+    for commit_hash, authored_date, author, files in commits:
+        out += f"\x1e{commit_hash}\0{authored_date}\0{author}\0".encode()
+        out += b"\n" if files else b""
+        out += b"".join(f"{f}\0".encode() for f in files)
+    return out
 
 
-def test_fetch_git_log_entries__commit_with_multiple_files(mock_repo):
-    mock_repo.git.log.return_value = (
-        "hash1\x002023-01-01T12:00:00Z\x00Rand al'Thor\n" "file1.txt\n" "file2.txt\n"
-    )
+def parse(data, chunk_size=1 << 16):
+    chunks = iter(functools.partial(io.BytesIO(data).read, chunk_size), b"")
+    return list(parse_added_files_log(chunks))
 
-    result = fetch_git_log_entries_of_added_files()
 
-    assert len(result) == 1
-    assert result[0] == GitLogEntry(
-        commit_hash="hash1",
-        created_at_iso="2023-01-01T12:00:00Z",
-        author="Rand al'Thor",
-        files=["file1.txt", "file2.txt"],
-    )
+# ====================================================
+# Tests for: parse_added_files_log()
+# ====================================================
 
 
-def test_fetch_git_log_entries__multiple_commits(mock_repo):
-    mock_repo.git.log.return_value = (
-        "hash1\x002023-01-01T12:00:00Z\x00Moiraine Damodred\n"
-        "file1.txt\n"
-        "file2.txt\n"
-        "hash2\x002023-01-02T13:00:00Z\x00al'Lan Mandragoran\n"
-        "file3.txt\n"
-    )
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_parse_added_files_log__commit_with_multiple_files(chunk_size):
+    data = log_bytes(("hash1", 1672574400, "Rand al'Thor", ["file1.txt", "file2.txt"]))
 
-    result = fetch_git_log_entries_of_added_files()
+    result = parse(data, chunk_size)
 
-    assert len(result) == 2
-    assert result[0] == GitLogEntry(
-        commit_hash="hash1",
-        created_at_iso="2023-01-01T12:00:00Z",
-        author="Moiraine Damodred",
-        files=["file1.txt", "file2.txt"],
-    )
-    assert result[1] == GitLogEntry(
-        commit_hash="hash2",
-        created_at_iso="2023-01-02T13:00:00Z",
-        author="al'Lan Mandragoran",
-        files=["file3.txt"],
+    assert result == [GitLogEntry("hash1", 1672574400, "Rand al'Thor", ["file1.txt", "file2.txt"])]
+
+
+def test_parse_added_files_log__multiple_commits():
+    data = log_bytes(
+        ("hash2", 1672664400, "al'Lan Mandragoran", ["file3.txt"]),
+        ("hash1", 1672574400, "Moiraine Damodred", ["file1.txt", "file2.txt"]),
     )
 
+    result = parse(data)
 
-def test_fetch_git_log__commit_with_no_files(mock_repo):
-    mock_repo.git.log.return_value = "hash1\x002023-01-01T12:00:00Z\x00Mat Cauthon\n"
+    assert result == [
+        GitLogEntry("hash2", 1672664400, "al'Lan Mandragoran", ["file3.txt"]),
+        GitLogEntry("hash1", 1672574400, "Moiraine Damodred", ["file1.txt", "file2.txt"]),
+    ]
 
-    result = fetch_git_log_entries_of_added_files()
 
-    assert len(result) == 1
-    assert result[0] == GitLogEntry(
-        commit_hash="hash1",
-        created_at_iso="2023-01-01T12:00:00Z",
-        author="Mat Cauthon",
-        files=[],
-    )
+def test_parse_added_files_log__commit_with_no_files():
+    result = parse(log_bytes(("hash1", 1672574400, "Mat Cauthon", [])))
+
+    assert result == [GitLogEntry("hash1", 1672574400, "Mat Cauthon", [])]
+
+
+def test_parse_added_files_log__no_commits():
+    assert parse(b"") == []
+
+
+# ====================================================
+# Tests for: iter_git_log_entries_of_added_files()
+# ====================================================
 
 
-def test_fetch_git_log_entries_of_added_files_no_commits(mock_repo):
-    mock_repo.git.log.return_value = ""
+def test_iter_git_log_entries_of_added_files(git_repo):
+    first = git_repo.commit("one", {"a.py": "1\n", "b.py": "1\n"}, date="2024-01-01T00:00:00Z")
+    git_repo.commit("edit only", {"a.py": "2\n"}, date="2024-01-02T00:00:00Z")
+    third = git_repo.commit("three", {"c.py": "1\n"}, author="Egwene", date="2024-01-03T00:00:00Z")
 
-    result = fetch_git_log_entries_of_added_files()
+    result = list(iter_git_log_entries_of_added_files())
 
-    assert result == []
+    assert result == [
+        GitLogEntry(third, 1704240000, "Egwene", ["c.py"]),
+        GitLogEntry(first, 1704067200, "Default Author", ["a.py", "b.py"]),
+    ]
+    assert result[0].authored_datetime.isoformat() == "2024-01-03T00:00:00+00:00"
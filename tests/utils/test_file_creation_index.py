@@ -0,0 +1,90 @@
+import pytest
+
+import gitwit.utils.file_creation_index as file_creation_index
+from gitwit.models.file_creation import FileCreation
+from gitwit.utils.file_creation_index import FileCreationIndex, FileCreationIndexError
+
+
+@pytest.fixture
+def index(git_repo):
+    idx = FileCreationIndex.for_repo()
+    yield idx
+    idx.close()
+
+
+def creations(index, *paths):
+    return sorted(index.lookup(paths), key=lambda c: c.path)
+
+
+# ====================================================
+# Tests for: FileCreationIndex.refresh() / lookup()
+# ====================================================
+
+
+def test_file_creation_index__empty_repository(index):
+    assert index.refresh() == 0
+    assert index.lookup(["a.py"]) == []
+
+
+def test_file_creation_index__records_adding_commit(git_repo, index):
+    first = git_repo.commit("one", {"a.py": "1\n"}, author="Rand", date="2024-01-01T00:00:00Z")
+    git_repo.commit("edit", {"a.py": "2\n"}, author="Mat", date="2024-01-02T00:00:00Z")
+    second = git_repo.commit("two", {"b.py": "1\n"}, author="Perrin", date="2024-01-03T00:00:00Z")
+
+    assert index.refresh() == 2
+    assert creations(index, "a.py", "b.py", "missing.py") == [
+        FileCreation("a.py", first, "Rand", 1704067200),
+        FileCreation("b.py", second, "Perrin", 1704240000),
+    ]
+
+
+def test_file_creation_index__only_reads_new_commits(git_repo, index, mocker):
+    first = git_repo.commit("one", {"a.py": "1\n"})
+    index.refresh()
+
+    second = git_repo.commit("two", {"b.py": "1\n"})
+    spy = mocker.spy(file_creation_index, "iter_git_log_entries_of_added_files")
+
+    assert index.refresh() == 1
+    spy.assert_called_once_with(second, f"^{first}")
+    assert [c.path for c in creations(index, "a.py", "b.py")] == ["a.py", "b.py"]
+
+
+def test_file_creation_index__noop_when_head_unchanged(git_repo, index, mocker):
+    git_repo.commit("one", {"a.py": "1\n"})
+    index.refresh()
+    spy = mocker.spy(file_creation_index, "iter_git_log_entries_of_added_files")
+
+    assert index.refresh() == 0
+    spy.assert_not_called()
+
+
+def test_file_creation_index__readded_file_uses_newest_add(git_repo, index):
+    git_repo.commit("add", {"a.py": "1\n"})
+    index.refresh()
+    git_repo.commit("remove", {"a.py": None})
+    readded = git_repo.commit("re-add", {"a.py": "2\n"}, author="Egwene")
+
+    index.refresh()
+
+    assert [(c.commit_hash, c.author) for c in index.lookup(["a.py"])] == [(readded, "Egwene")]
+
+
+def test_file_creation_index__rebuilt_after_rewrite(git_repo, index):
+    base = git_repo.commit("base", {"a.py": "1\n"})
+    git_repo.commit("to be rewritten", {"b.py": "1\n"})
+    index.refresh()
+
+    git_repo.git("reset", "-q", "--hard", base)
+    replacement = git_repo.commit("replacement", {"c.py": "1\n"})
+    index.refresh()
+
+    assert [(c.path, c.commit_hash) for c in creations(index, "a.py", "b.py", "c.py")] == [
+        ("a.py", base),
+        ("c.py", replacement),
+    ]
+
+
+def test_file_creation_index__unusable_path(tmp_path):
+    with pytest.raises(FileCreationIndexError):
+        FileCreationIndex(tmp_path / "missing-dir" / "index.sqlite3")
@@ -0,0 +1,233 @@
+"""
+Equivalence tests for get_filtered_commits: the author and directory filters pushed down
+into git must select exactly the commits the original python-only filters selected.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from git import Repo
+
+from conftest import use_repo
+from gitwit.utils.commit_index import CommitIndex, CommitIndexError
+from gitwit.utils.git_helpers import get_filtered_commits
+
+SINCE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+UNTIL = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+
+def reference_filtered_commits(since, until, directories=None, authors=None):
+    """The original python filter semantics, evaluated over GitPython commits."""
+    repo = Repo(".")
+
+    for commit in repo.iter_commits(since=since.isoformat(), until=until.isoformat()):
+        if authors and not any(a.lower() in commit.author.name.lower() for a in authors):
+            continue
+
+        if directories and not any(
+            str(f).startswith(d.rstrip("/") + "/") for f in commit.stats.files for d in directories
+        ):
+            continue
+        yield commit.hexsha
+
+
+@pytest.fixture(scope="module")
+def built_history(module_git_repo):
+    git_repo = module_git_repo
+
+    def day(n):
+        return f"2024-01-{n:02d}T12:00:00+00:00"
+
+    git_repo.commit(
+        "root",
+        {"src/app.py": "1\n", "docs/index.md": "1\n", "README": "1\n"},
+        author="Jack Smith",
+        email="jack@example.com",
+        date=day(1),
+    )
+    git_repo.commit(
+        "nested",
+        {"src/sub/mod.py": "1\n"},
+        author="Jane Doe",
+        email="jane@example.com",
+        date=day(2),
+    )
+    git_repo.commit(
+        "prefix lookalike",
+        {"srcx/other.py": "1\n"},
+        author="Raja Patel",
+        email="raja@example.com",
+        date=day(3),
+    )
+    git_repo.commit(
+        "email only match",
+        {"docs/guide.md": "1\n"},
+        author="Michael Brown",
+        email="jam@example.com",
+        date=day(4),
+    )
+    git_repo.commit(
+        "glob characters in path",
+        {"lib/[x]/a.py": "1\n", "lib/y/b.py": "1\n"},
+        author="JOHN DOE",
+        email="john@example.com",
+        date=day(5),
+    )
+    git_repo.commit(
+        "non ascii author",
+        {"src/app.py": "1\n2\n"},
+        author="Jörg Ångström",
+        email="jorg@example.com",
+        date=day(6),
+    )
+
+    git_repo.git("checkout", "-q", "-b", "side")
+    git_repo.commit(
+        "side branch src change",
+        {"src/side.py": "1\n"},
+        author="Jack Smith",
+        email="jack@example.com",
+        date=day(7),
+    )
+    git_repo.git("checkout", "-q", "main")
+    git_repo.commit(
+        "main branch docs change",
+        {"docs/index.md": "1\n2\n"},
+        author="Jane Doe",
+        email="jane@example.com",
+        date=day(8),
+    )
+    merge_env = {"GIT_AUTHOR_DATE": day(9), "GIT_COMMITTER_DATE": day(9)}
+    git_repo.git("merge", "-q", "--no-ff", "-m", "merge side", "side", env=merge_env)
+
+    git_repo.commit(
+        "move across dirs",
+        {"src/sub/mod.py": None, "docs/mod.py": "1\n"},
+        author="Michael Brown",
+        email="michael@example.com",
+        date=day(10),
+    )
+    git_repo.commit(
+        "outside window", {"src/late.py": "1\n"}, author="Jack Smith", date="2024-03-01T12:00:00Z"
+    )
+    return git_repo
+
+
+@pytest.fixture(params=["index", "git"])
+def history(request, built_history, monkeypatch, mocker):
+    """Run each test against the commit index and against the streaming git fallback."""
+    if request.param == "git":
+        mocker.patch.object(CommitIndex, "for_repo", side_effect=CommitIndexError("disabled"))
+    return use_repo(monkeypatch, built_history)
+
+
+@pytest.fixture
+def no_index(mocker):
+    mocker.patch.object(CommitIndex, "for_repo", side_effect=CommitIndexError("disabled"))
+
+
+@pytest.mark.parametrize(
+    "authors",
+    [
+        None,
+        ["jack"],
+        ["ja"],  # substring of several first names, and of an email only
+        ["JOHN doe"],  # case insensitive
+        ["smith", "brown"],  # OR of several authors
+        ["jam"],  # only matches an email address, never a name
+        ["jörg"],  # non ascii, case insensitive
+        ["ÅNGSTRÖM"],
+        ["nobody"],
+    ],
+)
+@pytest.mark.parametrize(
+    "directories",
+    [
+        None,
+        ["src"],
+        ["src/"],
+        ["src/sub"],
+        ["docs", "lib"],
+        ["srcx"],
+        ["README"],  # a file, not a directory
+        ["missing"],
+    ],
+)
+def test_get_filtered_commits__matches_python_filters(history, authors, directories):
+    expected = list(reference_filtered_commits(SINCE, UNTIL, directories, authors))
+
+    result = [
+        c.hexsha
+        for c in get_filtered_commits(SINCE, UNTIL, directories=directories, authors=authors)
+    ]
+
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "directories, expected",
+    [
+        (["lib/*"], ["glob characters in path"]),
+        (["*/sub"], ["move across dirs", "nested"]),
+        (["**/y"], ["glob characters in path"]),
+        (["src/*.py"], []),  # a file glob names no directory
+        (["lib/[x]"], []),  # a character class, matching lib/x/ only
+        (["lib/\\[x]"], ["glob characters in path"]),  # escaped, the directory lib/[x]/
+    ],
+)
+def test_get_filtered_commits__directory_globs(history, directories, expected):
+    result = [
+        c.message.strip() for c in get_filtered_commits(SINCE, UNTIL, directories=directories)
+    ]
+
+    assert result == expected
+
+
+def test_get_filtered_commits__glob_pushed_into_git_as_literal_prefix(no_index, mocker):
+    mock_iter = mocker.patch("gitwit.utils.git_helpers.iter_commit_records", return_value=[])
+
+    list(get_filtered_commits(SINCE, UNTIL, directories=["services/*/tests", "docs"]))
+
+    assert mock_iter.call_args.kwargs["paths"] == [":(literal)services/", ":(literal)docs/"]
+
+
+def test_get_filtered_commits__escaped_glob_pushed_into_git_unescaped(no_index, mocker):
+    mock_iter = mocker.patch("gitwit.utils.git_helpers.iter_commit_records", return_value=[])
+
+    list(get_filtered_commits(SINCE, UNTIL, directories=["lib/\\[x]/\\*"]))
+
+    assert mock_iter.call_args.kwargs["paths"] == [":(literal)lib/[x]/*/"]
+
+
+def test_get_filtered_commits__leading_glob_not_pushed_into_git(no_index, mocker):
+    mock_iter = mocker.patch("gitwit.utils.git_helpers.iter_commit_records", return_value=[])
+
+    list(get_filtered_commits(SINCE, UNTIL, directories=["**/tests", "docs"]))
+
+    assert mock_iter.call_args.kwargs["paths"] is None
+
+
+def test_get_filtered_commits__merge_included_for_side_branch_directory(history):
+    result = [c.message.strip() for c in get_filtered_commits(SINCE, UNTIL, directories=["src"])]
+
+    assert "merge side" in result
+
+
+def test_get_filtered_commits__filters_are_pushed_into_git(no_index, mocker):
+    mock_iter = mocker.patch("gitwit.utils.git_helpers.iter_commit_records", return_value=[])
+
+    list(get_filtered_commits(SINCE, UNTIL, directories=["src/", "docs"], authors=["Jack"]))
+
+    rev_args = mock_iter.call_args.args
+    assert "--author=Jack" in rev_args
+    assert "--regexp-ignore-case" in rev_args
+    assert "--fixed-strings" in rev_args
+    assert mock_iter.call_args.kwargs["paths"] == [":(literal)src/", ":(literal)docs/"]
+
+
+def test_get_filtered_commits__non_ascii_authors_filtered_in_python(no_index, mocker):
+    mock_iter = mocker.patch("gitwit.utils.git_helpers.iter_commit_records", return_value=[])
+
+    list(get_filtered_commits(SINCE, UNTIL, authors=["jörg"]))
+
+    assert not any(arg.startswith("--author") for arg in mock_iter.call_args.args)
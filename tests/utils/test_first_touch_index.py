@@ -0,0 +1,130 @@
+import sqlite3
+
+import pytest
+
+import gitwit.utils.first_touch_index as first_touch_index
+import gitwit.utils.storage as storage
+from gitwit.utils.commit_index import CommitIndexError
+from gitwit.utils.first_touch_index import FirstTouchIndex, FirstTouchIndexError, file_areas
+
+
+@pytest.fixture
+def index(git_repo):
+    idx = FirstTouchIndex.for_repo()
+    yield idx
+    idx.close()
+
+
+# ====================================================
+# Tests for: FirstTouchIndex.refresh() / first_areas()
+# ====================================================
+
+
+def test_first_touch_index__empty_repository(index):
+    assert index.refresh() == 0
+    assert index.first_areas(["abc"]) == {}
+
+
+def test_first_touch_index__records_oldest_change_per_author_and_area(git_repo, index):
+    first = git_repo.commit("one", {"a.py": "1\n"}, author="Rand", date="2024-01-01T00:00:00Z")
+    edit = git_repo.commit("edit", {"a.py": "2\n"}, author="Rand", date="2024-01-02T00:00:00Z")
+    other = git_repo.commit("two", {"b.py": "1\n"}, author="Mat", date="2024-01-03T00:00:00Z")
+
+    assert index.refresh() == 3
+    assert index.first_areas([first, edit, other, "missing"]) == {first: [""], other: [""]}
+
+
+def test_first_touch_index__first_areas_per_author(git_repo, index):
+    first = git_repo.commit("one", {"src/a.py": "1\n", "README": "1\n"}, author="Rand")
+    second = git_repo.commit("two", {"src/a.py": "2\n"}, author="Mat")
+    third = git_repo.commit("three", {"src/b.py": "1\n", "docs/x.md": "1\n"}, author="Rand")
+    fourth = git_repo.commit("four", {"src/api/c.py": "1\n"}, author="Mat")
+
+    index.refresh()
+
+    assert index.first_areas([first, second, third, fourth]) == {
+        first: ["", "src"],
+        second: ["src"],
+        third: ["docs"],
+        fourth: ["src/api"],
+    }
+
+
+def test_first_touch_index__only_reads_new_commits(git_repo, index, mocker):
+    first = git_repo.commit("one", {"src/a.py": "1\n"}, author="Rand")
+    index.refresh()
+
+    second = git_repo.commit("two", {"src/b.py": "1\n"}, author="Rand")
+    spy = mocker.spy(first_touch_index.CommitIndex, "records")
+
+    assert index.refresh() == 1
+    assert spy.call_args.args[1] == [second]
+    assert index.first_areas([first, second]) == {first: ["src"]}
+
+
+def test_first_touch_index__noop_when_head_unchanged(git_repo, index, mocker):
+    git_repo.commit("one", {"a.py": "1\n"})
+    index.refresh()
+    spy = mocker.spy(first_touch_index.CommitIndex, "records")
+
+    assert index.refresh() == 0
+    spy.assert_not_called()
+
+
+def test_first_touch_index__skips_merges(git_repo, index):
+    git_repo.commit("one", {"a.py": "1\n"}, author="Rand")
+    git_repo.git("checkout", "-q", "-b", "feature")
+    branch = git_repo.commit("lib", {"lib/b.py": "1\n"}, author="Mat")
+    git_repo.git("checkout", "-q", "main")
+    git_repo.commit("two", {"a.py": "2\n"}, author="Rand")
+    git_repo.git("merge", "-q", "--no-ff", "-m", "merge", "feature")
+    merge = git_repo.git("rev-parse", "HEAD")
+
+    index.refresh()
+
+    # the merge's first-parent diff holds lib/b.py, but Mat changed lib first
+    assert index.first_areas([branch, merge]) == {branch: ["lib"]}
+
+
+def test_first_touch_index__wraps_commit_index_errors(git_repo, index, mocker):
+    git_repo.commit("one", {"a.py": "1\n"})
+    mocker.patch.object(
+        first_touch_index.CommitIndex, "for_repo", side_effect=CommitIndexError("read-only")
+    )
+
+    with pytest.raises(FirstTouchIndexError):
+        index.refresh()
+
+
+def test_first_touch_index__rebuilds_after_history_rewrite(git_repo, index):
+    git_repo.commit("one", {"a.py": "1\n"}, author="Rand")
+    dropped = git_repo.commit("two", {"lib/b.py": "1\n"}, author="Rand")
+    index.refresh()
+
+    git_repo.git("reset", "-q", "--hard", "HEAD~1")
+    rewritten = git_repo.commit("two again", {"lib/c.py": "1\n"}, author="Rand")
+
+    index.refresh()
+
+    assert index.first_areas([rewritten]) == {rewritten: ["lib"]}
+    assert index.first_areas([dropped]) == {}
+
+
+def test_first_touch_index__for_repo_wraps_open_errors(git_repo, mocker):
+    mocker.patch.object(storage, "open_database", side_effect=sqlite3.Error("boom"))
+
+    with pytest.raises(FirstTouchIndexError):
+        FirstTouchIndex.for_repo()
+
+
+# ====================================================
+# Tests for: file_areas()
+# ====================================================
+
+
+def test_file_areas():
+    assert file_areas(["src/a.py", "src/b.py", "README", "src/api/c.py"]) == [
+        "src",
+        "",
+        "src/api",
+    ]
@@ -1,3 +1,5 @@
+import functools
+import io
 import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta
@@ -5,10 +7,16 @@ from gitwit.utils.git_helpers import (
     get_filtered_commits,
     fetch_file_paths_tracked_by_git,
     fetch_file_gitblame,
+    fetch_file_blame_authors,
+    fetch_blob_sizes,
+    fetch_paths_excluded_by_attributes,
     BlameFetchError,
+    _summarize_porcelain_blame,
 )
+from gitwit.models.author_blame import AuthorBlame
 from gitwit.models.blame_line import BlameLine
-from git import Commit, Repo
+from gitwit.models.commit_record import CommitRecord, FileChange
+from git import Repo
 from pathlib import Path
 
 FIXED_NOW = datetime(2023, 1, 1, 12, 0, 0)
@@ -22,6 +30,24 @@ def mock_repo():
         yield mock_repo_instance
 
 
+@pytest.fixture
+def mock_commit_records():
+    with patch("gitwit.utils.git_helpers._fetch_commits") as mock_fetch:
+        yield mock_fetch
+
+
+def make_record(author="Jack Smith", file_paths=()):
+    return CommitRecord(
+        hexsha="abc123",
+        author=author,
+        author_email="dev@example.com",
+        authored_date=0,
+        committed_date=0,
+        message="msg",
+        files=[FileChange(path=p, insertions=1, deletions=0) for p in file_paths],
+    )
+
+
 # ====================================================
 # Tests for: get_filtered_commits()
 # ====================================================
@@ -39,10 +65,11 @@ def mock_repo():
         (["jOHn dOe"], "John Doe", True),  # CApitalisation mismatch
     ],
 )
-def test_get_filtered_commits__author_filter(mock_repo, authors, commit_author, expected_match):
-    commit = MagicMock(spec=Commit)
-    commit.author.name = commit_author
-    mock_repo.iter_commits.return_value = [commit]
+def test_get_filtered_commits__author_filter(
+    mock_commit_records, authors, commit_author, expected_match
+):
+    commit = make_record(author=commit_author)
+    mock_commit_records.return_value = [commit]
 
     since = FIXED_NOW - timedelta(days=1)
     until = FIXED_NOW
@@ -66,10 +93,11 @@ def test_get_filtered_commits__author_filter(mock_repo, authors, commit_author,
         (["src"], ["lib/file.py"], False),
     ],
 )
-def test_get_filtered_commits__directory_filter(mock_repo, directories, file_paths, expected_match):
-    commit = MagicMock(spec=Commit)
-    commit.stats.files = {f: {} for f in file_paths}
-    mock_repo.iter_commits.return_value = [commit]
+def test_get_filtered_commits__directory_filter(
+    mock_commit_records, directories, file_paths, expected_match
+):
+    commit = make_record(file_paths=file_paths)
+    mock_commit_records.return_value = [commit]
 
     since = FIXED_NOW - timedelta(days=1)
     until = FIXED_NOW
@@ -93,6 +121,8 @@ def test_get_filtered_commits__directory_filter(mock_repo, directories, file_pat
     [
         ("test", ["tests"], ["tests/test_main.py"]),
         ("main", ["src"], ["src/main.py"]),
+        ("main", ["*"], ["src/main.py", "tests/test_main.py"]),
+        ("main", ["s*"], ["src/main.py"]),
         ("md", [], ["README.md"]),
         ("nonexistent", [], []),
     ],
@@ -154,3 +184,137 @@ def test_fetch_file_gitblame__error(mock_repo):
 
     with pytest.raises(BlameFetchError, match="failed to fetch or parse blame"):
         fetch_file_gitblame(mock_repo, Path("src/main.py"))
+
+
+# ====================================================
+# Tests for: fetch_file_blame_authors()
+# ====================================================
+
+
+def porcelain_commit(name, time, summary):
+    """The metadata lines porcelain prints after a commit's first header."""
+    return [
+        f"author {name}",
+        f"author-mail <{name}@example.com>",
+        f"author-time {time}",
+        "author-tz +0000",
+        f"committer {name}",
+        f"committer-mail <{name}@example.com>",
+        f"committer-time {time}",
+        "committer-tz +0000",
+        f"summary {summary}",
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_summarize_porcelain_blame__folds_hunks(chunk_size):
+    a, b, c = "a" * 40, "b" * 40, "c" * 40
+    output = "".join(
+        f"{line}\n"
+        for line in [
+            f"{a} 1 1 2",
+            *porcelain_commit("Rand", 100, "first"),
+            "filename src/main.py",
+            "\tone",
+            f"{a} 2 2",
+            "\tauthor Mallory",
+            f"{b} 3 3 1",
+            *porcelain_commit("Mat", 200, "second"),
+            "filename src/main.py",
+            "\t\tthree looks like a header 1 2 3",
+            # metadata is only printed the first time a commit appears
+            f"{a} 3 4 1",
+            "filename src/main.py",
+            "\tfour",
+            f"{c} 5 5 1",
+            *porcelain_commit("Rand", 300, "third"),
+            "previous " + a + " src/main.py",
+            "filename src/main.py",
+            "\tfive",
+        ]
+    ).encode()
+    chunks = list(iter(functools.partial(io.BytesIO(output).read, chunk_size), b""))
+
+    result = _summarize_porcelain_blame(chunks)
+
+    assert sorted(result, key=lambda r: r.author) == [
+        AuthorBlame("Mat", 1, 200, "second"),
+        AuthorBlame("Rand", 4, 300, "third"),
+    ]
+
+
+def test_fetch_file_blame_authors__matches_line_blame(git_repo):
+    git_repo.commit("one", {"a.py": "1\n2\n3\n"}, author="Rand", date="2024-01-01T00:00:00Z")
+    git_repo.commit("two", {"a.py": "1\nx\n3\ny\n"}, author="Mat", date="2024-01-02T00:00:00Z")
+    git_repo.commit("three", {"a.py": "z\nx\n3\ny\n"}, author="Rand", date="2024-01-03T00:00:00Z")
+    repo = Repo(".")
+
+    lines = fetch_file_gitblame(repo, Path("a.py"))
+    result = fetch_file_blame_authors(repo, Path("a.py"))
+
+    by_author = {r.author: r for r in result}
+    assert {a: r.num_lines for a, r in by_author.items()} == {"Rand": 2, "Mat": 2}
+    assert by_author["Rand"].summary == "three"
+    assert by_author["Rand"].author_time == max(
+        line.author_time for line in lines if line.author == "Rand"
+    )
+
+
+def test_fetch_file_blame_authors__error(git_repo):
+    git_repo.commit("one", {"a.py": "1\n"})
+
+    with pytest.raises(BlameFetchError, match="failed to fetch or parse blame"):
+        fetch_file_blame_authors(Repo("."), Path("missing.py"))
+
+
+# ====================================================
+# Tests for: fetch_blob_sizes()
+# ====================================================
+
+
+def test_fetch_blob_sizes(git_repo):
+    git_repo.commit("init", {"a.py": "12345\n", "src/b.py": "1\n"})
+    git_repo.write("untracked.py", "x\n")
+
+    sizes = fetch_blob_sizes(["src/b.py", "untracked.py", "a.py", "odd\nname.py"])
+
+    assert sizes == {"a.py": 6, "src/b.py": 2}
+
+
+def test_fetch_blob_sizes__no_paths(git_repo):
+    assert fetch_blob_sizes([]) == {}
+
+
+# ====================================================
+# Tests for: fetch_paths_excluded_by_attributes()
+# ====================================================
+
+
+def test_fetch_paths_excluded_by_attributes(git_repo):
+    git_repo.commit(
+        "init",
+        {
+            ".gitattributes": (
+                "dist/** linguist-generated\n"
+                "vendor/** linguist-vendored=true\n"
+                "*.lock -diff\n"
+                "*.png binary\n"
+                "keep/** linguist-generated=false\n"
+            ),
+            "src/app.py": "x\n",
+            "dist/bundle.min.js": "x\n",
+            "vendor/lib.py": "x\n",
+            "poetry.lock": "x\n",
+            "logo.png": "x\n",
+            "keep/gen.py": "x\n",
+        },
+    )
+    paths = git_repo.git("ls-files").splitlines()
+
+    excluded = fetch_paths_excluded_by_attributes(paths)
+
+    assert excluded == {"dist/bundle.min.js", "vendor/lib.py", "poetry.lock", "logo.png"}
+
+
+def test_fetch_paths_excluded_by_attributes__no_paths(git_repo):
+    assert fetch_paths_excluded_by_attributes([]) == set()
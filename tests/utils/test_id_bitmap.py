@@ -0,0 +1,86 @@
+import random
+import sys
+
+import pytest
+
+from gitwit.utils.id_bitmap import ARRAY_MAX_SIZE, CHUNK_BITS, IdBitmap, Interner
+
+# ====================================================
+# Tests for: Interner
+# ====================================================
+
+
+def test_interner__dense_ids_in_order_of_first_appearance():
+    interner = Interner()
+
+    ids = [interner.intern(v) for v in ["b", "a", "b", "c", "a"]]
+
+    assert ids == [0, 1, 0, 2, 1]
+    assert interner.values == ["b", "a", "c"]
+    assert len(interner) == 3
+
+
+# ====================================================
+# Tests for: IdBitmap
+# ====================================================
+
+
+def test_id_bitmap__empty():
+    bitmap = IdBitmap()
+
+    assert len(bitmap) == 0
+    assert not bitmap
+    assert list(bitmap) == []
+    assert 0 not in bitmap
+
+
+@pytest.mark.parametrize(
+    "ids",
+    [
+        [0],
+        [5, 5, 5],
+        [0, 1, (1 << CHUNK_BITS) - 1, 1 << CHUNK_BITS, 10**9],
+        random.Random(0).sample(range(300_000), 2_000),
+        random.Random(0).sample(range(1 << CHUNK_BITS), ARRAY_MAX_SIZE + 1),
+    ],
+)
+def test_id_bitmap__behaves_like_a_set(ids):
+    bitmap = IdBitmap(ids)
+
+    assert bitmap
+    assert len(bitmap) == len(set(ids))
+    assert list(bitmap) == sorted(set(ids))
+    assert all(i in bitmap for i in ids)
+    assert max(ids) + 1 not in bitmap
+
+
+def test_id_bitmap__union():
+    left = IdBitmap([1, 2, 1 << 20])
+    right = IdBitmap([2, 3, 1 << 30])
+
+    union = left | right
+    left |= right
+
+    assert list(union) == [1, 2, 3, 1 << 20, 1 << 30]
+    assert left == union
+    assert list(right) == [2, 3, 1 << 30]
+
+
+def test_id_bitmap__union_of_array_and_bitset_chunks():
+    dense = range(0, 2 * ARRAY_MAX_SIZE, 2)
+    left = IdBitmap(range(1, ARRAY_MAX_SIZE, 2))
+    right = IdBitmap(dense)
+
+    union = left | right
+    left |= IdBitmap([1 << CHUNK_BITS])
+
+    assert list(union) == sorted(set(range(1, ARRAY_MAX_SIZE, 2)) | set(dense))
+    assert union == IdBitmap(list(union))
+    assert list(left)[-1] == 1 << CHUNK_BITS
+
+
+def test_id_bitmap__sparse_ids_cost_bytes_not_their_chunk():
+    # a bitset reaching the top of its chunk would be over 8KB
+    assert sys.getsizeof(IdBitmap([(1 << CHUNK_BITS) - 1])) < 512
+    assert sys.getsizeof(IdBitmap(range(100, 1 << 20, 1 << CHUNK_BITS))) < 2048
+    assert sys.getsizeof(IdBitmap(range(1 << CHUNK_BITS))) < 10_000
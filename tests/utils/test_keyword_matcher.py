@@ -0,0 +1,46 @@
+import pytest
+
+from gitwit.utils.keyword_matcher import KeywordMatcher
+
+
+@pytest.mark.parametrize(
+    "keywords, text, expected",
+    [
+        (["security"], "Fix SECURITY issue", ["security"]),
+        (["todo", "fixme"], "Add todo and fixme comments", ["todo", "fixme"]),
+        (["todo", "fixme"], "Minor typo fixes", []),
+        (["key"], "Add keyboard shortcuts", ["key"]),  # substrings match by default
+        (["key", "keys", "eys"], "rotate KEYS", ["key", "keys", "eys"]),  # overlapping
+        (["password", "pass"], "passwords", ["password", "pass"]),
+        (["a.b"], "axb", []),  # keywords are literal, not regexes
+        (["a.b"], "see a.b", ["a.b"]),
+        ([], "anything", []),
+        ([""], "anything", []),
+    ],
+)
+def test_keyword_matcher__find(keywords, text, expected):
+    assert KeywordMatcher(keywords).find(text) == expected
+
+
+@pytest.mark.parametrize(
+    "keywords, text, expected",
+    [
+        (["key"], "Add keyboard shortcuts", []),
+        (["key"], "Rotate the key.", ["key"]),
+        (["key"], "monkey", []),
+        (["api", "api key"], "Rotate API key now", ["api", "api key"]),
+        (["api", "api key"], "api keys", ["api"]),
+        (["pass", "password"], "password", ["password"]),
+        (["todo"], "todo_list", []),  # underscores are part of a word
+    ],
+)
+def test_keyword_matcher__find_whole_words(keywords, text, expected):
+    assert KeywordMatcher(keywords, whole_words=True).find(text) == expected
+
+
+def test_keyword_matcher__agrees_with_substring_checks():
+    keywords = ["key", "keys", "eyst", "secret", "sec", "cre", "password", "word", "pass"]
+    matcher = KeywordMatcher(keywords)
+
+    for text in ["keystone secrets", "PassWord", "screwed", "secretkey", "keyst", ""]:
+        assert matcher.find(text) == [k for k in keywords if k in text.lower()]
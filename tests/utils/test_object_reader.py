@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from gitwit.utils.object_reader import ObjectReader
+
+
+@pytest.fixture
+def reader(git_repo):
+    reader = ObjectReader.for_repo()
+    yield reader
+    reader.close()
+
+
+def test_info(git_repo, reader):
+    sha = git_repo.commit("init", {"a.py": "12345\n"})
+    blob = git_repo.git("rev-parse", "HEAD:a.py")
+
+    head, by_path, index_path, missing = reader.info([sha, "HEAD:a.py", ":a.py", ":nope.py"])
+
+    assert (head.oid, head.type) == (sha, "commit")
+    assert (by_path.oid, by_path.type, by_path.size) == (blob, "blob", 6)
+    assert index_path == by_path
+    assert missing is None
+
+
+def test_large_batch_is_pipelined(git_repo, reader):
+    files = {f"f{i}.txt": f"{i}\n" * 200 for i in range(300)}
+    git_repo.commit("many", files)
+    names = [f"HEAD:{path}" for path in files]
+
+    infos = reader.info(names)
+
+    assert [info.size for info in infos] == [len(content) for content in files.values()]
+
+
+def test_shared_between_threads(git_repo, reader):
+    git_repo.commit("init", {f"f{i}.txt": f"{i}\n" for i in range(50)})
+    names = [f"HEAD:f{i}.txt" for i in range(50)]
+    results = []
+
+    def lookup():
+        results.append([info.size for info in reader.info(names)])
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[len(f"{i}\n") for i in range(50)]] * 8
+
+
+def test_restarts_process_that_died(git_repo, reader):
+    git_repo.commit("init", {"a.py": "a\n"})
+    reader.info(["HEAD"])
+    reader._check._proc.kill()
+    reader._check._proc.wait()
+
+    assert reader.info(["HEAD:a.py"])[0].size == 2
+
+
+def test_newline_in_name_is_rejected(git_repo, reader):
+    with pytest.raises(ValueError):
+        reader.info(["odd\nname"])
+
+
+def test_for_repo_is_shared(git_repo, reader):
+    assert ObjectReader.for_repo() is reader
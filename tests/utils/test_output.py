@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from gitwit.utils.output import OutputFormat, to_csv_row, to_record, write_records
+
+
+@dataclass
+class Inner:
+    name: str
+    when: datetime
+
+
+@dataclass
+class Row:
+    inner: Inner
+    count: int
+    took: timedelta
+    authors: Counter = field(default_factory=Counter)
+    tags: List[str] = field(default_factory=list)
+
+
+WHEN = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def make_row(n: int) -> Row:
+    return Row(Inner(f"row {n}", WHEN), n, timedelta(minutes=n), Counter(a=n), ["x", "y"])
+
+
+def test_to_record():
+    assert to_record(make_row(1)) == {
+        "inner": {"name": "row 1", "when": "2024-01-02T03:04:05+00:00"},
+        "count": 1,
+        "took": 60.0,
+        "authors": {"a": 1},
+        "tags": ["x", "y"],
+    }
+
+
+def test_to_csv_row_flattens_nested_dataclasses():
+    assert to_csv_row(make_row(2)) == {
+        "inner.name": "row 2",
+        "inner.when": "2024-01-02T03:04:05+00:00",
+        "count": 2,
+        "took": 120.0,
+        "authors": '{"a": 2}',
+        "tags": '["x", "y"]',
+    }
+
+
+def test_write_json():
+    out = io.StringIO()
+
+    assert write_records([make_row(1), make_row(2)], OutputFormat.json, out) == 2
+    assert [r["count"] for r in json.loads(out.getvalue())] == [1, 2]
+
+
+def test_write_json_without_rows_is_an_empty_array():
+    out = io.StringIO()
+
+    assert write_records([], OutputFormat.json, out) == 0
+    assert json.loads(out.getvalue()) == []
+
+
+def test_write_ndjson_streams_each_row_as_it_is_produced():
+    out = io.StringIO()
+
+    def rows():
+        yield make_row(1)
+        # the first row was written before the second was even produced
+        assert json.loads(out.getvalue())["count"] == 1
+        yield make_row(2)
+
+    assert write_records(rows(), OutputFormat.ndjson, out) == 2
+    assert [json.loads(line)["count"] for line in out.getvalue().splitlines()] == [1, 2]
+
+
+def test_write_csv():
+    out = io.StringIO()
+
+    write_records([make_row(1), make_row(2)], OutputFormat.csv, out)
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+    assert [r["inner.name"] for r in rows] == ["row 1", "row 2"]
+    assert json.loads(rows[1]["authors"]) == {"a": 2}
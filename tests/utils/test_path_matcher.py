@@ -0,0 +1,74 @@
+import pytest
+
+from gitwit.utils.path_matcher import PathMatcher
+
+
+@pytest.mark.parametrize(
+    "patterns, path, expected",
+    [
+        (["src"], "src/app.py", True),
+        (["src"], "src/sub/mod.py", True),
+        (["src/"], "src/app.py", True),
+        (["./src"], "src/app.py", True),
+        (["src"], "srcx/app.py", False),  # a prefix of the name isn't its directory
+        (["src"], "src", False),  # a file, not a directory
+        (["src"], "lib/src/app.py", False),  # anchored at the root
+        (["src/sub"], "src/app.py", False),
+        (["src/sub", "docs"], "docs/index.md", True),
+        (["services/*/tests"], "services/api/tests/test_a.py", True),
+        (["services/*/tests"], "services/api/v1/tests/test_a.py", False),
+        (["services/api-?"], "services/api-2/a.py", True),
+        (["lib/[xy]"], "lib/y/b.py", True),
+        (["lib/[xy]"], "lib/[xy]/b.py", False),
+        (["lib/\\[xy]"], "lib/[xy]/b.py", True),  # escaped, a literal name
+        (["lib/\\[xy]"], "lib/y/b.py", False),
+        (["lib/\\**"], "lib/*/b.py", True),
+        (["lib/\\**"], "lib/*x/b.py", True),  # an escaped `*`, then a glob
+        (["lib/\\**"], "lib/x/b.py", False),
+        (["a\\\\b"], "a\\b/c.py", True),  # an escaped backslash
+        (["**/migrations"], "migrations/0001.py", True),
+        (["**/migrations"], "app/db/migrations/0001.py", True),
+        (["app/**/models"], "app/models/user.py", True),
+        (["app/**/models"], "app/a/b/models/user.py", True),
+        (["app/**/models"], "lib/models/user.py", False),
+        (["docs/**"], "docs/a/b.md", True),
+        (["**"], "README", True),
+        ([], "src/app.py", False),
+        ([""], "src/app.py", False),
+        (["/"], "src/app.py", False),
+    ],
+)
+def test_path_matcher__matches(patterns, path, expected):
+    assert PathMatcher(patterns).matches(path) is expected
+
+
+@pytest.mark.parametrize(
+    "patterns, expected",
+    [
+        (["src", "docs/"], ["src/", "docs/"]),
+        (["services/*/tests"], ["services/"]),
+        (["app/**/models"], ["app/"]),
+        (["src", "**/tests"], None),
+        (["*"], None),
+        (["lib/\\[x]/*"], ["lib/[x]/"]),
+        ([], []),
+    ],
+)
+def test_path_matcher__literal_prefixes(patterns, expected):
+    assert PathMatcher(patterns).literal_prefixes() == expected
+
+
+def test_path_matcher__is_falsy_without_patterns():
+    assert not PathMatcher([])
+    assert not PathMatcher(["", "/"])
+    assert PathMatcher(["src"])
+
+
+def test_path_matcher__agrees_with_prefix_check_for_literal_directories():
+    directories = ["src", "src/sub/", "docs", "a/b/c"]
+    paths = ["src/a.py", "srcx/a.py", "src/sub/b.py", "docs", "docs/x/y.md", "a/b/c/d", "a/b/cd"]
+    matcher = PathMatcher(directories)
+
+    for path in paths:
+        expected = any(path.startswith(d.rstrip("/") + "/") for d in directories)
+        assert matcher.matches(path) is expected
@@ -0,0 +1,146 @@
+import json
+
+import pytest
+from git.cmd import Git
+
+from gitwit.utils.git_process import stream_git_output
+from gitwit.utils.object_reader import ObjectReader
+from gitwit.utils.profiler import (
+    Profiler,
+    git_subcommand,
+    phase,
+    profiled,
+    start_profiling,
+    timed,
+)
+from gitwit.utils.repo_singleton import RepoSingleton
+
+
+@pytest.fixture
+def profiler():
+    profiler = Profiler.start("test")
+    yield profiler
+    profiler.stop()
+
+
+def test_hooks_do_nothing_without_a_profiler():
+    numbers = [1, 2, 3]
+
+    with phase("idle"):
+        pass
+
+    assert Profiler.active() is None
+    assert profiled("idle", numbers) is numbers
+    assert timed("idle", len) is len
+
+
+def test_phases_are_accumulated_in_the_order_they_start(profiler):
+    with phase("outer"):
+        for _ in range(2):
+            with phase("inner"):
+                pass
+
+    assert list(profiler.phases) == ["outer", "inner"]
+    assert profiler.phases["outer"].calls == 1
+    assert profiler.phases["inner"].calls == 2
+    assert profiler.phases["outer"].wall_s >= profiler.phases["inner"].wall_s
+
+
+def test_phase_as_a_decorator(profiler):
+    @phase("decorated")
+    def double(x):
+        return 2 * x
+
+    assert double(2) == 4 and double(3) == 6
+    assert profiler.phases["decorated"].calls == 2
+
+
+def test_timed_counts_every_call(profiler):
+    add = timed("add", lambda a, b: a + b)
+
+    assert [add(i, 1) for i in range(3)] == [1, 2, 3]
+    assert profiler.phases["add"].calls == 3
+
+
+def test_profiled_closes_its_source_when_stopped_early(profiler):
+    closed = []
+
+    def numbers():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    items = profiled("numbers", numbers())
+    assert next(iter(items)) == 0
+    items.close()
+
+    assert closed == [True]
+    assert profiler.phases["numbers"].calls == 1
+
+
+def test_git_subcommand():
+    assert git_subcommand(["log", "-z"]) == "log"
+    assert git_subcommand(["-c", "core.quotepath=false", "--no-pager", "ls-files"]) == "ls-files"
+    assert git_subcommand(["--version"]) == "git"
+
+
+def test_streamed_git_output_is_counted(git_repo, profiler):
+    git_repo.commit("init", {"a.py": "x\n"})
+
+    output = b"".join(stream_git_output("log", "--format=%H"))
+
+    stats = profiler.git["log"]
+    assert (stats.processes, stats.bytes_read) == (1, len(output))
+
+
+def test_streamed_git_output_is_counted_under_its_subcommand(git_repo, profiler):
+    git_repo.commit("init", {"a.py": "x\n"})
+
+    b"".join(stream_git_output("-c", "core.quotepath=false", "log", "--format=%H"))
+
+    assert list(profiler.git) == ["log"]
+
+
+def test_gitpython_processes_are_counted_until_stopped(git_repo):
+    git_repo.commit("init", {"a.py": "x\n"})
+    execute = Git.execute
+    profiler = Profiler.start()
+
+    files = RepoSingleton.get_repo().git.ls_files()
+    profiler.stop()
+    RepoSingleton.get_repo().git.ls_files()
+
+    assert Git.execute is execute
+    assert profiler.git["ls-files"].processes == 1
+    assert profiler.git["ls-files"].bytes_read == len(files)
+
+
+def test_object_reader_output_is_counted(git_repo, profiler):
+    git_repo.commit("init", {"a.py": "12345\n"})
+    reader = ObjectReader.for_repo()
+    try:
+        (info,) = reader.info(["HEAD:a.py"])
+    finally:
+        reader.close()
+
+    stats = profiler.git["cat-file"]
+    assert stats.processes == 1
+    assert stats.bytes_read == len(f"{info.oid} blob 6\n")
+
+
+def test_start_profiling_writes_the_trace_and_stats(tmp_path, capsys):
+    output, stats = tmp_path / "profile.json", tmp_path / "profile.pstats"
+    finish = start_profiling("sa", ["sa"], output=output, cprofile_output=stats)
+
+    with phase("work"):
+        sum(range(1000))
+    finish()
+
+    trace = json.loads(output.read_text())
+    assert Profiler.active() is None
+    assert (trace["command"], trace["argv"]) == ("sa", ["sa"])
+    assert [p["name"] for p in trace["phases"]] == ["work"]
+    assert trace["git"] == {"processes": 0, "bytes_read": 0, "commands": []}
+    assert stats.stat().st_size > 0
+    assert "Profile of gitwit sa" in capsys.readouterr().err